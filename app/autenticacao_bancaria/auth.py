@@ -1,9 +1,14 @@
+import asyncio
+import hashlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt, JWTError, ExpiredSignatureError
 from passlib.context import CryptContext
 from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+from app.core.config import settings
+from app.core.cache import CacheTTL
 
 # Configurações críticas de segurança: em produção, SECRET_KEY deve vir de variável de ambiente segura
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
@@ -25,15 +30,56 @@ def hash_password(password: str) -> str:
 def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain, hashed)
 
+# Pool limitado onde o Argon2 roda, fora do event loop (criado no primeiro uso)
+_pool_hash: Executor | None = None
+
+def _obter_pool_hash() -> Executor:
+    global _pool_hash
+    if _pool_hash is None:
+        if settings.HASH_POOL_TIPO == "process":
+            _pool_hash = ProcessPoolExecutor(max_workers=settings.HASH_POOL_WORKERS)
+        else:
+            _pool_hash = ThreadPoolExecutor(
+                max_workers=settings.HASH_POOL_WORKERS,
+                thread_name_prefix="hash-senha"
+            )
+    return _pool_hash
+
+# Versões assíncronas: o hashing (dezenas de ms de CPU) não trava as outras requisições
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_obter_pool_hash(), hash_password, password)
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_obter_pool_hash(), verify_password, plain, hashed)
+
+# Encerra o pool de hashing (chamado no shutdown da aplicação)
+def encerrar_pool_hash() -> None:
+    global _pool_hash
+    if _pool_hash is not None:
+        _pool_hash.shutdown(wait=False)
+        _pool_hash = None
+
 # Criação de JWT com expiração; incluir claims adicionais se necessário (roles, permissões)
 def create_token(sub: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     return jwt.encode({"sub": sub, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# Tokens já verificados: digest do token -> 'sub', válido até o 'exp' do próprio token.
+# A assinatura é verificada uma vez por token em cada worker, não a cada requisição.
+cache_tokens = CacheTTL(tamanho_maximo=settings.JWT_CACHE_TAMANHO)
+
+
 def verificar_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     # Extrai o token do header Authorization (Bearer)
     token = credentials.credentials
+    chave = hashlib.sha256(token.encode()).digest()
+    if settings.JWT_CACHE_TAMANHO:
+        username = cache_tokens.obter(chave)
+        if username is not None:
+            return username
     try:
         # Decodifica e valida o JWT usando chave e algoritmo configurados
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -41,6 +87,8 @@ def verificar_token(credentials: HTTPAuthorizationCredentials = Depends(security
         if username is None:
             # Se não houver claim 'sub', o token é inválido
             raise HTTPException(status_code=401, detail="Token inválido")
+        if settings.JWT_CACHE_TAMANHO and payload.get("exp") is not None:
+            cache_tokens.definir(chave, username, expira_em=payload["exp"])
         return username
     except ExpiredSignatureError:
         # Token expirado: força reautenticação ou uso de refresh token
@@ -0,0 +1,179 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Cache em memória, limitado por quantidade de entradas (LRU) e com expiração
+# por entrada. Seguro para uso a partir de várias threads (dependências síncronas
+# do FastAPI rodam no threadpool).
+class CacheTTL:
+    def __init__(self, tamanho_maximo: int, ttl_padrao: Optional[float] = None):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_padrao = ttl_padrao                 # segundos; None = sem expiração
+        self._itens: OrderedDict = OrderedDict()     # chave -> (valor, expira_em)
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.expiradas = 0
+        self.despejadas = 0
+
+    # Retorna o valor guardado ou None (ausente ou expirado)
+    def obter(self, chave: Hashable) -> Any:
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            valor, expira_em = item
+            if expira_em is not None and expira_em <= time.time():
+                del self._itens[chave]
+                self.expiradas += 1
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    # Guarda um valor; expira_em (timestamp) tem precedência sobre o TTL padrão
+    def definir(self, chave: Hashable, valor: Any, expira_em: Optional[float] = None) -> None:
+        if expira_em is None and self.ttl_padrao is not None:
+            expira_em = time.time() + self.ttl_padrao
+        with self._trava:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+                self.despejadas += 1
+
+    def remover(self, chave: Hashable) -> None:
+        with self._trava:
+            self._itens.pop(chave, None)
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._itens.clear()
+
+    # Contadores para acompanhar a eficácia do cache
+    def estatisticas(self) -> dict:
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "tamanho": len(self._itens),
+                "tamanho_maximo": self.tamanho_maximo,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "expiradas": self.expiradas,
+                "despejadas": self.despejadas,
+                "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+            }
+
+
+# Interface de backend para o cache de respostas. Um cache compartilhado entre
+# workers (ou um substituto local dele) só precisa implementar estes métodos;
+# os valores guardados são sempre compatíveis com JSON.
+class BackendCache(ABC):
+    @abstractmethod
+    async def obter(self, chave: str) -> Any: ...
+
+    @abstractmethod
+    async def definir(self, chave: str, valor: Any, ttl: Optional[float] = None) -> None: ...
+
+    @abstractmethod
+    async def remover(self, chave: str) -> None: ...
+
+    @abstractmethod
+    async def limpar(self) -> None: ...
+
+
+# Backend em memória do próprio processo, baseado no CacheTTL
+class BackendMemoria(BackendCache):
+    def __init__(self, tamanho_maximo: int, ttl_padrao: Optional[float] = None):
+        self.cache = CacheTTL(tamanho_maximo, ttl_padrao)
+
+    async def obter(self, chave: str) -> Any:
+        return self.cache.obter(chave)
+
+    async def definir(self, chave: str, valor: Any, ttl: Optional[float] = None) -> None:
+        self.cache.definir(chave, valor, expira_em=time.time() + ttl if ttl else None)
+
+    async def remover(self, chave: str) -> None:
+        self.cache.remover(chave)
+
+    async def limpar(self) -> None:
+        self.cache.limpar()
+
+
+# Cache read-through de respostas com invalidação por chave.
+# Cada chave cai em uma "faixa" com contador de invalidações: uma leitura só é
+# guardada se nenhuma invalidação da faixa aconteceu enquanto ela consultava o
+# banco, evitando que um valor antigo volte ao cache logo após uma escrita.
+# Uma chave pode ter algumas variantes da resposta (ex.: só as últimas N
+# transações); elas ficam na mesma entrada do backend e são invalidadas juntas.
+class CacheRespostas:
+    FAIXAS = 4096
+    VARIANTES_POR_CHAVE = 8
+
+    def __init__(self, prefixo: str, backend: BackendCache, ttl: Optional[float] = None):
+        self.prefixo = prefixo
+        self.backend = backend
+        self.ttl = ttl
+        self._geracoes = [0] * self.FAIXAS
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def _chave(self, chave: Hashable) -> str:
+        return f"{self.prefixo}:{chave}"
+
+    def _faixa(self, chave: Hashable) -> int:
+        return hash(chave) % self.FAIXAS
+
+    # Troca o backend (ex.: por um cache compartilhado entre workers)
+    def usar_backend(self, backend: BackendCache) -> None:
+        self.backend = backend
+
+    # Marca o início de uma leitura no banco; o valor é usado em guardar()
+    def geracao(self, chave: Hashable) -> int:
+        return self._geracoes[self._faixa(chave)]
+
+    async def obter(self, chave: Hashable, variante: str = "") -> Any:
+        entrada = await self.backend.obter(self._chave(chave))
+        valor = entrada.get(variante) if entrada else None
+        if valor is None:
+            self.falhas += 1
+        else:
+            self.acertos += 1
+        return valor
+
+    async def guardar(self, chave: Hashable, valor: Any, geracao: int, variante: str = "") -> None:
+        faixa = self._faixa(chave)
+        if self._geracoes[faixa] != geracao:
+            return
+        entrada = await self.backend.obter(self._chave(chave)) or {}
+        if self._geracoes[faixa] != geracao:
+            return
+        # A variante guardada por último fica no fim; as mais antigas saem primeiro
+        entrada = {nome: v for nome, v in entrada.items() if nome != variante}
+        entrada[variante] = valor
+        while len(entrada) > self.VARIANTES_POR_CHAVE:
+            del entrada[next(iter(entrada))]
+        await self.backend.definir(self._chave(chave), entrada, self.ttl)
+
+    async def invalidar(self, *chaves: Hashable) -> None:
+        for chave in chaves:
+            self._geracoes[self._faixa(chave)] += 1
+            await self.backend.remover(self._chave(chave))
+            self.invalidacoes += 1
+
+    async def limpar(self) -> None:
+        await self.backend.limpar()
+
+    def estatisticas(self) -> dict:
+        consultas = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "invalidacoes": self.invalidacoes,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else 0.0,
+        }
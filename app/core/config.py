@@ -3,10 +3,52 @@ from pydantic_settings import BaseSettings
 # Classe de configuração da aplicação, carregando variáveis do .env
 class Settings(BaseSettings):
     DATABASE_URL: str                # URL de conexão com o banco de dados
+    DATABASE_SHARDS: str = ""        # URLs de bancos extras (separadas por vírgula): contas divididas por número
     SECRET_KEY: str                  # Chave secreta usada para assinar tokens JWT
-    #DEBUG: bool = False              # Flag para ativar/desativar modo debug
+    DEBUG: bool = False              # Flag para ativar/desativar modo debug (headers X-Consultas-SQL)
     ALGORITHM: str = "HS256"         # Algoritmo usado para criptografia JWT
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # Tempo de expiração do token em minutos
+    HASH_POOL_TIPO: str = "thread"   # Pool do hashing de senhas: "thread" ou "process"
+    HASH_POOL_WORKERS: int = 4       # Quantidade máxima de hashes Argon2 simultâneos
+    JWT_CACHE_TAMANHO: int = 10000   # Tokens já verificados mantidos em memória (0 desativa)
+    CACHE_CONTAS_TAMANHO: int = 10000  # Contas mantidas no cache de consulta (0 desativa)
+    CACHE_CONTAS_TTL: float = 60.0   # Segundos que uma conta fica no cache sem ser invalidada
+
+    # Group commit das transações (POST /banco/transacoes/)
+    GRUPO_COMMIT_ATIVO: bool = False      # Agrupa transações concorrentes em um único commit
+    GRUPO_COMMIT_JANELA_MS: float = 2.0   # Espera máxima por mais transações antes do commit
+    GRUPO_COMMIT_TAMANHO_MAXIMO: int = 256  # Transações por commit agrupado
+
+    # Travas por conta (serializam as escritas de uma mesma conta no processo)
+    TRAVAS_CONTAS_FAIXAS: int = 64           # Faixas em que as travas são distribuídas
+    TRAVAS_CONTAS_POR_FAIXA: int = 1024      # Travas ociosas mantidas por faixa
+    TRAVAS_CONTAS_OCIOSIDADE: float = 60.0   # Segundos até uma trava ociosa ser descartada
+
+    # Números de conta gerados pelo servidor (POST /banco/contas/ sem "numero")
+    NUMEROS_CONTAS_BLOCO: int = 100          # Números reservados no banco de uma vez por processo
+    NUMEROS_CONTAS_INICIO: int = 100000      # Primeiro número gerado (se ainda não houver contas acima dele)
+
+    # Snapshots de saldo (GET /banco/contas/{numero}/saldo?em=)
+    SALDO_SNAPSHOT_INTERVALO: int = 1000       # Transações de uma conta entre dois snapshots
+    SALDO_SNAPSHOT_PERIODO_S: float = 300.0    # Intervalo do job de snapshots (0 desativa)
+    SALDO_SNAPSHOT_MARGEM_S: float = 5.0       # Transações mais novas que isso ficam para a próxima rodada
+    SALDO_RECONCILIACAO_PERIODO_S: float = 3600.0  # Intervalo da reconciliação com o histórico (0 desativa)
+    SALDO_CONTAS_POR_BLOCO: int = 500          # Contas processadas por commit no job e na reconciliação
+    TRANSFERENCIAS_PENDENTES_MARGEM_S: float = 30.0  # Transferências entre shards mais novas que isso não são recuperadas pelo job
+
+    # Engine e pool de conexões
+    DB_ECHO: bool = False            # Loga todo SQL executado
+    DB_POOL_SIZE: int = 5            # Conexões mantidas abertas no pool
+    DB_MAX_OVERFLOW: int = 10        # Conexões extras permitidas em picos
+    DB_POOL_TIMEOUT: float = 30.0    # Segundos esperando uma conexão livre antes de falhar
+    DB_POOL_RECYCLE: int = 1800      # Recicla conexões mais velhas que isso (segundos, -1 desativa)
+    DB_POOL_PRE_PING: bool = True    # Testa a conexão antes de entregá-la
+
+    # PRAGMAs aplicados em cada conexão SQLite
+    SQLITE_JOURNAL_MODE: str = "WAL"     # WAL: leitores não bloqueiam o escritor
+    SQLITE_SYNCHRONOUS: str = "NORMAL"   # NORMAL em WAL: sem fsync a cada commit
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000   # Espera pelo lock de escrita em vez de falhar
+    SQLITE_CACHE_SIZE: int = -64000      # Cache de páginas (negativo = KiB)
 
     class Config:
         env_file = ".env"            # Arquivo de onde as variáveis serão carregadas
@@ -0,0 +1,95 @@
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metricas import rota_do_escopo
+from app.database.session import Base
+
+# Contagem de comandos SQL e linhas por requisição.
+# O contador da requisição fica em uma ContextVar: os eventos do SQLAlchemy
+# rodam dentro do greenlet do driver assíncrono, que herda o contexto da task
+# da requisição, então cada requisição enxerga apenas os próprios comandos.
+
+
+@dataclass
+class ContagemSQL:
+    metodo: str = ""
+    rota: str = ""
+    consultas: int = 0
+    linhas: int = 0                                  # linhas lidas + linhas escritas
+    por_comando: Counter = field(default_factory=Counter)
+
+    # Comando mais repetido na requisição: o sinal típico de N+1
+    def mais_repetido(self) -> tuple[Optional[str], int]:
+        if not self.por_comando:
+            return None, 0
+        return self.por_comando.most_common(1)[0]
+
+
+_contagem_atual: ContextVar[Optional[ContagemSQL]] = ContextVar("contagem_sql", default=None)
+
+# Funções chamadas com a ContagemSQL ao fim de cada requisição (usado nos testes)
+observadores: list[Callable[[ContagemSQL], None]] = []
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _contar_comando(conn, cursor, statement, parameters, context, executemany):
+    contagem = _contagem_atual.get()
+    if contagem is None:
+        return
+    contagem.consultas += 1
+    contagem.por_comando[statement] += 1
+    # rowcount só é confiável para escritas; leituras são contadas no "load"
+    if context.isinsert or context.isupdate or context.isdelete:
+        contagem.linhas += max(cursor.rowcount, 0)
+
+
+@event.listens_for(Base, "load", propagate=True)
+def _contar_objeto(objeto, contexto):
+    contagem = _contagem_atual.get()
+    if contagem is not None:
+        contagem.linhas += 1
+
+
+# Linhas lidas por projeções (select de colunas), que não passam pelo "load"
+def contar_linhas(quantidade: int) -> None:
+    contagem = _contagem_atual.get()
+    if contagem is not None:
+        contagem.linhas += quantidade
+
+
+# Middleware ASGI: abre uma contagem por requisição. Com DEBUG ligado, devolve
+# os totais nos headers X-Consultas-SQL e X-Linhas-SQL (em respostas em
+# streaming, os headers saem antes do corpo e contam só o que rodou até ali).
+class MiddlewareConsultasSQL:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        contagem = ContagemSQL(metodo=scope["method"])
+        token = _contagem_atual.set(contagem)
+
+        async def enviar(mensagem):
+            if settings.DEBUG and mensagem["type"] == "http.response.start":
+                mensagem["headers"] = list(mensagem.get("headers", [])) + [
+                    (b"x-consultas-sql", str(contagem.consultas).encode()),
+                    (b"x-linhas-sql", str(contagem.linhas).encode()),
+                ]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _contagem_atual.reset(token)
+            contagem.rota = rota_do_escopo(scope)
+            for observador in observadores:
+                observador(contagem)
@@ -0,0 +1,245 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+
+# Métricas no formato de texto do Prometheus, sem dependências externas.
+# Cada observação custa uma busca binária e alguns incrementos sob uma trava,
+# barato o suficiente para ficar ligado com a aplicação sob carga total.
+
+BALDES_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _rotulos(nomes: tuple, valores: tuple, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._trava = threading.Lock()
+
+    def _cabecalho(self) -> list[str]:
+        return [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: dict[tuple, float] = {}
+
+    def incrementar(self, *valores_rotulos, quantidade: float = 1) -> None:
+        with self._trava:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0) + quantidade
+
+    def exportar(self) -> list[str]:
+        with self._trava:
+            itens = list(self._valores.items())
+        return self._cabecalho() + [
+            f"{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}" for chave, valor in itens
+        ]
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: dict[tuple, float] = {}
+
+    def somar(self, *valores_rotulos, quantidade: float = 1) -> None:
+        with self._trava:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0) + quantidade
+
+    def definir(self, *valores_rotulos, valor: float) -> None:
+        with self._trava:
+            self._valores[valores_rotulos] = valor
+
+    def exportar(self) -> list[str]:
+        with self._trava:
+            itens = list(self._valores.items())
+        return self._cabecalho() + [
+            f"{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}" for chave, valor in itens
+        ]
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome, ajuda, rotulos=(), baldes=BALDES_PADRAO):
+        super().__init__(nome, ajuda, rotulos)
+        self.baldes = tuple(baldes)
+        self._series: dict[tuple, list] = {}   # rótulos -> [contagens por balde..., soma, total]
+
+    def observar(self, valor: float, *valores_rotulos) -> None:
+        posicao = bisect_left(self.baldes, valor)
+        with self._trava:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [0] * (len(self.baldes) + 2)
+            if posicao < len(self.baldes):
+                serie[posicao] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exportar(self) -> list[str]:
+        with self._trava:
+            series = [(chave, list(serie)) for chave, serie in self._series.items()]
+        linhas = self._cabecalho()
+        for chave, serie in series:
+            acumulado = 0
+            for limite, contagem in zip(self.baldes, serie):
+                acumulado += contagem
+                le = f'le="{_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, chave, le)} {acumulado}")
+            le = 'le="+Inf"'
+            linhas.append(f"{self.nome}_bucket{_rotulos(self.rotulos, chave, le)} {serie[-1]}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {_numero(serie[-2])}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {serie[-1]}")
+        return linhas
+
+
+# Registro de métricas e de coletores chamados na hora da leitura (/metrics)
+class Registro:
+    def __init__(self):
+        self._metricas: list[_Metrica] = []
+        self._coletores: list[Callable[[], Iterable[_Metrica]]] = []
+
+    def adicionar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def coletor(self, funcao: Callable[[], Iterable[_Metrica]]):
+        self._coletores.append(funcao)
+        return funcao
+
+    def exportar(self) -> str:
+        linhas = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.exportar())
+        for coletor in self._coletores:
+            for metrica in coletor():
+                linhas.extend(metrica.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+registro = Registro()
+
+# HTTP
+requisicoes_total = registro.adicionar(Contador(
+    "http_requisicoes_total", "Requisicoes HTTP atendidas", ("metodo", "rota", "status")))
+requisicao_duracao = registro.adicionar(Histograma(
+    "http_requisicao_duracao_segundos", "Latencia das requisicoes HTTP por rota", ("metodo", "rota")))
+requisicoes_em_andamento = registro.adicionar(Medidor(
+    "http_requisicoes_em_andamento", "Requisicoes HTTP sendo processadas agora", ("metodo",)))
+
+# Banco de dados
+comando_duracao = registro.adicionar(Histograma(
+    "db_comando_duracao_segundos", "Duracao de cada comando SQL", ("operacao",)))
+comando_erros = registro.adicionar(Contador(
+    "db_comando_erros_total", "Comandos SQL que falharam", ("operacao",)))
+espera_pool = registro.adicionar(Histograma(
+    "db_pool_espera_segundos", "Espera para obter uma conexao do pool"))
+
+
+# Template da rota atendida. Versões novas do FastAPI guardam o caminho completo
+# (com o prefixo do include_router) em scope["fastapi"]; nas anteriores as rotas
+# já vêm achatadas e scope["route"].path basta.
+def rota_do_escopo(scope) -> str:
+    contexto = scope.get("fastapi", {}).get("effective_route_context")
+    caminho = getattr(contexto, "path", None) or getattr(scope.get("route"), "path", None)
+    return caminho or "<nao_mapeada>"
+
+
+# Middleware ASGI: latência, status e requisições em andamento por rota.
+# A rota é o template (ex.: /banco/contas/{numero}), não o caminho da URL,
+# para manter a cardinalidade das séries limitada.
+class MiddlewareMetricas:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        status = [500]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = mensagem["status"]
+            await send(mensagem)
+
+        requisicoes_em_andamento.somar(metodo)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            requisicoes_em_andamento.somar(metodo, quantidade=-1)
+            rota = rota_do_escopo(scope)
+            requisicao_duracao.observar(duracao, metodo, rota)
+            requisicoes_total.incrementar(metodo, rota, str(status[0]))
+
+
+# Primeira palavra do SQL (SELECT, INSERT, UPDATE...), usada como rótulo
+def _operacao(sql: str) -> str:
+    return sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "?"
+
+
+# Engines instrumentados, por nome; os medidores do pool são lidos no /metrics
+_engines: dict = {}
+
+
+@registro.coletor
+def _coletar_pools():
+    medidor = Medidor("db_pool_conexoes", "Conexoes do pool por estado", ("banco", "estado"))
+    for nome, engine in _engines.items():
+        pool = engine.pool
+        for estado in ("size", "checkedin", "checkedout", "overflow"):
+            leitura = getattr(pool, estado, None)
+            if leitura is not None:
+                medidor.definir(nome, estado, valor=leitura())
+    return [medidor]
+
+
+# Registra a duração de cada comando SQL e expõe o estado do pool do engine
+def instrumentar_engine(engine, nome: str = "principal") -> None:
+    alvo = engine.sync_engine
+    _engines[nome] = engine
+
+    @event.listens_for(alvo, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        context._inicio_metricas = time.perf_counter()
+
+    @event.listens_for(alvo, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        inicio = getattr(context, "_inicio_metricas", None)
+        if inicio is not None:
+            comando_duracao.observar(time.perf_counter() - inicio, _operacao(statement))
+
+    @event.listens_for(alvo, "handle_error")
+    def _erro(contexto_excecao):
+        comando_erros.incrementar(_operacao(contexto_excecao.statement or ""))
@@ -0,0 +1,28 @@
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+# Resposta JSON serializada com orjson (em C), para dicts/listas já no formato
+# final. Devolver uma Response direto dispensa a validação do response_model.
+class RespostaORJSON(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+# Monta a resposta a partir de dados já projetados. Em DEBUG os dados passam
+# pelo TypeAdapter do schema de saída, para a projeção não divergir do contrato
+# documentado no OpenAPI; em produção a validação é pulada.
+def resposta_json(
+    dados: Any,
+    adaptador: Optional[TypeAdapter] = None,
+    status_code: int = 200,
+    headers: Optional[dict] = None
+) -> RespostaORJSON:
+    if settings.DEBUG and adaptador is not None:
+        adaptador.validate_python(dados)
+    return RespostaORJSON(dados, status_code=status_code, headers=headers)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Hashable
+
+# Travas assíncronas por chave (ex.: número da conta), dentro do processo.
+# Operações na mesma chave rodam uma de cada vez, na ordem de chegada; chaves
+# diferentes seguem em paralelo. As entradas ficam em faixas (LRU por faixa):
+# uma trava ociosa há mais de "ociosidade" segundos, ou além do limite da
+# faixa, é descartada — só as travas em uso nunca saem.
+
+
+class _Entrada:
+    __slots__ = ("trava", "em_uso", "ultimo_uso", "aquisicoes", "disputas", "espera_total")
+
+    def __init__(self):
+        self.trava = asyncio.Lock()
+        self.em_uso = 0             # quem segura ou espera a trava agora
+        self.ultimo_uso = 0.0
+        self.aquisicoes = 0
+        self.disputas = 0           # aquisições que precisaram esperar
+        self.espera_total = 0.0
+
+
+class TravasPorChave:
+    def __init__(self, faixas: int = 64, maximo_por_faixa: int = 1024, ociosidade: float = 60.0):
+        self.faixas = [OrderedDict() for _ in range(faixas)]
+        self.maximo_por_faixa = maximo_por_faixa
+        self.ociosidade = ociosidade
+        self.aquisicoes = 0
+        self.disputas = 0
+        self.espera_total = 0.0
+
+    def _faixa(self, chave: Hashable) -> OrderedDict:
+        return self.faixas[hash(chave) % len(self.faixas)]
+
+    def _entrada(self, chave: Hashable) -> _Entrada:
+        faixa = self._faixa(chave)
+        entrada = faixa.get(chave)
+        if entrada is None:
+            self._despejar(faixa)
+            entrada = faixa[chave] = _Entrada()
+        faixa.move_to_end(chave)
+        return entrada
+
+    # Remove as travas ociosas mais antigas da faixa (nunca as que estão em uso)
+    def _despejar(self, faixa: OrderedDict) -> None:
+        limite = time.monotonic() - self.ociosidade
+        for chave in list(faixa):
+            entrada = faixa[chave]
+            cheia = len(faixa) >= self.maximo_por_faixa
+            if entrada.em_uso == 0 and (cheia or entrada.ultimo_uso < limite):
+                del faixa[chave]
+            elif not cheia:
+                break
+
+    @asynccontextmanager
+    async def travar(self, chave: Hashable):
+        entrada = self._entrada(chave)
+        entrada.em_uso += 1
+        disputada = entrada.trava.locked()
+        inicio = time.perf_counter()
+        try:
+            async with entrada.trava:
+                espera = time.perf_counter() - inicio
+                entrada.aquisicoes += 1
+                self.aquisicoes += 1
+                if disputada:
+                    entrada.disputas += 1
+                    entrada.espera_total += espera
+                    self.disputas += 1
+                    self.espera_total += espera
+                yield
+        finally:
+            entrada.em_uso -= 1
+            entrada.ultimo_uso = time.monotonic()
+
+    # Várias chaves de uma vez, sempre em ordem crescente: duas operações que
+    # pedem as mesmas chaves em ordens diferentes não travam uma à outra
+    @asynccontextmanager
+    async def travar_varias(self, *chaves: Hashable):
+        async with AsyncExitStack() as pilha:
+            for chave in sorted(set(chaves)):
+                await pilha.enter_async_context(self.travar(chave))
+            yield
+
+    # Esquece todas as travas e contadores (nenhuma trava pode estar em uso)
+    def limpar(self) -> None:
+        for faixa in self.faixas:
+            faixa.clear()
+        self.aquisicoes = self.disputas = 0
+        self.espera_total = 0.0
+
+    def __len__(self) -> int:
+        return sum(len(faixa) for faixa in self.faixas)
+
+    # Chaves com mais tempo de espera acumulado (as contas "quentes")
+    def mais_disputadas(self, quantidade: int = 10) -> list[dict]:
+        entradas = [(chave, e) for faixa in self.faixas for chave, e in faixa.items() if e.disputas]
+        entradas.sort(key=lambda item: item[1].espera_total, reverse=True)
+        return [
+            {
+                "chave": chave,
+                "aquisicoes": e.aquisicoes,
+                "disputas": e.disputas,
+                "espera_total_s": round(e.espera_total, 6),
+            }
+            for chave, e in entradas[:quantidade]
+        ]
+
+    def estatisticas(self) -> dict:
+        return {
+            "entradas": len(self),
+            "aquisicoes": self.aquisicoes,
+            "disputas": self.disputas,
+            "espera_total_s": self.espera_total,
+        }
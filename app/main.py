@@ -3,7 +3,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
-from app.database.session import Base, engine
+from app.core.config import settings
+from app.database.session import Base, engines
+from app.autenticacao_bancaria.auth import encerrar_pool_hash
+from app.core.metricas import MiddlewareMetricas
+from app.core.consultas_sql import MiddlewareConsultasSQL
+from app.service.escritor_agrupado import encerrar_escritores, iniciar_escritores
+from app.service.service_bancario import ServiceBancario
+from app.service.service_saldos import encerrar_job_de_saldos, iniciar_job_de_saldos
 from app.rotas_principais import api_router
 
 # Instancia a aplicação FastAPI com metadados da API
@@ -24,12 +31,33 @@ app.add_middleware(
     allow_headers=["*"],  # permite todos os headers
 )
 
+# Mede latência e status de cada requisição por rota (exposto em /metrics)
+app.add_middleware(MiddlewareMetricas)
+
+# Conta comandos SQL e linhas por requisição (headers X-Consultas-SQL em DEBUG)
+app.add_middleware(MiddlewareConsultasSQL)
+
 # Evento executado na inicialização da aplicação
 @app.on_event("startup")
 async def startup_event():
-    async with engine.begin() as conn:
-        # Cria as tabelas no banco caso não existam
-        await conn.run_sync(Base.metadata.create_all)
+    for engine in engines:
+        async with engine.begin() as conn:
+            # Cria as tabelas em cada shard caso não existam
+            await conn.run_sync(Base.metadata.create_all)
+    # Um escritor do group commit por shard, vivo enquanto a aplicação rodar
+    if settings.GRUPO_COMMIT_ATIVO:
+        iniciar_escritores(engines, ServiceBancario._aplicar_grupo)
+    # Snapshots de saldo e reconciliação com o histórico em segundo plano
+    iniciar_job_de_saldos(engines)
+
+# Evento executado no encerramento da aplicação
+@app.on_event("shutdown")
+async def shutdown_event():
+    await encerrar_job_de_saldos()
+    # Grava as transações que ainda estão na fila do group commit
+    await encerrar_escritores()
+    # Libera o pool usado no hashing de senhas
+    encerrar_pool_hash()
 
 # Inclui as rotas principais da API
 app.include_router(api_router)
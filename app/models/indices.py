@@ -0,0 +1,34 @@
+from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint
+
+from app.models.models_cliente import Cliente
+from app.models.models_conta import Conta
+from app.models.models_transacao import Transacao
+from app.models.models_saldo import SaldoSnapshot
+from app.models.models_resumo import ResumoDiario
+
+# Colunas usadas nas buscas mais frequentes da API: cada uma precisa ser a
+# primeira coluna de algum índice (ou constraint única/chave primária)
+COLUNAS_DE_BUSCA = (
+    Cliente.cpf,           # criar_cliente / criar_conta buscam o cliente pelo CPF
+    Conta.numero,          # consultas e transações localizam a conta pelo número
+    Transacao.conta_id,    # histórico, extrato e saldo filtram as transações da conta
+    SaldoSnapshot.conta_id,  # saldo em uma data busca o snapshot mais próximo da conta
+    ResumoDiario.dia,        # relatório diário filtra os resumos pelo período
+)
+
+
+# Retorna "tabela.coluna" para cada coluna de busca que não lidera nenhum índice
+def colunas_sem_indice(colunas=COLUNAS_DE_BUSCA) -> list[str]:
+    faltando = []
+    for atributo in colunas:
+        coluna = atributo.property.columns[0]
+        tabela = coluna.table
+        lideres = {indice.columns[0].name for indice in tabela.indexes if indice.columns}
+        lideres |= {
+            list(constraint.columns)[0].name
+            for constraint in tabela.constraints
+            if isinstance(constraint, (UniqueConstraint, PrimaryKeyConstraint)) and constraint.columns
+        }
+        if coluna.name not in lideres:
+            faltando.append(f"{tabela.name}.{coluna.name}")
+    return faltando
@@ -22,4 +22,5 @@ class Cliente(Base):
     data_nascimento: Mapped[str] = mapped_column(String, nullable=False)
 
     # Relacionamento: um cliente pode ter várias contas
-    contas = relationship("Conta", back_populates="cliente", lazy="selectin")
+    # (carregado só quando a consulta pede, ver app/models/perfis.py)
+    contas = relationship("Conta", back_populates="cliente", lazy="raise_on_sql")
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, ForeignKey, Float
+from sqlalchemy import Integer, String, ForeignKey, Float, inspect
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.database.session import Base
 from typing import List
@@ -23,10 +23,11 @@ class Conta(Base):
     cliente_id: Mapped[int] = mapped_column(Integer, ForeignKey("clientes.id"))
 
     # Relacionamento: uma conta pertence a um cliente
-    cliente = relationship("Cliente", back_populates="contas", lazy="selectin")
+    # (os relacionamentos são carregados só quando a consulta pede, ver app/models/perfis.py)
+    cliente = relationship("Cliente", back_populates="contas", lazy="raise_on_sql")
 
     # Relacionamento: uma conta pode ter várias transações
-    transacoes = relationship("Transacao", back_populates="conta", lazy="selectin")
+    transacoes = relationship("Transacao", back_populates="conta", lazy="raise_on_sql")
 
     # Propriedade para acessar o nome do titular
     @property
@@ -34,6 +35,9 @@ class Conta(Base):
         return self.cliente.nome if self.cliente else None 
 
     # Propriedade para acessar o histórico de transações
+    # (vazio quando a consulta optou por não carregar o histórico)
     @property 
     def historico(self) -> List:
+        if "transacoes" in inspect(self).unloaded:
+            return []
         return self.transacoes
@@ -0,0 +1,29 @@
+from sqlalchemy import Date, Integer, String, Float, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import date
+from app.database.session import Base
+
+# Modelo ResumoDiario guarda os totais de um dia por conta e tipo de transação.
+# É atualizado junto com cada escrita no histórico (ServiceBancario._registrar_lancamentos),
+# então os relatórios diários leem estas linhas em vez de agrupar "transacoes"
+class ResumoDiario(Base):
+    __tablename__ = "resumos_diarios"
+
+    __table_args__ = (
+        # Chave do upsert: uma linha por conta, dia e tipo
+        Index("ix_resumos_diarios_conta_id_dia_tipo", "conta_id", "dia", "tipo_de_transacao", unique=True),
+        # Relatórios filtram por período
+        Index("ix_resumos_diarios_dia_conta_id", "dia", "conta_id"),
+    )
+
+    # Identificador único da linha
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Conta, dia (UTC) e tipo de transação resumidos
+    conta_id: Mapped[int] = mapped_column(Integer, ForeignKey("contas.id"))
+    dia: Mapped[date] = mapped_column(Date)
+    tipo_de_transacao: Mapped[str] = mapped_column(String)
+
+    # Quantidade de transações e soma dos valores no dia
+    quantidade: Mapped[int] = mapped_column(Integer)
+    total: Mapped[float] = mapped_column(Float)
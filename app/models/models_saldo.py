@@ -0,0 +1,30 @@
+from sqlalchemy import DateTime, Integer, Float, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database.session import Base
+
+# Modelo SaldoSnapshot guarda o saldo de uma conta em um ponto do histórico:
+# a soma de todas as transações até (data, ate_transacao_id), na ordem do
+# índice de transações. O saldo em uma data qualquer é o snapshot anterior
+# mais as poucas transações depois dele (ver app/service/service_saldos.py)
+class SaldoSnapshot(Base):
+    __tablename__ = "saldos_snapshot"
+
+    # Snapshot mais próximo de uma data: busca por (conta_id, data) em ordem
+    # decrescente; único para o job nunca gravar o mesmo ponto duas vezes
+    __table_args__ = (
+        Index("ix_saldos_snapshot_conta_id_data_transacao", "conta_id", "data", "ate_transacao_id", unique=True),
+    )
+
+    # Identificador único do snapshot
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Conta a que o snapshot pertence
+    conta_id: Mapped[int] = mapped_column(Integer, ForeignKey("contas.id"))
+
+    # Data e id da última transação incluída no snapshot
+    data: Mapped[datetime] = mapped_column(DateTime)
+    ate_transacao_id: Mapped[int] = mapped_column(Integer)
+
+    # Saldo da conta logo após essa transação
+    saldo: Mapped[float] = mapped_column(Float)
@@ -0,0 +1,16 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database.session import Base
+
+# Modelo Sequencia guarda o próximo valor livre de uma sequência (uma linha
+# por nome). Os processos reservam blocos de valores com um único UPDATE ...
+# RETURNING e entregam o bloco da memória (ver app/service/sequencias.py),
+# o que funciona igual no SQLite e no PostgreSQL
+class Sequencia(Base):
+    __tablename__ = "sequencias"
+
+    # Nome da sequência (ex.: "contas")
+    nome: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    # Primeiro valor ainda não reservado por nenhum processo
+    proximo: Mapped[int] = mapped_column(Integer, nullable=False)
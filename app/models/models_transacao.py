@@ -1,16 +1,28 @@
-from sqlalchemy import DateTime, Integer, String, Float, ForeignKey
+from sqlalchemy import DateTime, Integer, String, Float, ForeignKey, Index, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.database.session import Base
 
+# Tipos que somam ao saldo da conta; os demais (saque, transferencia_saida) subtraem.
+# "estorno" devolve à origem uma transferência entre shards que o destino recusou
+TIPOS_DE_CREDITO = ("deposito", "transferencia_entrada", "estorno")
+
 # Modelo Transacao representa movimentações financeiras ligadas a uma conta
 class Transacao(Base):
     __tablename__ = "transacoes"
 
+    # Índice composto para o histórico de uma conta (conta_id é a coluna líder,
+    # então também atende buscas só por conta_id) em ordem de (data, id), a
+    # mesma chave do cursor da paginação de GET /banco/contas/{numero}/transacoes
+    __table_args__ = (
+        Index("ix_transacoes_conta_id_data_id", "conta_id", "data", "id"),
+    )
+
     # Identificador único da transação
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
 
-    # Tipo da transação: "deposito" ou "saque"
+    # Tipo da transação: "deposito", "saque", "transferencia_saida", "transferencia_entrada" ou "estorno"
     tipo_de_transacao: Mapped[str] = mapped_column(String, nullable=False)
 
     # Valor movimentado (idealmente usar Decimal em cenários bancários reais)
@@ -23,4 +35,15 @@ class Transacao(Base):
     conta_id: Mapped[int] = mapped_column(Integer, ForeignKey("contas.id"))
 
     # Relacionamento: cada transação pertence a uma conta
-    conta = relationship("Conta", back_populates="transacoes")
+    conta = relationship("Conta", back_populates="transacoes", lazy="raise_on_sql")
+
+    # Valor com o sinal do efeito no saldo (+ crédito, - débito). Em consultas
+    # vira um CASE, então "func.sum(Transacao.valor_com_sinal)" soma o saldo no banco
+    @hybrid_property
+    def valor_com_sinal(self) -> float:
+        return self.valor if self.tipo_de_transacao in TIPOS_DE_CREDITO else -self.valor
+
+    @valor_com_sinal.inplace.expression
+    @classmethod
+    def _valor_com_sinal(cls):
+        return case((cls.tipo_de_transacao.in_(TIPOS_DE_CREDITO), cls.valor), else_=-cls.valor)
@@ -0,0 +1,36 @@
+from sqlalchemy import DateTime, Integer, Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database.session import Base
+
+# Modelo TransferenciaPendente é a saída (outbox) de uma transferência entre
+# contas de shards diferentes: gravada no shard da origem na mesma transação
+# do débito e apagada quando o destino decide (crédito ou estorno). Linhas que
+# sobram são terminadas por ServiceBancario.recuperar_transferencias
+class TransferenciaPendente(Base):
+    __tablename__ = "transferencias_pendentes"
+
+    # Identificador único da transferência no shard da origem
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    # Números das contas e valor debitado da origem
+    conta_origem: Mapped[int] = mapped_column(Integer, nullable=False)
+    conta_destino: Mapped[int] = mapped_column(Integer, nullable=False)
+    valor: Mapped[float] = mapped_column(Float, nullable=False)
+
+    # Momento do débito (também a data do lançamento de entrada no destino)
+    data: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+# Modelo TransferenciaRecebida guarda, no shard do destino, a decisão sobre
+# uma transferência pendente. A chave (shard da origem, id da pendente) é
+# única: duas tentativas ao mesmo tempo não creditam nem estornam duas vezes
+class TransferenciaRecebida(Base):
+    __tablename__ = "transferencias_recebidas"
+
+    # Shard da conta de origem e id da pendente gravada nele
+    shard_origem: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    transferencia_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+
+    # "creditada" (o valor entrou no destino) ou "estornada" (volta para a origem)
+    situacao: Mapped[str] = mapped_column(String(20), nullable=False)
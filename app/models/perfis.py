@@ -0,0 +1,44 @@
+from enum import Enum
+
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+
+from app.models.models_cliente import Cliente
+from app.models.models_conta import Conta
+
+# Perfis de carregamento: cada consulta declara explicitamente o que precisa.
+# Os relacionamentos dos modelos usam lazy="raise_on_sql", então qualquer acesso
+# a algo que o perfil não carregou falha em vez de disparar SQL escondido.
+
+class PerfilConta(str, Enum):
+    RESUMO = "resumo"                # só as colunas da conta (caminho de escrita)
+    COM_TITULAR = "com_titular"      # conta + cliente titular
+    COM_HISTORICO = "com_historico"  # conta + titular + histórico de transações
+
+
+class PerfilCliente(str, Enum):
+    RESUMO = "resumo"                # só as colunas do cliente
+    COM_CONTAS = "com_contas"        # cliente + contas (sem histórico)
+    COM_HISTORICO = "com_historico"  # cliente + contas + histórico de cada conta
+
+
+# Opções de carregamento de Conta para cada perfil
+def opcoes_conta(perfil: PerfilConta) -> tuple:
+    if perfil == PerfilConta.RESUMO:
+        return (raiseload(Conta.cliente), raiseload(Conta.transacoes))
+
+    # Titular via JOIN (muitos-para-um): nenhuma consulta extra
+    titular = joinedload(Conta.cliente).raiseload(Cliente.contas)
+    if perfil == PerfilConta.COM_TITULAR:
+        return (titular, raiseload(Conta.transacoes))
+    return (titular, selectinload(Conta.transacoes))
+
+
+# Opções de carregamento de Cliente para cada perfil
+def opcoes_cliente(perfil: PerfilCliente) -> tuple:
+    if perfil == PerfilCliente.RESUMO:
+        return (raiseload(Cliente.contas),)
+
+    contas = selectinload(Cliente.contas)
+    if perfil == PerfilCliente.COM_CONTAS:
+        return (contas.raiseload(Conta.transacoes),)
+    return (contas.selectinload(Conta.transacoes),)
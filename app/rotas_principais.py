@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from app.routers.routers_registro_login import router as auth
 from app.routers.routers_banco import router as banco
 from app.routers.routers_get import router as get
+from app.routers.routers_metricas import router as metricas
 
 # Cria um roteador principal para agrupar todos os módulos da API
 api_router = APIRouter()
@@ -14,3 +15,6 @@ api_router.include_router(banco, prefix='/banco', tags=['banco'])
 
 # Inclui as rotas de consultas (listar clientes, contas, etc.) sob o prefixo /get
 api_router.include_router(get, prefix='/get', tags=['get'])
+
+# Inclui a rota de métricas (Prometheus) na raiz: /metrics
+api_router.include_router(metricas, tags=['metricas'])
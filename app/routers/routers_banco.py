@@ -1,11 +1,32 @@
-from fastapi import APIRouter, HTTPException, status, APIRouter, Depends
+import csv
+import io
+from datetime import date, datetime
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, HTTPException, status, APIRouter, Depends, Body, Query, Request
+from fastapi.responses import StreamingResponse
 
 from app.schemas.schemas_do_cliente import ClienteIn, ClienteOut
-from app.schemas.schemas_da_conta import ContaIn, ContaOut
-from app.schemas.schemas_da_transacao import TransacaoIn, TransacaoOut, MensagemOut
+from app.schemas.schemas_da_importacao import ImportacaoOut
+from app.schemas.schemas_dos_relatorios import ResumoDiarioOut, ADAPTADOR_LISTA_RESUMOS
+from app.schemas.schemas_da_conta import (
+    ContaIn, ContaOut, SaldoEmOut, BuscaContaOut, ADAPTADOR_CONTA, ADAPTADOR_LISTA_BUSCA_CONTAS
+)
+from app.schemas.schemas_da_transacao import (
+    TransacaoIn, TransacaoOut, MensagemOut, TransacaoRealizadaOut, LoteTransacoesOut, ADAPTADOR_LISTA_TRANSACOES,
+    TransferenciaIn, TransferenciaRealizadaOut
+)
 
+from app.core.respostas import resposta_json
+from app.service.projecoes import CHAVES_POR_BUSCA, formatar_data
 from app.database.session import get_session, AsyncSession
-from app.service.service_bancario import ServiceBancario
+from app.service.service_bancario import (
+    ServiceBancario, LIMITE_LOTE, PAGINA_TRANSACOES, PAGINA_TRANSACOES_MAXIMA, TIPOS_DO_HISTORICO
+)
+from app.service.service_saldos import ServiceSaldos
+from app.service.service_importacao import ServiceImportacao, registros_csv, registros_ndjson
+from app.service.service_relatorios import ServiceRelatorios, RELATORIO_DIAS_MAXIMO
 from app.autenticacao_bancaria.auth import verificar_token
 
 router = APIRouter()  # Cria o roteador para agrupar as rotas da API
@@ -51,7 +72,7 @@ async def criar2(criar: ContaIn, session: AsyncSession = Depends(get_session)):
 @router.post(
     "/transacoes/",
     summary="Criar transacao",
-    response_model=MensagemOut,
+    response_model=TransacaoRealizadaOut,
     status_code=status.HTTP_200_OK
 )
 async def criar3(
@@ -68,16 +89,227 @@ async def criar3(
         raise HTTPException(status_code=400, detail="Tipo invalido")
     return result
 
+# Endpoint para aplicar um lote de transações (depósitos e saques) de uma vez
+@router.post(
+    "/transacoes/lote",
+    summary="Criar transacoes em lote",
+    response_model=LoteTransacoesOut,
+    status_code=status.HTTP_200_OK
+)
+async def criar_lote(
+    criar: list[TransacaoIn] = Body(..., min_length=1, max_length=LIMITE_LOTE),
+    session: AsyncSession = Depends(get_session),
+    username: str = Depends(verificar_token)
+):
+    # Cada item tem seu próprio resultado; falhas não interrompem o lote
+    return await ServiceBancario.criar_transacoes_em_lote(criar, session)
+
+# Endpoint para transferir entre duas contas (débito e crédito no mesmo commit)
+@router.post(
+    "/transferencias/",
+    summary="Transferir entre contas",
+    response_model=TransferenciaRealizadaOut,
+    status_code=status.HTTP_200_OK
+)
+async def transferir(
+    criar: TransferenciaIn,
+    session: AsyncSession = Depends(get_session),
+    username: str = Depends(verificar_token)
+):
+    result = await ServiceBancario.transferir(criar, session)
+    if result == "conta_origem_nao_encontrada":
+        raise HTTPException(status_code=404, detail="Conta de origem nao encontrada")
+    if result == "conta_destino_nao_encontrada":
+        raise HTTPException(status_code=404, detail="Conta de destino nao encontrada")
+    if result == "saldo_insuficiente":
+        raise HTTPException(status_code=400, detail="Saldo insuficiente")
+    if result == "mesma_conta":
+        raise HTTPException(status_code=400, detail="Conta de origem e destino iguais")
+    if result == "transferencia_estornada":
+        raise HTTPException(
+            status_code=409, detail="Credito recusado pela conta de destino; o valor foi estornado para a origem"
+        )
+    if result == "transferencia_pendente":
+        raise HTTPException(
+            status_code=503,
+            detail="Credito na conta de destino pendente; a transferencia sera concluida ou estornada automaticamente"
+        )
+    return result
+
+# Endpoint para importar clientes e contas em massa (corpo CSV ou NDJSON lido em streaming)
+@router.post(
+    "/importacao",
+    summary="Importar clientes e contas",
+    response_model=ImportacaoOut,
+    status_code=status.HTTP_200_OK
+)
+async def importar(
+    request: Request,
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    session: AsyncSession = Depends(get_session),
+    username: str = Depends(verificar_token)
+):
+    # Colunas/campos: nome, cpf, endereco, data_nascimento, numero (opcional).
+    # Linhas com erro não interrompem a importação: vão para o relatório
+    ler = registros_ndjson if formato == "ndjson" else registros_csv
+    return await ServiceImportacao.importar(ler(request.stream()), session)
+
+# Endpoint para buscar várias contas pelo número de uma vez ("numeros=1,2,3")
+@router.get(
+    "/contas",
+    summary="Buscar varias contas",
+    response_model=list[BuscaContaOut],
+    status_code=status.HTTP_200_OK
+)
+async def buscar_contas(
+    numeros: str = Query(
+        ..., pattern=r"^\d+(,\d+)*$",
+        description="Números separados por vírgula: responde um item por número, na ordem pedida"
+    ),
+    incluir_historico: bool = False,
+    session: AsyncSession = Depends(get_session)
+):
+    contas = await ServiceBancario.buscar_contas([int(n) for n in numeros.split(",")], session, incluir_historico)
+    if contas == "chaves_demais":
+        raise HTTPException(status_code=400, detail=f"Maximo de {CHAVES_POR_BUSCA} numeros por busca")
+    return resposta_json(contas, ADAPTADOR_LISTA_BUSCA_CONTAS)
+
 # Endpoint para consultar dados de uma conta pelo número
 @router.get(
-    "/contas/{conta}",
+    "/contas/{numero}",
     summary="Consultar conta",
     response_model=ContaOut,
     status_code=status.HTTP_200_OK
 )
-async def consultar(numero: int, session: AsyncSession = Depends(get_session)):
-    result = await ServiceBancario.consultar_conta(numero, session)
+async def consultar(
+    numero: int,
+    ultimas: Optional[int] = Query(
+        None, ge=1, le=PAGINA_TRANSACOES_MAXIMA, description="Traz só as N transações mais recentes"
+    ),
+    session: AsyncSession = Depends(get_session)
+):
+    result = await ServiceBancario.consultar_conta(numero, session, ultimas)
+    if result == "conta_nao_encontrada":
+        raise HTTPException(status_code=404, detail="Conta nao encontrada")
+    return resposta_json(result, ADAPTADOR_CONTA)
+
+# Endpoint para o saldo de uma conta em uma data (snapshot mais próximo + transações seguintes)
+@router.get(
+    "/contas/{numero}/saldo",
+    summary="Saldo da conta em uma data",
+    response_model=SaldoEmOut,
+    status_code=status.HTTP_200_OK
+)
+async def saldo_em(
+    numero: int,
+    em: Optional[datetime] = Query(None, description="Data/hora consultada (padrão: agora)"),
+    session: AsyncSession = Depends(get_session)
+):
+    result = await ServiceSaldos.saldo_em(numero, session, em)
     if result == "conta_nao_encontrada":
         raise HTTPException(status_code=404, detail="Conta nao encontrada")
     return result
 
+# Endpoint para listar as transações de uma conta (paginado por cursor, mais recentes primeiro)
+@router.get(
+    "/contas/{numero}/transacoes",
+    summary="Listar transacoes da conta",
+    response_model=list[TransacaoOut],
+    status_code=status.HTTP_200_OK
+)
+async def listar_transacoes(
+    numero: int,
+    cursor: Optional[str] = Query(None, description="Valor de X-Proximo-Cursor da página anterior"),
+    limit: int = Query(PAGINA_TRANSACOES, ge=1, le=PAGINA_TRANSACOES_MAXIMA),
+    desde: Optional[datetime] = Query(None, description="Início do período (inclusive)"),
+    ate: Optional[datetime] = Query(None, description="Fim do período (exclusivo)"),
+    tipo_de_transacao: Optional[str] = Query(
+        None, pattern=f"^({'|'.join(TIPOS_DO_HISTORICO)})$"
+    ),
+    session: AsyncSession = Depends(get_session)
+):
+    result = await ServiceBancario.listar_transacoes(
+        numero, session, cursor, limit, desde, ate, tipo_de_transacao
+    )
+    if result == "conta_nao_encontrada":
+        raise HTTPException(status_code=404, detail="Conta nao encontrada")
+    if result == "cursor_invalido":
+        raise HTTPException(status_code=400, detail="Cursor invalido")
+    transacoes, proximo = result
+    headers = {"X-Proximo-Cursor": proximo} if proximo else None
+    return resposta_json(transacoes, ADAPTADOR_LISTA_TRANSACOES, headers=headers)
+
+
+# Colunas do extrato, nas duas exportações
+COLUNAS_EXTRATO = ("id", "data", "tipo_de_transacao", "valor")
+
+# Converte os blocos do cursor em CSV, um pedaço da resposta por bloco
+async def _extrato_csv(blocos):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(COLUNAS_EXTRATO)
+    async for bloco in blocos:
+        escritor.writerows((id_, formatar_data(data), tipo, valor) for id_, data, tipo, valor in bloco)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+# Converte os blocos do cursor em NDJSON, uma transação por linha
+async def _extrato_ndjson(blocos):
+    async for bloco in blocos:
+        yield b"".join(
+            orjson.dumps({"id": id_, "data": formatar_data(data), "tipo_de_transacao": tipo, "valor": valor})
+            + b"\n"
+            for id_, data, tipo, valor in bloco
+        )
+
+# Endpoint para exportar o extrato completo de uma conta (CSV ou NDJSON em streaming)
+@router.get(
+    "/contas/{numero}/extrato",
+    summary="Exportar extrato da conta",
+    status_code=status.HTTP_200_OK
+)
+async def extrato(
+    numero: int,
+    formato: str = Query("csv", pattern="^(csv|ndjson)$"),
+    desde: Optional[datetime] = Query(None, description="Início do período (inclusive)"),
+    ate: Optional[datetime] = Query(None, description="Fim do período (exclusivo)"),
+    session: AsyncSession = Depends(get_session),
+    username: str = Depends(verificar_token)
+):
+    blocos = await ServiceBancario.extrato(numero, session, desde, ate)
+    if blocos == "conta_nao_encontrada":
+        raise HTTPException(status_code=404, detail="Conta nao encontrada")
+    if formato == "ndjson":
+        return StreamingResponse(_extrato_ndjson(blocos), media_type="application/x-ndjson")
+    return StreamingResponse(
+        _extrato_csv(blocos),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="extrato_{numero}.csv"'}
+    )
+
+
+# Endpoint para o relatório diário de movimentações, lido dos resumos diários
+@router.get(
+    "/relatorios/diario",
+    summary="Relatorio diario por agencia ou conta",
+    response_model=list[ResumoDiarioOut],
+    status_code=status.HTTP_200_OK
+)
+async def relatorio_diario(
+    desde: date = Query(..., description="Primeiro dia (inclusive, UTC)"),
+    ate: date = Query(..., description="Último dia (inclusive, UTC)"),
+    agrupar: str = Query("agencia", pattern="^(agencia|conta)$"),
+    numero: Optional[int] = Query(None, description="Só esta conta"),
+    agencia: Optional[str] = Query(None, description="Só esta agência"),
+    session: AsyncSession = Depends(get_session),
+    username: str = Depends(verificar_token)
+):
+    result = await ServiceRelatorios.relatorio_diario(session, desde, ate, agrupar, numero, agencia)
+    if result == "periodo_invalido":
+        raise HTTPException(
+            status_code=400, detail=f"Periodo invalido (ate >= desde, no maximo {RELATORIO_DIAS_MAXIMO} dias)"
+        )
+    return resposta_json(result, ADAPTADOR_LISTA_RESUMOS)
@@ -1,40 +1,94 @@
-from fastapi import APIRouter, HTTPException, status, APIRouter, Depends
+from fastapi import APIRouter, HTTPException, status, APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
-from app.schemas.schemas_do_cliente import ClienteIn, ClienteOut
-from app.schemas.schemas_da_conta import ContaIn, ContaOut
+from app.schemas.schemas_do_cliente import (
+    ClienteIn, ClienteOut, BuscaClienteOut, ADAPTADOR_CLIENTE, ADAPTADOR_LISTA_CLIENTES, ADAPTADOR_LISTA_BUSCA_CLIENTES
+)
+from app.schemas.schemas_da_conta import ContaIn, ContaOut, ADAPTADOR_LISTA_CONTAS
 from app.schemas.schemas_da_transacao import TransacaoIn, TransacaoOut
 
+from app.core.respostas import resposta_json
 from app.database.session import get_session, AsyncSession
-from app.service.service_get import ServiceGet
-from typing import List
+from app.service.service_get import ServiceGet, PAGINA_PADRAO, PAGINA_MAXIMA
+from app.service.projecoes import CHAVES_POR_BUSCA
+from typing import List, Optional, Union
 
 router = APIRouter()  # Cria o roteador para agrupar as rotas da API
 
-# Endpoint para listar todos os clientes
+# Converte cada objeto vindo do cursor em uma linha JSON (NDJSON)
+async def _ndjson(linhas, schema):
+    async for obj in linhas:
+        yield schema.model_validate(obj).model_dump_json() + "\n"
+
+# Informa ao cliente o cursor da próxima página quando a atual veio cheia
+def _proximo_cursor(itens, ultimo_id, limit: int) -> dict:
+    if len(itens) == limit:
+        return {"X-Proximo-Cursor": str(ultimo_id)}
+    return {}
+
+# Endpoint para listar clientes (paginado por cursor no id ou em streaming NDJSON),
+# ou buscar vários clientes pelo id com "ids=1,2,3"
 @router.get(
     "/clientes",
     summary="listar clientes",
-    response_model=list[ClienteOut],
+    response_model=Union[list[ClienteOut], list[BuscaClienteOut]],
     status_code=status.HTTP_200_OK
 )
-async def listar(session: AsyncSession = Depends(get_session)):
-    cliente = await ServiceGet.listar_clientes(session)
+async def listar(
+    ids: Optional[str] = Query(
+        None, pattern=r"^\d+(,\d+)*$",
+        description="Ids separados por vírgula: responde um item por id, na ordem pedida"
+    ),
+    after: Optional[int] = Query(None, description="Id do último cliente da página anterior"),
+    limit: Optional[int] = Query(None, ge=1, description="Quantidade máxima de clientes"),
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    incluir_historico: bool = False,
+    session: AsyncSession = Depends(get_session)
+):
+    # Busca em lote: clientes com suas contas (sem histórico), um IN por bloco de ids
+    if ids is not None:
+        clientes = await ServiceGet.buscar_clientes([int(i) for i in ids.split(",")], session)
+        if clientes == "chaves_demais":
+            raise HTTPException(status_code=400, detail=f"Maximo de {CHAVES_POR_BUSCA} ids por busca")
+        return resposta_json(clientes, ADAPTADOR_LISTA_BUSCA_CLIENTES)
+
+    # Modo streaming: uma linha JSON por cliente, direto do cursor do servidor
+    if formato == "ndjson":
+        linhas = ServiceGet.stream_clientes(session, after, limit, incluir_historico)
+        return StreamingResponse(_ndjson(linhas, ClienteOut), media_type="application/x-ndjson")
+
+    limit = min(limit or PAGINA_PADRAO, PAGINA_MAXIMA)
+    cliente = await ServiceGet.listar_clientes(session, after, limit, incluir_historico)
     if cliente == "clientes_nao_encontrados":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Clientes nao encontrados")
-    return cliente
+    clientes, ultimo_id = cliente
+    return resposta_json(clientes, ADAPTADOR_LISTA_CLIENTES, headers=_proximo_cursor(clientes, ultimo_id, limit))
 
-# Endpoint para listar todas as contas
+# Endpoint para listar contas (paginado por cursor no id ou em streaming NDJSON)
 @router.get(
     "/contas",
     summary="listar contas",
     response_model=list[ContaOut],
     status_code=status.HTTP_200_OK
 )
-async def listar(session: AsyncSession = Depends(get_session)):
-    contas = await ServiceGet.listar_contas(session)
+async def listar(
+    after: Optional[int] = Query(None, description="Id da última conta da página anterior"),
+    limit: Optional[int] = Query(None, ge=1, description="Quantidade máxima de contas"),
+    formato: str = Query("json", pattern="^(json|ndjson)$"),
+    incluir_historico: bool = False,
+    session: AsyncSession = Depends(get_session)
+):
+    # Modo streaming: uma linha JSON por conta, direto do cursor do servidor
+    if formato == "ndjson":
+        linhas = ServiceGet.stream_contas(session, after, limit, incluir_historico)
+        return StreamingResponse(_ndjson(linhas, ContaOut), media_type="application/x-ndjson")
+
+    limit = min(limit or PAGINA_PADRAO, PAGINA_MAXIMA)
+    contas = await ServiceGet.listar_contas(session, after, limit, incluir_historico)
     if contas == "contas_nao_encontradas":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contas nao encontradas")
-    return contas
+    contas, ultimo_id = contas
+    return resposta_json(contas, ADAPTADOR_LISTA_CONTAS, headers=_proximo_cursor(contas, ultimo_id, limit))
 
 # Endpoint para exibir um cliente específico e suas contas
 @router.get(
@@ -47,4 +101,4 @@ async def listar(cliente_id: int, session: AsyncSession = Depends(get_session)):
     cliente = await ServiceGet.lista_cliente_contas(cliente_id, session)
     if cliente == "cliente_nao_encontrado":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente nao encontrado")
-    return cliente
+    return resposta_json(cliente, ADAPTADOR_CLIENTE)
@@ -0,0 +1,67 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.autenticacao_bancaria.auth import cache_tokens
+from app.core.metricas import Contador, Medidor, registro
+from app.service.service_bancario import cache_contas, travas_contas
+
+router = APIRouter()  # Cria o roteador para a rota de métricas
+
+# Formato de texto lido pelo Prometheus
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# Contas mais disputadas exportadas com rótulo próprio (limita a cardinalidade)
+TRAVAS_QUENTES_EXPORTADAS = 10
+
+
+# Contadores dos caches da aplicação, lidos no momento da coleta
+@registro.coletor
+def _coletar_caches():
+    acertos = Contador("cache_acertos_total", "Leituras atendidas pelo cache", ("cache",))
+    falhas = Contador("cache_falhas_total", "Leituras que nao estavam no cache", ("cache",))
+    invalidacoes = Contador("cache_invalidacoes_total", "Entradas invalidadas apos escritas", ("cache",))
+    tamanho = Medidor("cache_entradas", "Entradas guardadas no cache", ("cache",))
+
+    tokens = cache_tokens.estatisticas()
+    acertos.incrementar("tokens", quantidade=tokens["acertos"])
+    falhas.incrementar("tokens", quantidade=tokens["falhas"])
+    tamanho.definir("tokens", valor=tokens["tamanho"])
+
+    contas = cache_contas.estatisticas()
+    acertos.incrementar("contas", quantidade=contas["acertos"])
+    falhas.incrementar("contas", quantidade=contas["falhas"])
+    invalidacoes.incrementar("contas", quantidade=contas["invalidacoes"])
+    return [acertos, falhas, invalidacoes, tamanho]
+
+
+# Disputa pelas travas por conta; só as contas mais disputadas viram série
+@registro.coletor
+def _coletar_travas():
+    estatisticas = travas_contas.estatisticas()
+    aquisicoes = Contador("trava_conta_aquisicoes_total", "Travas de conta obtidas")
+    aquisicoes.incrementar(quantidade=estatisticas["aquisicoes"])
+    disputas = Contador("trava_conta_disputas_total", "Travas de conta que precisaram esperar")
+    disputas.incrementar(quantidade=estatisticas["disputas"])
+    espera = Contador("trava_conta_espera_segundos_total", "Tempo total esperando travas de conta")
+    espera.incrementar(quantidade=estatisticas["espera_total_s"])
+    entradas = Medidor("trava_conta_entradas", "Travas de conta mantidas em memoria")
+    entradas.definir(valor=estatisticas["entradas"])
+
+    quentes = Medidor(
+        "trava_conta_espera_por_conta_segundos",
+        "Espera acumulada nas contas mais disputadas", ("conta",)
+    )
+    for conta in travas_contas.mais_disputadas(TRAVAS_QUENTES_EXPORTADAS):
+        quentes.definir(str(conta["chave"]), valor=conta["espera_total_s"])
+    return [aquisicoes, disputas, espera, entradas, quentes]
+
+
+# Endpoint de métricas no formato do Prometheus
+@router.get(
+    "/metrics",
+    summary="metricas da aplicacao",
+    response_class=PlainTextResponse,
+    include_in_schema=False
+)
+async def metricas():
+    return PlainTextResponse(registro.exportar(), media_type=TIPO_CONTEUDO)
@@ -1,10 +1,10 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List, Optional
 from app.schemas.schemas_da_transacao import TransacaoOut
 
 # Schema de entrada para criação de conta
 class ContaIn(BaseModel):
-    numero: int
+    numero: Optional[int] = None  # sem número: o servidor gera um
     cpf: str
 
 # Schema de saída para conta, incluindo histórico de transações
@@ -17,6 +17,26 @@ class ContaOut(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)  # permite criar a partir de objetos ORM
 
+# Validadores pré-compilados das respostas montadas como dicts
+ADAPTADOR_CONTA = TypeAdapter(ContaOut)
+ADAPTADOR_LISTA_CONTAS = TypeAdapter(List[ContaOut])
+
+# Item da busca de várias contas (GET /banco/contas?numeros=), na ordem pedida
+class BuscaContaOut(BaseModel):
+    numero: int
+    encontrada: bool
+    conta: Optional[ContaOut] = None  # None quando a conta não existe
+
+ADAPTADOR_LISTA_BUSCA_CONTAS = TypeAdapter(List[BuscaContaOut])
+
+# Schema de saída do saldo de uma conta em uma data (GET /banco/contas/{numero}/saldo)
+class SaldoEmOut(BaseModel):
+    numero: int
+    em: str                              # data consultada ("%d-%m-%Y %H:%M:%S")
+    saldo: float
+    snapshot: Optional[str] = None       # data do snapshot usado como ponto de partida
+    transacoes_apos_snapshot: int        # transações somadas depois do snapshot
+
 # Schema de saída para confirmação de exclusão de conta
 class DeletarConta(BaseModel):
     mensagem: str
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# Erro de uma linha da importação
+class ErroImportacaoOut(BaseModel):
+    linha: int                      # registro no arquivo (no CSV, o cabeçalho é a linha 1)
+    erro: str                       # "linha_invalida", "cliente_com_esse_cpf_ja_existe", ...
+    detalhe: Optional[str] = None
+
+# Schema de saída de POST /banco/importacao
+class ImportacaoOut(BaseModel):
+    linhas: int
+    clientes_criados: int
+    contas_criadas: int
+    erros: int
+    detalhes_erros: List[ErroImportacaoOut]  # limitado a ERROS_NO_RELATORIO itens
+    erros_omitidos: int                      # erros que ficaram fora de detalhes_erros
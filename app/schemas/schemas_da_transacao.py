@@ -1,5 +1,6 @@
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 from datetime import datetime
+from typing import List, Optional
 
 # Schema de entrada para criação de transação
 class TransacaoIn(BaseModel):
@@ -22,6 +23,38 @@ class TransacaoOut(BaseModel):
             return v.strftime("%d-%m-%Y %H:%M:%S") 
         return v
 
+# Validador pré-compilado das listas de transações montadas como dicts
+ADAPTADOR_LISTA_TRANSACOES = TypeAdapter(List[TransacaoOut])
+
 # Schema de saída para mensagens genéricas (ex.: confirmação de operação)
 class MensagemOut(BaseModel):
     mensagem: str
+
+# Schema de saída para transação realizada, com o saldo resultante
+class TransacaoRealizadaOut(MensagemOut):
+    saldo: float
+
+# Schema de entrada para transferência entre contas
+class TransferenciaIn(BaseModel):
+    conta_origem: int
+    conta_destino: int
+    valor: float = Field(gt=0)
+
+# Schema de saída para transferência realizada, com o saldo das duas contas
+class TransferenciaRealizadaOut(MensagemOut):
+    saldo_origem: float
+    saldo_destino: float
+
+# Resultado de cada item de um lote de transações
+class ResultadoLoteItem(BaseModel):
+    indice: int                   # posição do item no lote enviado
+    numero_conta: int
+    status: str                   # "ok", "saldo_insuficiente", "conta_nao_encontrada" ou "tipo_invalido"
+    saldo: Optional[float] = None # saldo após o item (apenas quando "ok")
+
+# Schema de saída para o processamento de um lote de transações
+class LoteTransacoesOut(BaseModel):
+    total: int
+    sucesso: int
+    falhas: int
+    resultados: List[ResultadoLoteItem]
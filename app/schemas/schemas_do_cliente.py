@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List, Optional
 from app.schemas.schemas_da_conta import ContaOut
 
@@ -19,3 +19,15 @@ class ClienteOut(BaseModel):
     contas: List[ContaOut] = Field(default_factory=list)  # lista de contas vinculadas
 
     model_config = ConfigDict(from_attributes=True)  # permite criar a partir de objetos ORM
+
+# Validadores pré-compilados das respostas montadas como dicts
+ADAPTADOR_CLIENTE = TypeAdapter(ClienteOut)
+ADAPTADOR_LISTA_CLIENTES = TypeAdapter(List[ClienteOut])
+
+# Item da busca de vários clientes (GET /get/clientes?ids=), na ordem pedida
+class BuscaClienteOut(BaseModel):
+    id: int
+    encontrado: bool
+    cliente: Optional[ClienteOut] = None  # None quando o cliente não existe
+
+ADAPTADOR_LISTA_BUSCA_CLIENTES = TypeAdapter(List[BuscaClienteOut])
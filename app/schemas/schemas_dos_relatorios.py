@@ -0,0 +1,14 @@
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Optional
+
+# Schema de saída de uma linha do relatório diário (GET /banco/relatorios/diario)
+class ResumoDiarioOut(BaseModel):
+    dia: str                      # "AAAA-MM-DD" (UTC)
+    agencia: str
+    numero: Optional[int] = None  # preenchido quando o relatório é por conta
+    tipo_de_transacao: str
+    quantidade: int
+    total: float
+
+# Validador pré-compilado das listas montadas como dicts
+ADAPTADOR_LISTA_RESUMOS = TypeAdapter(List[ResumoDiarioOut])
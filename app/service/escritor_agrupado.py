@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.metricas import Histograma, registro
+from app.schemas.schemas_da_transacao import TransacaoIn, TransacaoRealizadaOut
+
+# Group commit das transações: as requisições entram em uma fila e uma tarefa
+# em segundo plano aplica o que chegou em uma única transação do banco (um
+# commit, um fsync) a cada GRUPO_COMMIT_JANELA_MS ou GRUPO_COMMIT_TAMANHO_MAXIMO
+# itens. Cada requisição recebe o próprio resultado pela sua Future.
+
+logger = logging.getLogger(__name__)
+
+# Aplica uma lista de transações em uma sessão e faz o commit; devolve o
+# resultado de cada uma (ServiceBancario._aplicar_grupo). Nada depois do
+# commit deve falhar ali dentro: um grupo cujo commit já começou nunca é
+# reaplicado
+AplicarGrupo = Callable[[list[TransacaoIn], AsyncSession], Awaitable[list]]
+
+tamanho_do_grupo = registro.adicionar(Histograma(
+    "escritor_grupo_tamanho", "Transacoes aplicadas por commit agrupado",
+    baldes=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)))
+duracao_do_grupo = registro.adicionar(Histograma(
+    "escritor_grupo_duracao_segundos", "Tempo para aplicar e commitar um grupo"))
+
+
+# Erro entregue às requisições quando a tarefa do escritor não está mais rodando
+class EscritorParado(RuntimeError):
+    pass
+
+
+class EscritorAgrupado:
+    def __init__(self, engine: AsyncEngine, aplicar: AplicarGrupo, janela_ms: float, tamanho_maximo: int):
+        self.engine = engine
+        self.aplicar = aplicar
+        self.janela = janela_ms / 1000
+        self.tamanho_maximo = tamanho_maximo
+        self.loop = asyncio.get_running_loop()
+        self._fila: asyncio.Queue = asyncio.Queue()
+        self._grupo: list = []
+        self._tarefa = self.loop.create_task(self._executar())
+        self._tarefa.add_done_callback(self._ao_parar)
+
+    # A tarefa terminou (encerrar() ou uma falha fora do except de _gravar)
+    @property
+    def parado(self) -> bool:
+        return self._tarefa.done()
+
+    # Enfileira a transação e espera o commit do grupo em que ela entrou
+    async def enviar(self, transacao: TransacaoIn) -> TransacaoRealizadaOut | str:
+        if self.parado:
+            raise EscritorParado("escritor agrupado parado")
+        futuro = self.loop.create_future()
+        self._fila.put_nowait((transacao, futuro))
+        return await futuro
+
+    # Aplica o que ainda está na fila e para a tarefa
+    async def encerrar(self) -> None:
+        if self.parado:
+            return
+        self._fila.put_nowait(None)
+        await self._tarefa
+
+    def _ao_parar(self, tarefa: asyncio.Task) -> None:
+        # Ninguém mais vai resolver o grupo em andamento nem o que está na
+        # fila: essas requisições recebem o erro em vez de esperar para sempre
+        if not tarefa.cancelled() and tarefa.exception() is not None:
+            logger.error("tarefa do escritor agrupado morreu", exc_info=tarefa.exception())
+        pendentes = list(self._grupo)
+        while not self._fila.empty():
+            item = self._fila.get_nowait()
+            if item is not None:
+                pendentes.append(item)
+        for _, futuro in pendentes:
+            if not futuro.done():
+                futuro.set_exception(EscritorParado("escritor agrupado parado"))
+
+    async def _executar(self) -> None:
+        while True:
+            item = await self._fila.get()
+            if item is None:
+                return
+            grupo, encerrar = [item], False
+
+            # Junta o que chegar dentro da janela, até o tamanho máximo
+            prazo = self.loop.time() + self.janela
+            while len(grupo) < self.tamanho_maximo:
+                restante = prazo - self.loop.time()
+                try:
+                    if restante <= 0:
+                        item = self._fila.get_nowait()
+                    else:
+                        item = await asyncio.wait_for(self._fila.get(), restante)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is None:
+                    encerrar = True
+                    break
+                grupo.append(item)
+
+            self._grupo = grupo
+            await self._gravar(grupo)
+            self._grupo = []
+            if encerrar:
+                return
+
+    async def _gravar(self, grupo: list) -> None:
+        inicio = time.perf_counter()
+        resultados, commit_iniciado = None, False
+
+        def marcar_commit(_session) -> None:
+            nonlocal commit_iniciado
+            commit_iniciado = True
+
+        try:
+            async with AsyncSession(self.engine, expire_on_commit=False) as session:
+                event.listen(session.sync_session, "before_commit", marcar_commit)
+                resultados = await self.aplicar([transacao for transacao, _ in grupo], session)
+        except Exception as erro:
+            # Com os resultados em mãos o grupo já foi confirmado (a falha foi
+            # ao fechar a sessão) e cada requisição recebe o seu resultado
+            if resultados is None and commit_iniciado:
+                # O commit pode ter gravado o grupo (erro no meio do commit):
+                # reaplicar duplicaria os movimentos, então todos recebem o erro
+                resultados = [erro] * len(grupo)
+            elif resultados is None:
+                # Falha antes do commit, nada gravado: reaplica item a item,
+                # para que só as transações com problema recebam o erro
+                resultados = [await self._gravar_uma(transacao) for transacao, _ in grupo]
+
+        tamanho_do_grupo.observar(len(grupo))
+        duracao_do_grupo.observar(time.perf_counter() - inicio)
+        for (_, futuro), resultado in zip(grupo, resultados):
+            if futuro.done():
+                continue  # requisição cancelada; a transação já foi gravada
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+    async def _gravar_uma(self, transacao: TransacaoIn):
+        try:
+            async with AsyncSession(self.engine, expire_on_commit=False) as session:
+                return (await self.aplicar([transacao], session))[0]
+        except Exception as erro:
+            return erro
+
+
+# Um escritor por engine, criado na inicialização da aplicação
+# (iniciar_escritores) e recriado se a tarefa dele tiver parado
+_escritores: dict[AsyncEngine, EscritorAgrupado] = {}
+
+
+def obter_escritor(engine: AsyncEngine, aplicar: AplicarGrupo) -> EscritorAgrupado:
+    escritor = _escritores.get(engine)
+    if escritor is None or escritor.parado:
+        if escritor is not None:
+            logger.warning("escritor agrupado parado, criando outro")
+        escritor = _escritores[engine] = EscritorAgrupado(
+            engine, aplicar, settings.GRUPO_COMMIT_JANELA_MS, settings.GRUPO_COMMIT_TAMANHO_MAXIMO
+        )
+    return escritor
+
+
+def iniciar_escritores(engines: list[AsyncEngine], aplicar: AplicarGrupo) -> None:
+    for engine in engines:
+        obter_escritor(engine, aplicar)
+
+
+# Encerra os escritores, gravando o que estiver na fila
+async def encerrar_escritores() -> None:
+    for escritor in list(_escritores.values()):
+        await escritor.encerrar()
+    _escritores.clear()
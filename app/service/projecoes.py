@@ -0,0 +1,344 @@
+import asyncio
+import base64
+import heapq
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import AsyncIterator, Iterable, Optional
+
+from sqlalchemy import select, tuple_, union_all
+
+from app.core.consultas_sql import contar_linhas
+from app.database.session import AsyncSession, sessoes_dos_shards
+from app.models.models_cliente import Cliente
+from app.models.models_conta import Conta
+from app.models.models_transacao import Transacao
+
+# Projeções de leitura: as colunas vão direto do cursor para dicts no formato
+# dos schemas de saída (ContaOut, ClienteOut, TransacaoOut), sem instanciar
+# objetos ORM nem passar pela validação do Pydantic. Os routers devolvem esses
+# dicts com RespostaORJSON (app/core/respostas.py).
+
+
+# Mesmo formato de TransacaoOut.formatar_data ("%d-%m-%Y %H:%M:%S"), sem strftime
+def formatar_data(data: datetime) -> str:
+    return (
+        f"{data.day:02d}-{data.month:02d}-{data.year:04d} "
+        f"{data.hour:02d}:{data.minute:02d}:{data.second:02d}"
+    )
+
+
+# Executa a consulta e devolve as linhas como tuplas (contabilizadas por requisição)
+async def _linhas(session: AsyncSession, stmt) -> list:
+    linhas = (await session.execute(stmt)).all()
+    contar_linhas(len(linhas))
+    return linhas
+
+
+# Colunas do histórico no formato de TransacaoOut (o id desempata a ordem)
+_COLUNAS_HISTORICO = (Transacao.conta_id, Transacao.id, Transacao.tipo_de_transacao, Transacao.valor, Transacao.data)
+
+
+# As N transações mais recentes de uma conta, da mais nova para a mais antiga,
+# pela mesma chave (data, id) de GET /banco/contas/{numero}/transacoes: o
+# LIMIT percorre só o fim de ix_transacoes_conta_id_data_id, não o histórico todo
+def ultimas_transacoes(conta_id: int, limite: int):
+    return (
+        select(*_COLUNAS_HISTORICO)
+        .where(Transacao.conta_id == conta_id)
+        .order_by(Transacao.data.desc(), Transacao.id.desc())
+        .limit(limite)
+    )
+
+
+# Histórico de várias contas em uma consulta: conta_id -> [transações] em
+# ordem (data, id). Com "limite", cada conta recebe apenas as N transações
+# mais recentes (um LIMIT por conta, juntos em um UNION ALL)
+async def historicos(
+    session: AsyncSession,
+    conta_ids: Iterable[int],
+    limite: Optional[int] = None
+) -> dict[int, list[dict]]:
+    conta_ids = list(conta_ids)
+    if not conta_ids:
+        return {}
+
+    if limite is None:
+        stmt = (
+            select(*_COLUNAS_HISTORICO)
+            .where(Transacao.conta_id.in_(conta_ids))
+            .order_by(Transacao.conta_id, Transacao.data, Transacao.id)
+        )
+    elif len(conta_ids) == 1:
+        stmt = ultimas_transacoes(conta_ids[0], limite)
+    else:
+        stmt = union_all(*(
+            select(ultimas_transacoes(conta_id, limite).subquery()) for conta_id in conta_ids
+        ))
+
+    linhas = await _linhas(session, stmt)
+    if limite is not None:
+        # As mais recentes vêm do fim para o começo: volta para a ordem (data, id)
+        linhas.sort(key=lambda linha: (linha.conta_id, linha.data, linha.id))
+
+    por_conta = defaultdict(list)
+    for conta_id, _, tipo, valor, data in linhas:
+        por_conta[conta_id].append({"tipo_de_transacao": tipo, "valor": valor, "data": formatar_data(data)})
+    return por_conta
+
+
+def _conta(numero, agencia, saldo, titular, historico) -> dict:
+    return {"numero": numero, "agencia": agencia, "saldo": saldo, "titular": titular, "historico": historico}
+
+
+# Uma conta com titular e histórico (formato de ContaOut), ou None
+async def conta_por_numero(
+    session: AsyncSession,
+    numero: int,
+    limite_historico: Optional[int] = None
+) -> Optional[dict]:
+    linhas = await _linhas(session, (
+        select(Conta.id, Conta.numero, Conta.agencia, Conta.saldo, Cliente.nome)
+        .outerjoin(Cliente, Cliente.id == Conta.cliente_id)
+        .where(Conta.numero == numero)
+    ))
+    if not linhas:
+        return None
+    conta_id, numero, agencia, saldo, titular = linhas[0]
+    historico = (await historicos(session, [conta_id], limite_historico)).get(conta_id, [])
+    return _conta(numero, agencia, saldo, titular, historico)
+
+
+# Cursor das listagens de contas com shards: a ordem é (id, shard) e o
+# cursor é "id * quantidade de shards + shard" (com um shard, o próprio id)
+def apos_no_shard(coluna, after: Optional[int], indice: int, quantidade: int):
+    if after is None:
+        return None
+    ultimo_id, ultimo_shard = divmod(after, quantidade)
+    # Mesmo id em um shard posterior ao do cursor ainda não foi entregue
+    return coluna >= ultimo_id if indice > ultimo_shard else coluna > ultimo_id
+
+
+# Intercala fluxos já ordenados em um só, pela chave (merge de k vias)
+# (a chave recebe o item e a posição do fluxo de onde ele veio)
+async def intercalar(fluxos: list[AsyncIterator], chave) -> AsyncIterator:
+    cabecas = []
+
+    async def avancar(posicao: int) -> None:
+        item = await anext(fluxos[posicao], _FIM)
+        if item is not _FIM:
+            heapq.heappush(cabecas, (chave(item, posicao), posicao, item))
+
+    for posicao in range(len(fluxos)):
+        await avancar(posicao)
+    while cabecas:
+        _, posicao, item = heapq.heappop(cabecas)
+        yield item
+        await avancar(posicao)
+
+
+_FIM = object()
+
+
+# Página de contas (keyset no id) com titular via JOIN; devolve (contas, cursor).
+# Cada shard entrega até "limit" contas depois do cursor, em paralelo, e a
+# página é o começo da intercalação delas
+async def pagina_contas(
+    session: AsyncSession,
+    after: Optional[int],
+    limit: int,
+    incluir_historico: bool = False
+) -> tuple[list[dict], Optional[int]]:
+    sessoes = sessoes_dos_shards(session)
+    quantidade = len(sessoes)
+
+    async def do_shard(indice: int, shard: AsyncSession) -> list:
+        stmt = (
+            select(Conta.id, Conta.numero, Conta.agencia, Conta.saldo, Cliente.nome)
+            .outerjoin(Cliente, Cliente.id == Conta.cliente_id)
+            .order_by(Conta.id)
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(apos_no_shard(Conta.id, after, indice, quantidade))
+        return [(conta_id * quantidade + indice, indice, linha) for conta_id, *linha in await _linhas(shard, stmt)]
+
+    partes = await asyncio.gather(*(do_shard(indice, shard) for indice, shard in enumerate(sessoes)))
+    linhas = list(islice(heapq.merge(*partes), limit))
+    if not linhas:
+        return [], None
+
+    # Histórico só das contas que entraram na página, buscado no shard de cada uma
+    por_conta = {}
+    if incluir_historico:
+        ids_por_shard = defaultdict(list)
+        for chave, indice, _ in linhas:
+            ids_por_shard[indice].append(chave // quantidade)
+        historicos_por_shard = await asyncio.gather(*(
+            historicos(sessoes[indice], conta_ids) for indice, conta_ids in ids_por_shard.items()
+        ))
+        for indice, por_id in zip(ids_por_shard, historicos_por_shard):
+            por_conta.update({conta_id * quantidade + indice: h for conta_id, h in por_id.items()})
+    contas = [
+        _conta(numero, agencia, saldo, titular, por_conta.get(chave, []))
+        for chave, _, (numero, agencia, saldo, titular) in linhas
+    ]
+    return contas, linhas[-1][0]
+
+
+# Clientes (formato de ClienteOut) com suas contas, a partir das linhas de clientes
+async def _clientes_com_contas(session: AsyncSession, linhas, incluir_historico: bool) -> list[dict]:
+    clientes = {
+        cliente_id: {
+            "id": cliente_id, "nome": nome, "cpf": cpf, "endereco": endereco,
+            "data_nascimento": data_nascimento, "contas": []
+        }
+        for cliente_id, nome, cpf, endereco, data_nascimento in linhas
+    }
+    if not clientes:
+        return []
+
+    # As contas dos clientes podem estar em qualquer shard: uma busca por
+    # shard, em paralelo, na ordem (id, shard)
+    async def do_shard(indice: int, shard: AsyncSession) -> list:
+        contas = await _linhas(shard, (
+            select(Conta.id, Conta.cliente_id, Conta.numero, Conta.agencia, Conta.saldo)
+            .where(Conta.cliente_id.in_(clientes))
+            .order_by(Conta.id)
+        ))
+        por_conta = await historicos(shard, [c[0] for c in contas]) if incluir_historico and contas else {}
+        return [((conta_id, indice), linha, por_conta.get(conta_id, [])) for conta_id, *linha in contas]
+
+    partes = await asyncio.gather(*(
+        do_shard(indice, shard) for indice, shard in enumerate(sessoes_dos_shards(session))
+    ))
+    for _, (cliente_id, numero, agencia, saldo), historico in heapq.merge(*partes, key=lambda c: c[0]):
+        cliente = clientes[cliente_id]
+        cliente["contas"].append(_conta(numero, agencia, saldo, cliente["nome"], historico))
+    return list(clientes.values())
+
+
+_COLUNAS_CLIENTE = (Cliente.id, Cliente.nome, Cliente.cpf, Cliente.endereco, Cliente.data_nascimento)
+
+# Chaves por IN nas buscas em lote (abaixo do limite de 999 parâmetros de
+# SQLites antigos e de outros drivers)
+CHAVES_POR_IN = 900
+
+# Máximo de chaves aceitas por busca em lote (GET /banco/contas?numeros=, GET /get/clientes?ids=)
+CHAVES_POR_BUSCA = 1000
+
+
+def _em_blocos(chaves: list):
+    for inicio in range(0, len(chaves), CHAVES_POR_IN):
+        yield chaves[inicio:inicio + CHAVES_POR_IN]
+
+
+# Página de clientes (keyset no id) com contas; devolve (clientes, último id)
+async def pagina_clientes(
+    session: AsyncSession,
+    after: Optional[int],
+    limit: int,
+    incluir_historico: bool = False
+) -> tuple[list[dict], Optional[int]]:
+    stmt = select(*_COLUNAS_CLIENTE).order_by(Cliente.id).limit(limit)
+    if after is not None:
+        stmt = stmt.where(Cliente.id > after)
+    clientes = await _clientes_com_contas(session, await _linhas(session, stmt), incluir_historico)
+    return clientes, clientes[-1]["id"] if clientes else None
+
+
+# Um cliente com suas contas (sem histórico), ou None
+async def cliente_por_id(session: AsyncSession, cliente_id: int) -> Optional[dict]:
+    linhas = await _linhas(session, select(*_COLUNAS_CLIENTE).where(Cliente.id == cliente_id))
+    clientes = await _clientes_com_contas(session, linhas, incluir_historico=False)
+    return clientes[0] if clientes else None
+
+
+# Várias contas pelo número, um IN por bloco de chaves: numero -> conta
+# (formato de ContaOut). Números inexistentes ficam fora do dict
+async def contas_por_numeros(
+    session: AsyncSession,
+    numeros: Iterable[int],
+    incluir_historico: bool = False
+) -> dict[int, dict]:
+    contas = {}
+    for bloco in _em_blocos(list(set(numeros))):
+        linhas = await _linhas(session, (
+            select(Conta.id, Conta.numero, Conta.agencia, Conta.saldo, Cliente.nome)
+            .outerjoin(Cliente, Cliente.id == Conta.cliente_id)
+            .where(Conta.numero.in_(bloco))
+        ))
+        por_conta = await historicos(session, [l[0] for l in linhas]) if incluir_historico else {}
+        for conta_id, numero, agencia, saldo, titular in linhas:
+            contas[numero] = _conta(numero, agencia, saldo, titular, por_conta.get(conta_id, []))
+    return contas
+
+
+# Vários clientes pelo id, com suas contas (sem histórico): id -> cliente
+async def clientes_por_ids(session: AsyncSession, ids: Iterable[int]) -> dict[int, dict]:
+    clientes = {}
+    for bloco in _em_blocos(list(set(ids))):
+        linhas = await _linhas(session, select(*_COLUNAS_CLIENTE).where(Cliente.id.in_(bloco)))
+        for cliente in await _clientes_com_contas(session, linhas, incluir_historico=False):
+            clientes[cliente["id"]] = cliente
+    return clientes
+
+
+# Cursor opaco da paginação de transações: a (data, id) da última linha entregue
+def codificar_cursor(data: datetime, transacao_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{data.isoformat()}|{transacao_id}".encode()).decode()
+
+
+def decodificar_cursor(cursor: str) -> Optional[tuple[datetime, int]]:
+    try:
+        data, transacao_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(data), int(transacao_id)
+    except ValueError:
+        return None
+
+
+# Página de transações de uma conta, das mais recentes para as mais antigas.
+# Keyset em (data, id): percorre o índice (conta_id, data, id) a partir do
+# cursor, sem OFFSET. Devolve (transações, (data, id) da última linha).
+async def pagina_transacoes(
+    session: AsyncSession,
+    conta_id: int,
+    posicao: Optional[tuple[datetime, int]],
+    limit: int,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    tipo_de_transacao: Optional[str] = None
+) -> tuple[list[dict], Optional[tuple[datetime, int]]]:
+    stmt = select(
+        Transacao.id, Transacao.tipo_de_transacao, Transacao.valor, Transacao.data
+    ).where(Transacao.conta_id == conta_id)
+    if posicao is not None:
+        stmt = stmt.where(tuple_(Transacao.data, Transacao.id) < tuple_(*posicao))
+    if desde is not None:
+        stmt = stmt.where(Transacao.data >= desde)
+    if ate is not None:
+        stmt = stmt.where(Transacao.data < ate)
+    if tipo_de_transacao is not None:
+        stmt = stmt.where(Transacao.tipo_de_transacao == tipo_de_transacao)
+
+    linhas = await _linhas(session, stmt.order_by(Transacao.data.desc(), Transacao.id.desc()).limit(limit))
+    transacoes = [
+        {"tipo_de_transacao": tipo, "valor": valor, "data": formatar_data(data)}
+        for _, tipo, valor, data in linhas
+    ]
+    ultima = (linhas[-1][3], linhas[-1][0]) if linhas else None
+    return transacoes, ultima
+
+
+# Ids das contas em blocos (keyset no id), para jobs que processam todas as
+# contas com um commit curto por bloco
+async def blocos_de_contas(session: AsyncSession, contas_por_bloco: int):
+    ultimo_id = 0
+    while True:
+        conta_ids = (await session.execute(
+            select(Conta.id).where(Conta.id > ultimo_id).order_by(Conta.id).limit(contas_por_bloco)
+        )).scalars().all()
+        if not conta_ids:
+            return
+        yield conta_ids
+        ultimo_id = conta_ids[-1]
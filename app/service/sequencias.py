@@ -0,0 +1,75 @@
+import asyncio
+from typing import Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metricas import Contador, registro
+from app.models.models_sequencia import Sequencia
+
+# Números gerados pelo servidor em blocos ("hi/lo"): cada processo reserva
+# "bloco" valores de uma vez com um UPDATE ... RETURNING em uma transação
+# própria, já confirmada, e entrega os valores da memória. Dois processos
+# nunca recebem o mesmo bloco (o UPDATE serializa na linha da sequência);
+# valores não usados de um bloco são perdidos quando o processo reinicia.
+
+blocos_reservados = registro.adicionar(Contador(
+    "sequencia_blocos_reservados_total", "Blocos de valores reservados no banco", ("sequencia",)))
+
+
+class AlocadorPorBlocos:
+    def __init__(self, nome: str, bloco: int = 100, inicio: int = 1, coluna=None):
+        self.nome = nome
+        self.bloco = bloco
+        self.inicio = inicio            # primeiro valor quando a sequência ainda não existe
+        self.coluna = coluna            # valores já usados nesta coluna não são gerados de novo
+        self._atual = 0
+        self._limite = 0
+        self._trava = asyncio.Lock()
+
+    # Caso comum: o próximo valor do bloco em memória, sem ir ao banco.
+    # "engines_da_coluna": bancos onde a coluna também tem valores (shards);
+    # a primeira reserva começa depois do maior valor entre todos eles
+    async def proximo(self, engine: AsyncEngine, engines_da_coluna: Sequence[AsyncEngine] = ()) -> int:
+        while self._atual >= self._limite:
+            async with self._trava:
+                # Quem esperou a trava encontra o bloco que outro acabou de reservar
+                if self._atual >= self._limite:
+                    self._atual, self._limite = await self._reservar(engine, engines_da_coluna)
+        valor = self._atual
+        self._atual += 1
+        return valor
+
+    # Esquece o bloco em memória (a próxima chamada reserva outro) e troca a
+    # trava, que não pode estar em uso
+    def descartar(self) -> None:
+        self._atual = self._limite = 0
+        self._trava = asyncio.Lock()
+
+    async def _reservar(self, engine: AsyncEngine, engines_da_coluna: Sequence[AsyncEngine]) -> tuple[int, int]:
+        reservar = (
+            update(Sequencia).where(Sequencia.nome == self.nome)
+            .values(proximo=Sequencia.proximo + self.bloco)
+            .returning(Sequencia.proximo)
+        )
+        async with engine.begin() as conn:
+            fim = (await conn.execute(reservar)).scalar()
+            if fim is None:
+                # Primeira reserva: a sequência começa depois do maior valor já
+                # usado. Se outro processo criar a linha antes, vale a dele
+                inicio = self.inicio
+                if self.coluna is not None:
+                    maiores = [(await conn.execute(select(func.max(self.coluna)))).scalar()]
+                    for outro in engines_da_coluna:
+                        if outro is not engine:
+                            async with outro.connect() as outra:
+                                maiores.append((await outra.execute(select(func.max(self.coluna)))).scalar())
+                    inicio = max(inicio, max(maior or 0 for maior in maiores) + 1)
+                dialeto = postgresql if engine.dialect.name == "postgresql" else sqlite
+                await conn.execute(
+                    dialeto.insert(Sequencia).values(nome=self.nome, proximo=inicio).on_conflict_do_nothing()
+                )
+                fim = (await conn.execute(reservar)).scalar()
+        blocos_reservados.incrementar(self.nome)
+        return fim - self.bloco, fim
@@ -1,14 +1,88 @@
-from sqlalchemy import select
+import asyncio
+import logging
+
+from sqlalchemy import case, delete, insert, literal, literal_column, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.attributes import set_committed_value
 from app.schemas.schemas_do_cliente import ClienteIn
-from app.schemas.schemas_da_conta import ContaIn, ContaOut
-from app.schemas.schemas_da_transacao import TransacaoOut, TransacaoIn, MensagemOut
+from app.schemas.schemas_da_conta import ContaIn
+from app.schemas.schemas_da_transacao import (
+    TransacaoIn, TransacaoRealizadaOut, ResultadoLoteItem, LoteTransacoesOut,
+    TransferenciaIn, TransferenciaRealizadaOut
+)
 
 from app.models.models_cliente import Cliente
 from app.models.models_conta import Conta
 from app.models.models_transacao import Transacao
+from app.models.models_transferencia import TransferenciaPendente, TransferenciaRecebida
+
+from app.service import projecoes
+from app.service.projecoes import codificar_cursor, decodificar_cursor
+
+from app.database.session import (
+    AsyncSession, agrupar_por_shard, engines_da_sessao, quantidade_de_shards, sessao_da_conta, shard_da_conta,
+    sessoes_dos_shards
+)
+from app.core.config import settings
+from app.core.cache import BackendMemoria, CacheRespostas
+from app.core.travas import TravasPorChave
+from app.service.sequencias import AlocadorPorBlocos
+from app.service.escritor_agrupado import obter_escritor
+from app.service.service_relatorios import ServiceRelatorios
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tipos de transação aceitos em TransacaoIn
+TIPOS_DE_TRANSACAO = ("deposito", "saque")
+
+# Tipos gravados no histórico pelas transferências (saída na origem, entrada no destino)
+TIPOS_DE_TRANSFERENCIA = ("transferencia_saida", "transferencia_entrada")
+
+# Todos os tipos que aparecem no histórico ("estorno" devolve à origem uma
+# transferência entre shards recusada pelo destino)
+TIPOS_DO_HISTORICO = TIPOS_DE_TRANSACAO + TIPOS_DE_TRANSFERENCIA + ("estorno",)
+
+# Lotes de transações: tamanho máximo aceito e quantos itens vão em cada commit
+LIMITE_LOTE = 10000
+ITENS_POR_COMMIT_LOTE = 1000
 
-from app.database.session import AsyncSession
-from datetime import datetime
+# Tamanho de página padrão e máximo de GET /banco/contas/{numero}/transacoes
+PAGINA_TRANSACOES = 50
+PAGINA_TRANSACOES_MAXIMA = 1000
+
+# Linhas que o cursor do servidor entrega por vez na exportação do extrato
+LINHAS_POR_BLOCO_EXTRATO = 1000
+
+# Cache read-through de GET /banco/contas/{numero}, invalidado a cada escrita na conta
+cache_contas = CacheRespostas(
+    "conta",
+    BackendMemoria(settings.CACHE_CONTAS_TAMANHO),
+    ttl=settings.CACHE_CONTAS_TTL
+)
+
+# Travas por número de conta: escritas na mesma conta rodam uma de cada vez
+# neste processo, contas diferentes seguem em paralelo
+travas_contas = TravasPorChave(
+    settings.TRAVAS_CONTAS_FAIXAS,
+    settings.TRAVAS_CONTAS_POR_FAIXA,
+    settings.TRAVAS_CONTAS_OCIOSIDADE
+)
+
+# Números de conta gerados pelo servidor, reservados em blocos por processo
+numeros_contas = AlocadorPorBlocos(
+    "contas",
+    settings.NUMEROS_CONTAS_BLOCO,
+    settings.NUMEROS_CONTAS_INICIO,
+    coluna=Conta.numero
+)
+
+# Números gerados tentados por criação antes de desistir (só colidem com
+# números escolhidos à mão)
+TENTATIVAS_NUMERO_GERADO = 10
 
 class ServiceBancario:
     @staticmethod
@@ -16,107 +90,705 @@ class ServiceBancario:
         criar: ClienteIn,
         session: AsyncSession
     ) -> Cliente | str:
-        # Verifica se já existe cliente com o mesmo CPF
-        result = await session.execute(select(Cliente).where(Cliente.cpf == criar.cpf))
-        cpf = result.scalars().first()
-        if cpf:
+        # Um único INSERT ... RETURNING: o CPF repetido é barrado pela
+        # restrição única (inclusive entre requisições concorrentes)
+        try:
+            novo = (await session.scalars(
+                insert(Cliente).values(**criar.model_dump()).returning(Cliente)
+            )).one()
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
             return 'cliente_com_esse_cpf_ja_existe'
-        
-        # Cria novo cliente
-        novo = Cliente(**criar.model_dump())
-        session.add(novo)
-        await session.commit()
-        await session.refresh(novo)
+
+        # Cópia nos demais shards, com o mesmo id: as contas de cada shard
+        # continuam achando o titular com um JOIN local. O cliente já está
+        # confirmado no shard 0, então uma réplica que falhe não vira erro:
+        # _inserir_conta copia o cliente quando ele faltar no shard da conta
+        await ServiceBancario.replicar_clientes([{
+            "id": novo.id, "nome": novo.nome, "cpf": novo.cpf,
+            "endereco": novo.endereco, "data_nascimento": novo.data_nascimento
+        }], session)
+
+        # Cliente recém-criado não tem contas: nada a carregar
+        set_committed_value(novo, "contas", [])
         return novo
 
+    @staticmethod
+    async def replicar_clientes(
+        clientes: list[dict],
+        session: AsyncSession
+    ) -> bool:
+        # Clientes já confirmados no shard 0 (com id) gravados nos demais
+        # shards em paralelo, um INSERT em lote e um commit por shard.
+        # Devolve False se algum shard falhou (a falha fica no log)
+        replicas = sessoes_dos_shards(session)[1:]
+        if not clientes or not replicas:
+            return True
+        falhas = await asyncio.gather(
+            *(ServiceBancario._replicar_no_shard(clientes, shard) for shard in replicas),
+            return_exceptions=True
+        )
+        for shard, falha in zip(replicas, falhas):
+            if isinstance(falha, Exception):
+                await shard.rollback()
+                logger.error("replica de %d cliente(s) falhou em %s", len(clientes), shard.bind.url, exc_info=falha)
+        return not any(isinstance(falha, Exception) for falha in falhas)
+
+    @staticmethod
+    async def _replicar_no_shard(clientes: list[dict], shard: AsyncSession) -> None:
+        await ServiceBancario.inserir_replicas(clientes, shard)
+        await shard.commit()
+
+    @staticmethod
+    async def inserir_replicas(clientes: list[dict], shard: AsyncSession) -> None:
+        # Idempotente: o cliente que já está no shard (mesmo id) é mantido.
+        # Não faz commit: entra na transação de quem chamou
+        dialeto = postgresql if shard.bind.dialect.name == "postgresql" else sqlite
+        await shard.execute(dialeto.insert(Cliente).on_conflict_do_nothing(index_elements=[Cliente.id]), clientes)
+
+    @staticmethod
+    async def _reparar_replica(
+        cpf: str,
+        session: AsyncSession,
+        shard: AsyncSession
+    ) -> bool:
+        # Copia do shard 0 o cliente que falta no shard (réplica que falhou
+        # na criação); False se o cliente também não existe no shard 0
+        linha = (await session.execute(
+            select(Cliente.id, Cliente.nome, Cliente.cpf, Cliente.endereco, Cliente.data_nascimento)
+            .where(Cliente.cpf == cpf)
+        )).mappings().first()
+        if linha is None:
+            return False
+        await ServiceBancario._replicar_no_shard([dict(linha)], shard)
+        return True
+
     @staticmethod
     async def criar_conta(
         criar: ContaIn,
         session: AsyncSession
-    ) -> Conta | str:
-        # Verifica se o cliente existe
-        result = await session.execute(select(Cliente).where(Cliente.cpf == criar.cpf))
-        cliente = result.scalars().first()
-        if not cliente:
-            return 'cliente_nao_encontrado'
-        
-        # Verifica se já existe conta com o mesmo número
-        result = await session.execute(select(Conta).where(Conta.numero == criar.numero))
-        conta_existe = result.scalars().first()
-        if conta_existe:
-            return 'conta_ja_existe'
-        
-        # Cria nova conta vinculada ao cliente
-        nova = Conta(
-            numero=criar.numero,
-            cliente_id=cliente.id,
-            saldo=0.0,
-            agencia='0001'
+    ) -> dict | str:
+        if criar.numero is not None:
+            return await ServiceBancario._inserir_conta(criar.numero, criar.cpf, session)
+
+        # Sem número: o próximo do bloco reservado por este processo (sem ida
+        # ao banco). A sequência fica no shard 0, mas começa depois do maior
+        # número de todos os shards. Um número gerado que alguém já escolheu
+        # à mão é pulado
+        for _ in range(TENTATIVAS_NUMERO_GERADO):
+            numero = await numeros_contas.proximo(session.bind, engines_da_sessao(session))
+            result = await ServiceBancario._inserir_conta(numero, criar.cpf, session)
+            if result != 'conta_ja_existe':
+                return result
+        return 'conta_ja_existe'
+
+    @staticmethod
+    async def _inserir_conta(
+        numero: int,
+        cpf: str,
+        session: AsyncSession
+    ) -> dict | str:
+        shard = sessao_da_conta(session, numero)
+        resultado = await ServiceBancario._inserir_conta_no_shard(numero, cpf, shard)
+        # CPF ausente em outro shard: a réplica do cliente pode ter falhado
+        # na criação. Copia do shard 0 e tenta de novo
+        if resultado == 'cliente_nao_encontrado' and shard is not session:
+            if await ServiceBancario._reparar_replica(cpf, session, shard):
+                resultado = await ServiceBancario._inserir_conta_no_shard(numero, cpf, shard)
+        if isinstance(resultado, dict):
+            await cache_contas.invalidar(numero)
+        return resultado
+
+    @staticmethod
+    async def _inserir_conta_no_shard(
+        numero: int,
+        cpf: str,
+        session: AsyncSession
+    ) -> dict | str:
+        # INSERT ... SELECT no shard da conta: o cliente (replicado em todos
+        # os shards) é resolvido pelo CPF no mesmo comando, que não insere
+        # nada se o CPF não existir. O número repetido é barrado pela
+        # restrição única
+        titular = aliased(Cliente)
+        stmt = insert(Conta).from_select(
+            ["numero", "cliente_id", "saldo", "agencia"],
+            select(literal(numero), Cliente.id, literal(0.0), literal('0001')).where(Cliente.cpf == cpf)
+        ).returning(
+            Conta.numero, Conta.agencia, Conta.saldo,
+            select(titular.nome).where(titular.id == literal_column("contas.cliente_id"))
+            .scalar_subquery().label("titular")
         )
-        session.add(nova)
-        await session.commit()
-        await session.refresh(nova)
-        return nova
-    
+        try:
+            nova = (await session.execute(stmt)).mappings().first()
+            if nova is None:
+                await session.rollback()
+                return 'cliente_nao_encontrado'
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return 'conta_ja_existe'
+
+        # Conta nova não tem histórico
+        return {**nova, "historico": []}
+
     @staticmethod
     async def consultar_conta(
         numero: int,
-        session: AsyncSession
-    ) -> Conta | str:
-        # Busca conta pelo número
-        result = await session.execute(select(Conta).where(Conta.numero == numero))
-        conta_especifica = result.scalars().first()
-        
-        if not conta_especifica:
+        session: AsyncSession,
+        ultimas: Optional[int] = None
+    ) -> dict | str:
+        # Com "ultimas", o histórico traz só as N transações mais recentes;
+        # cada N é uma variante separada da conta no cache
+        variante = f"ultimas:{ultimas}" if ultimas is not None else ""
+
+        # Read-through: responde do cache quando a conta já foi montada antes
+        em_cache = await cache_contas.obter(numero, variante)
+        if em_cache is not None:
+            return em_cache
+        geracao = cache_contas.geracao(numero)
+
+        # Conta, titular e histórico projetados direto no formato de ContaOut
+        conta = await projecoes.conta_por_numero(sessao_da_conta(session, numero), numero, ultimas)
+        if conta is None:
             return 'conta_nao_encontrada'
-        
-        # Retorna dados da conta e histórico de transações
-        return ContaOut(
-            numero=conta_especifica.numero,
-            agencia=conta_especifica.agencia,
-            saldo=conta_especifica.saldo,
-            titular=conta_especifica.cliente.nome,
-            historico=[
-                TransacaoOut(
-                    tipo_de_transacao=t.tipo_de_transacao,
-                    valor=t.valor,
-                    data=t.data.strftime("%d-%m-%Y %H:%M:%S")
-                )
-                for t in conta_especifica.transacoes
-            ]
+        await cache_contas.guardar(numero, conta, geracao, variante)
+        return conta
+
+    @staticmethod
+    async def buscar_contas(
+        numeros: list[int],
+        session: AsyncSession,
+        incluir_historico: bool = False
+    ) -> list[dict] | str:
+        if len(numeros) > projecoes.CHAVES_POR_BUSCA:
+            return 'chaves_demais'
+        # Resolve todos os números de uma vez (uma busca por shard, em
+        # paralelo) e responde na ordem pedida, marcando os que não existem
+        partes = await asyncio.gather(*(
+            projecoes.contas_por_numeros(shard, grupo, incluir_historico)
+            for shard, grupo in agrupar_por_shard(session, set(numeros))
+        ))
+        contas = {numero: conta for parte in partes for numero, conta in parte.items()}
+        return [
+            {"numero": numero, "encontrada": numero in contas, "conta": contas.get(numero)}
+            for numero in numeros
+        ]
+
+    @staticmethod
+    async def listar_transacoes(
+        numero: int,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = PAGINA_TRANSACOES,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None,
+        tipo_de_transacao: Optional[str] = None
+    ) -> tuple[list[dict], Optional[str]] | str:
+        posicao = None
+        if cursor is not None:
+            posicao = decodificar_cursor(cursor)
+            if posicao is None:
+                return 'cursor_invalido'
+
+        session = sessao_da_conta(session, numero)
+        conta_id = (await session.execute(select(Conta.id).where(Conta.numero == numero))).scalar()
+        if conta_id is None:
+            return 'conta_nao_encontrada'
+
+        # Mais recentes primeiro; o cursor é a (data, id) da última transação da página
+        transacoes, ultima = await projecoes.pagina_transacoes(
+            session, conta_id, posicao, limit, desde, ate, tipo_de_transacao
         )
+        proximo = codificar_cursor(*ultima) if len(transacoes) == limit else None
+        return transacoes, proximo
 
     @staticmethod
-    async def criar_transacao(
+    async def extrato(
+        numero: int,
+        session: AsyncSession,
+        desde: Optional[datetime] = None,
+        ate: Optional[datetime] = None
+    ) -> AsyncIterator[list] | str:
+        # Resolve a conta antes de a resposta começar, para ainda poder devolver 404
+        session = sessao_da_conta(session, numero)
+        conta_id = (await session.execute(select(Conta.id).where(Conta.numero == numero))).scalar()
+        if conta_id is None:
+            return 'conta_nao_encontrada'
+
+        # Intervalo [desde, ate) na ordem do índice (conta_id, data)
+        stmt = select(
+            Transacao.id, Transacao.data, Transacao.tipo_de_transacao, Transacao.valor
+        ).where(Transacao.conta_id == conta_id)
+        if desde is not None:
+            stmt = stmt.where(Transacao.data >= desde)
+        if ate is not None:
+            stmt = stmt.where(Transacao.data < ate)
+        stmt = stmt.order_by(Transacao.data, Transacao.id)
+        return ServiceBancario._blocos_do_extrato(stmt, session)
+
+    @staticmethod
+    async def _blocos_do_extrato(stmt, session: AsyncSession) -> AsyncIterator[list]:
+        # Cursor do servidor: só um bloco de linhas fica em memória por vez
+        result = await session.stream(stmt.execution_options(yield_per=LINHAS_POR_BLOCO_EXTRATO))
+        async for bloco in result.partitions():
+            yield bloco
+
+    @staticmethod
+    async def _aplicar_movimento(
         transacao: TransacaoIn,
         session: AsyncSession
-    ) -> MensagemOut:
-        # Busca conta pelo número
+    ) -> tuple[int, float] | str:
+        # Um único UPDATE condicional: o banco aplica o valor e checa o saldo
+        # de forma atômica, sem ler-modificar-escrever em Python
+        stmt = update(Conta).where(Conta.numero == transacao.numero_conta)
+        if transacao.tipo_de_transacao == "deposito":
+            stmt = stmt.values(saldo=Conta.saldo + transacao.valor)
+        else:
+            stmt = stmt.where(Conta.saldo >= transacao.valor).values(saldo=Conta.saldo - transacao.valor)
+
         result = await session.execute(
-            select(Conta).where(Conta.numero == transacao.numero_conta)
+            stmt.returning(Conta.id, Conta.saldo)
+            .execution_options(synchronize_session=False)
         )
-        conta = result.scalars().first()
-        if not conta:
-            return MensagemOut(mensagem='conta nao encontrada')
-       
-        # Aplica regras de depósito ou saque
-        if transacao.tipo_de_transacao == "deposito":
-            conta.saldo += transacao.valor
-        elif transacao.tipo_de_transacao == "saque":
-            if conta.saldo < transacao.valor:
-                return MensagemOut(mensagem='Saldo insuficiente')
-            conta.saldo -= transacao.valor
+        linha = result.first()
+        if linha:
+            return linha.id, linha.saldo
+
+        # Nenhuma linha alterada: descobre o motivo (só no caminho de erro)
+        result = await session.execute(select(Conta.id).where(Conta.numero == transacao.numero_conta))
+        if result.scalar() is None:
+            return 'conta_nao_encontrada'
+        return 'saldo_insuficiente'
+
+    @staticmethod
+    async def _registrar_lancamentos(
+        lancamentos: list[dict],
+        session: AsyncSession
+    ) -> None:
+        # Insere as linhas do histórico em lote (executemany), sem carregar
+        # objetos, e soma os lançamentos nos resumos diários na mesma transação
+        if lancamentos:
+            await session.execute(insert(Transacao), lancamentos)
+            await ServiceRelatorios.somar_lancamentos(lancamentos, session)
+
+    @staticmethod
+    async def _aplicar_grupo(
+        transacoes: list[TransacaoIn],
+        session: AsyncSession
+    ) -> list[TransacaoRealizadaOut | str]:
+        # As travas das contas do grupo são obtidas em ordem crescente e
+        # mantidas até o commit
+        async with travas_contas.travar_varias(*(t.numero_conta for t in transacoes)):
+            return await ServiceBancario._aplicar_grupo_travado(transacoes, session)
+
+    @staticmethod
+    async def _aplicar_grupo_travado(
+        transacoes: list[TransacaoIn],
+        session: AsyncSession
+    ) -> list[TransacaoRealizadaOut | str]:
+        # Aplica as transações em ordem, todas na mesma transação do banco.
+        # Um UPDATE condicional que falha não altera nada, então os erros de
+        # um item não afetam os demais. O cache das contas é invalidado por
+        # quem chamou, depois do commit (uma falha ali não pode parecer uma
+        # transação não gravada)
+        resultados, lancamentos = [], []
+        agora = datetime.utcnow()
+        for transacao in transacoes:
+            if transacao.tipo_de_transacao not in TIPOS_DE_TRANSACAO:
+                resultados.append('tipo_invalido')
+                continue
+            resultado = await ServiceBancario._aplicar_movimento(transacao, session)
+            if isinstance(resultado, str):
+                resultados.append(resultado)
+                continue
+            conta_id, saldo = resultado
+            lancamentos.append({
+                "tipo_de_transacao": transacao.tipo_de_transacao,
+                "valor": transacao.valor,
+                "conta_id": conta_id,
+                "data": agora
+            })
+            resultados.append(TransacaoRealizadaOut(
+                mensagem=f'{transacao.tipo_de_transacao.capitalize()} realizado com sucesso',
+                saldo=saldo
+            ))
+
+        if not lancamentos:
+            await session.rollback()
+            return resultados
+
+        # Registra as transações no histórico e confirma tudo com um único commit
+        await ServiceBancario._registrar_lancamentos(lancamentos, session)
+        await session.commit()
+        return resultados
+
+    @staticmethod
+    async def criar_transacao(
+        transacao: TransacaoIn,
+        session: AsyncSession
+    ) -> TransacaoRealizadaOut | str:
+        # Group commit: a transação entra na fila do escritor do shard da
+        # conta e sai com o próximo commit agrupado daquele banco
+        session = sessao_da_conta(session, transacao.numero_conta)
+        if settings.GRUPO_COMMIT_ATIVO:
+            escritor = obter_escritor(session.bind, ServiceBancario._aplicar_grupo)
+            resultado = await escritor.enviar(transacao)
         else:
-            return MensagemOut(mensagem='tipo_invalido')
-    
-        # Registra transação no histórico
-        nova_transacao = Transacao(
-            tipo_de_transacao=transacao.tipo_de_transacao,
-            valor=transacao.valor,
-            conta_id=conta.id,
-            data=datetime.utcnow()
+            # Atualiza o saldo e registra a transação no histórico, com um commit
+            resultado = (await ServiceBancario._aplicar_grupo([transacao], session))[0]
+
+        # Só depois do commit, fora do grupo
+        if not isinstance(resultado, str):
+            await cache_contas.invalidar(transacao.numero_conta)
+        return resultado
+
+    @staticmethod
+    async def transferir(
+        transferencia: TransferenciaIn,
+        session: AsyncSession
+    ) -> TransferenciaRealizadaOut | str:
+        if transferencia.conta_origem == transferencia.conta_destino:
+            return 'mesma_conta'
+        async with travas_contas.travar_varias(transferencia.conta_origem, transferencia.conta_destino):
+            return await ServiceBancario._transferir_travado(transferencia, session)
+
+    @staticmethod
+    async def _transferir_travado(
+        transferencia: TransferenciaIn,
+        session: AsyncSession
+    ) -> TransferenciaRealizadaOut | str:
+        origem, destino = transferencia.conta_origem, transferencia.conta_destino
+        sessao_origem, sessao_destino = sessao_da_conta(session, origem), sessao_da_conta(session, destino)
+        if sessao_origem is not sessao_destino:
+            return await ServiceBancario._transferir_entre_shards(transferencia, session, sessao_origem, sessao_destino)
+
+        session = sessao_origem
+        movimentos = {
+            origem: TransacaoIn(numero_conta=origem, tipo_de_transacao="saque", valor=transferencia.valor),
+            destino: TransacaoIn(numero_conta=destino, tipo_de_transacao="deposito", valor=transferencia.valor),
+        }
+
+        # Débito e crédito são UPDATEs condicionais emitidos em ordem crescente
+        # de número de conta: as linhas são travadas pelo banco sempre na mesma
+        # ordem, então transferências opostas simultâneas (A->B e B->A) não
+        # entram em deadlock. Qualquer falha desfaz os dois lados
+        aplicados = {}
+        for numero in sorted(movimentos):
+            resultado = await ServiceBancario._aplicar_movimento(movimentos[numero], session)
+            if isinstance(resultado, str):
+                await session.rollback()
+                if resultado == 'conta_nao_encontrada':
+                    return 'conta_origem_nao_encontrada' if numero == origem else 'conta_destino_nao_encontrada'
+                return resultado
+            aplicados[numero] = resultado
+
+        # As duas pernas no histórico com um único INSERT em lote, e um commit
+        agora = datetime.utcnow()
+        (origem_id, saldo_origem), (destino_id, saldo_destino) = aplicados[origem], aplicados[destino]
+        await ServiceBancario._registrar_lancamentos([
+            {"tipo_de_transacao": "transferencia_saida", "valor": transferencia.valor,
+             "conta_id": origem_id, "data": agora},
+            {"tipo_de_transacao": "transferencia_entrada", "valor": transferencia.valor,
+             "conta_id": destino_id, "data": agora},
+        ], session)
+        await session.commit()
+        await cache_contas.invalidar(origem, destino)
+        return TransferenciaRealizadaOut(
+            mensagem='Transferencia realizada com sucesso',
+            saldo_origem=saldo_origem,
+            saldo_destino=saldo_destino
         )
-        session.add(nova_transacao)
+
+    @staticmethod
+    async def _transferir_entre_shards(
+        transferencia: TransferenciaIn,
+        session: AsyncSession,
+        sessao_origem: AsyncSession,
+        sessao_destino: AsyncSession
+    ) -> TransferenciaRealizadaOut | str:
+        # Contas em bancos diferentes, sem transação distribuída: o débito é
+        # confirmado no shard da origem junto com uma transferência pendente
+        # (outbox), e só depois o destino decide. Se a decisão não puder ser
+        # confirmada agora (shard fora do ar, requisição cancelada), a pendente
+        # continua gravada e recuperar_transferencias termina o trabalho
+        origem, destino, valor = transferencia.conta_origem, transferencia.conta_destino, transferencia.valor
+
+        # O destino é conferido antes de mexer na origem: o erro comum (conta
+        # inexistente) não chega a precisar de estorno
+        destino_id = (await sessao_destino.execute(select(Conta.id).where(Conta.numero == destino))).scalar()
+        if destino_id is None:
+            return 'conta_destino_nao_encontrada'
+
+        agora = datetime.utcnow()
+        debito = await ServiceBancario._aplicar_movimento(
+            TransacaoIn(numero_conta=origem, tipo_de_transacao="saque", valor=valor), sessao_origem
+        )
+        if isinstance(debito, str):
+            await sessao_origem.rollback()
+            return 'conta_origem_nao_encontrada' if debito == 'conta_nao_encontrada' else debito
+        origem_id, saldo_origem = debito
+        await ServiceBancario._registrar_lancamentos([
+            {"tipo_de_transacao": "transferencia_saida", "valor": valor, "conta_id": origem_id, "data": agora}
+        ], sessao_origem)
+        pendente = {"conta_origem": origem, "conta_destino": destino, "valor": valor, "data": agora}
+        pendente["id"] = (await sessao_origem.execute(
+            insert(TransferenciaPendente).values(pendente).returning(TransferenciaPendente.id)
+        )).scalar_one()
+        await sessao_origem.commit()
+        await cache_contas.invalidar(origem)
+
+        shard_origem = shard_da_conta(origem, quantidade_de_shards(session))
+        try:
+            situacao, saldo_destino = await ServiceBancario._concluir_transferencia(
+                pendente, shard_origem, sessao_origem, sessao_destino
+            )
+        except Exception:
+            logger.exception("transferencia %s -> %s: credito nao confirmado, fica pendente", origem, destino)
+            return 'transferencia_pendente'
+        if situacao == "estornada":
+            return 'transferencia_estornada'
+        return TransferenciaRealizadaOut(
+            mensagem='Transferencia realizada com sucesso',
+            saldo_origem=saldo_origem,
+            saldo_destino=saldo_destino
+        )
+
+    @staticmethod
+    async def _concluir_transferencia(
+        pendente: dict,
+        shard_origem: int,
+        sessao_origem: AsyncSession,
+        sessao_destino: AsyncSession
+    ) -> tuple[str, Optional[float]]:
+        # No destino, o crédito (ou, se a conta de destino não existe mais, a
+        # recusa) é confirmado junto com a decisão em TransferenciaRecebida.
+        # Se outra tentativa já decidiu, a chave da decisão conflita, o crédito
+        # desta é desfeito e vale a decisão gravada
+        destino, valor = pendente["conta_destino"], pendente["valor"]
+        decisao = {"shard_origem": shard_origem, "transferencia_id": pendente["id"]}
+        saldo_destino = None
+        try:
+            credito = await ServiceBancario._aplicar_movimento(
+                TransacaoIn(numero_conta=destino, tipo_de_transacao="deposito", valor=valor), sessao_destino
+            )
+            situacao = "estornada" if isinstance(credito, str) else "creditada"
+            if situacao == "creditada":
+                destino_id, saldo_destino = credito
+                await ServiceBancario._registrar_lancamentos([
+                    {"tipo_de_transacao": "transferencia_entrada", "valor": valor,
+                     "conta_id": destino_id, "data": pendente["data"]}
+                ], sessao_destino)
+            await sessao_destino.execute(insert(TransferenciaRecebida).values(**decisao, situacao=situacao))
+            await sessao_destino.commit()
+        except IntegrityError:
+            await sessao_destino.rollback()
+            situacao = (await sessao_destino.execute(
+                select(TransferenciaRecebida.situacao).filter_by(**decisao)
+            )).scalar_one()
+            if situacao == "creditada":
+                saldo_destino = (await sessao_destino.execute(
+                    select(Conta.saldo).where(Conta.numero == destino)
+                )).scalar()
+        except Exception:
+            await sessao_destino.rollback()
+            raise
+        await cache_contas.invalidar(destino)
+
+        # Na origem a pendente é apagada na mesma transação do estorno: se
+        # outra tentativa já a apagou, o valor não volta duas vezes
+        origem = pendente["conta_origem"]
+        try:
+            apagada = await sessao_origem.execute(
+                delete(TransferenciaPendente).where(TransferenciaPendente.id == pendente["id"])
+            )
+            if situacao == "estornada" and apagada.rowcount:
+                estorno = await ServiceBancario._aplicar_movimento(
+                    TransacaoIn(numero_conta=origem, tipo_de_transacao="deposito", valor=valor), sessao_origem
+                )
+                if isinstance(estorno, str):
+                    raise RuntimeError(f"estorno na conta {origem} falhou: {estorno}")
+                await ServiceBancario._registrar_lancamentos([
+                    {"tipo_de_transacao": "estorno", "valor": valor,
+                     "conta_id": estorno[0], "data": datetime.utcnow()}
+                ], sessao_origem)
+            await sessao_origem.commit()
+        except Exception:
+            await sessao_origem.rollback()
+            raise
+        await cache_contas.invalidar(origem)
+        return situacao, saldo_destino
+
+    @staticmethod
+    async def recuperar_transferencias(
+        session: AsyncSession,
+        margem_s: Optional[float] = None
+    ) -> dict:
+        # Termina as transferências entre shards que ficaram pendentes (crédito
+        # que falhou, processo que caiu no meio, requisição cancelada). Só as
+        # mais antigas que a margem: as recentes ainda podem estar em andamento
+        margem_s = settings.TRANSFERENCIAS_PENDENTES_MARGEM_S if margem_s is None else margem_s
+        corte = datetime.utcnow() - timedelta(seconds=margem_s)
+        resultado = {"creditadas": 0, "estornadas": 0, "pendentes": 0}
+        for shard_origem, sessao_origem in enumerate(sessoes_dos_shards(session)):
+            pendentes = (await sessao_origem.execute(
+                select(TransferenciaPendente.id, TransferenciaPendente.conta_origem,
+                       TransferenciaPendente.conta_destino, TransferenciaPendente.valor, TransferenciaPendente.data)
+                .where(TransferenciaPendente.data <= corte)
+                .order_by(TransferenciaPendente.id)
+            )).mappings().all()
+            for pendente in pendentes:
+                origem, destino = pendente["conta_origem"], pendente["conta_destino"]
+                async with travas_contas.travar_varias(origem, destino):
+                    try:
+                        situacao, _ = await ServiceBancario._concluir_transferencia(
+                            dict(pendente), shard_origem, sessao_origem, sessao_da_conta(session, destino)
+                        )
+                        resultado[situacao + "s"] += 1
+                    except Exception:
+                        # Fica para a próxima rodada (e as outras pendentes seguem)
+                        logger.exception("transferencia pendente %s -> %s nao concluida", origem, destino)
+                        resultado["pendentes"] += 1
+        return resultado
+
+    @staticmethod
+    async def criar_transacoes_em_lote(
+        transacoes: list[TransacaoIn],
+        session: AsyncSession
+    ) -> LoteTransacoesOut:
+        resultados = []
+        # Processa o lote em blocos, na ordem recebida, com um commit por
+        # bloco. Cada bloco é dividido pelo shard das contas e as partes
+        # rodam em paralelo (a ordem dos itens de uma mesma conta é mantida)
+        for inicio in range(0, len(transacoes), ITENS_POR_COMMIT_LOTE):
+            itens = list(enumerate(transacoes[inicio:inicio + ITENS_POR_COMMIT_LOTE], start=inicio))
+            partes = await asyncio.gather(*(
+                ServiceBancario._aplicar_bloco_do_lote(grupo, shard)
+                for shard, grupo in agrupar_por_shard(session, itens, lambda item: item[1].numero_conta)
+            ))
+            resultados.extend(sorted((r for parte in partes for r in parte), key=lambda r: r.indice))
+
+        sucesso = sum(1 for r in resultados if r.status == "ok")
+        return LoteTransacoesOut(
+            total=len(resultados),
+            sucesso=sucesso,
+            falhas=len(resultados) - sucesso,
+            resultados=resultados
+        )
+
+    @staticmethod
+    async def _aplicar_bloco_do_lote(
+        bloco: list[tuple[int, TransacaoIn]],
+        session: AsyncSession
+    ) -> list[ResultadoLoteItem]:
+        # O bloco (pares índice no lote, transação) confere o saldo em
+        # memória: as travas impedem que outra escrita na mesma conta passe
+        # entre a leitura e o UPDATE
+        async with travas_contas.travar_varias(*(t.numero_conta for _, t in bloco)):
+            return await ServiceBancario._aplicar_bloco_travado(bloco, session)
+
+    @staticmethod
+    async def _aplicar_bloco_travado(
+        bloco: list[tuple[int, TransacaoIn]],
+        session: AsyncSession
+    ) -> list[ResultadoLoteItem]:
+        # Resolve todas as contas do bloco com um único IN
+        # (FOR UPDATE trava as linhas no PostgreSQL; é ignorado no SQLite)
+        numeros = {t.numero_conta for _, t in bloco}
+        result = await session.execute(
+            select(Conta.id, Conta.numero, Conta.saldo)
+            .where(Conta.numero.in_(numeros))
+            .with_for_update()
+        )
+        linhas = result.all()
+        contas = {linha.numero: linha.id for linha in linhas}
+        lidos = {linha.numero: linha.saldo for linha in linhas}
+        saldos = dict(lidos)
+        avaliados = ServiceBancario._avaliar_itens(bloco, saldos)
+
+        # Grava o delta líquido de cada conta com a condição "saldo + delta >= 0"
+        # checada pelo próprio banco: a leitura acima não trava nada no SQLite e
+        # as travas são por processo, então outro worker pode ter sacado da
+        # mesma conta depois dela. Contas recusadas não mudam
+        recusadas = await ServiceBancario._somar_deltas(contas, lidos, saldos, session, condicional=True)
+        if recusadas:
+            # O UPDATE acima já segura a escrita (lock do SQLite; no PostgreSQL
+            # as linhas estão travadas pelo FOR UPDATE): o saldo relido não muda
+            # até o commit, e os itens das contas recusadas são refeitos sobre ele
+            result = await session.execute(select(Conta.numero, Conta.saldo).where(Conta.numero.in_(recusadas)))
+            lidos.update(result.tuples().all())
+            saldos.update((numero, lidos[numero]) for numero in recusadas)
+            avaliados.update(ServiceBancario._avaliar_itens(
+                [(indice, t) for indice, t in bloco if t.numero_conta in recusadas], saldos
+            ))
+            await ServiceBancario._somar_deltas(
+                {numero: contas[numero] for numero in recusadas}, lidos, saldos, session, condicional=False
+            )
+
+        # Resultados na ordem do bloco e o histórico dos itens aceitos em lote
+        resultados, lancamentos = [], []
+        agora = datetime.utcnow()
+        for indice, transacao in bloco:
+            status, saldo = avaliados[indice]
+            resultados.append(ResultadoLoteItem(
+                indice=indice, numero_conta=transacao.numero_conta, status=status, saldo=saldo
+            ))
+            if status == 'ok':
+                lancamentos.append({
+                    "tipo_de_transacao": transacao.tipo_de_transacao,
+                    "valor": transacao.valor,
+                    "conta_id": contas[transacao.numero_conta],
+                    "data": agora
+                })
+        await ServiceBancario._registrar_lancamentos(lancamentos, session)
         await session.commit()
-        await session.refresh(nova_transacao)
-        return MensagemOut(mensagem=f'{transacao.tipo_de_transacao.capitalize()}realizado com sucesso')
+        await cache_contas.invalidar(*(
+            numero for numero in contas if saldos[numero] != lidos[numero] or numero in recusadas
+        ))
+        return resultados
+
+    @staticmethod
+    def _avaliar_itens(
+        bloco: list[tuple[int, TransacaoIn]],
+        saldos: dict[int, float]
+    ) -> dict[int, tuple[str, Optional[float]]]:
+        # Aplica os itens em ordem sobre "saldos" (número -> saldo, só das
+        # contas existentes), em memória: índice -> (status, saldo depois do item)
+        avaliados = {}
+        for indice, transacao in bloco:
+            numero = transacao.numero_conta
+            if transacao.tipo_de_transacao not in TIPOS_DE_TRANSACAO:
+                status = 'tipo_invalido'
+            elif numero not in saldos:
+                status = 'conta_nao_encontrada'
+            elif transacao.tipo_de_transacao == "saque" and saldos[numero] < transacao.valor:
+                status = 'saldo_insuficiente'
+            else:
+                status = 'ok'
+                if transacao.tipo_de_transacao == "deposito":
+                    saldos[numero] += transacao.valor
+                else:
+                    saldos[numero] -= transacao.valor
+            avaliados[indice] = (status, saldos[numero] if status == 'ok' else None)
+        return avaliados
+
+    @staticmethod
+    async def _somar_deltas(
+        contas: dict[int, int],
+        lidos: dict[int, float],
+        saldos: dict[int, float],
+        session: AsyncSession,
+        condicional: bool
+    ) -> set[int]:
+        # Um único UPDATE relativo (saldo + CASE id ... END), para não
+        # sobrescrever movimentos concorrentes. Com "condicional", só passam as
+        # contas que não ficam negativas; devolve os números das recusadas
+        deltas = {contas[numero]: saldos[numero] - lidos[numero] for numero in contas if saldos[numero] != lidos[numero]}
+        if not deltas:
+            return set()
+        delta = case(deltas, value=Conta.id)
+        stmt = update(Conta).where(Conta.id.in_(deltas)).values(saldo=Conta.saldo + delta)
+        if condicional:
+            stmt = stmt.where(Conta.saldo + delta >= 0)
+        result = await session.execute(stmt.returning(Conta.numero).execution_options(synchronize_session=False))
+        return {numero for numero in contas if contas[numero] in deltas} - set(result.scalars())
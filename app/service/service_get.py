@@ -1,36 +1,161 @@
+from typing import AsyncIterator, Optional
+
 from app.models.models_cliente import Cliente
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from app.database.session import AsyncSession
+from app.database.session import AsyncSession, quantidade_de_shards, sessoes_dos_shards
 from app.models.models_conta import Conta
-        
+from app.models.perfis import PerfilCliente, PerfilConta, opcoes_cliente, opcoes_conta
+from app.service import projecoes
+
+# Tamanho de página padrão e máximo das listagens (paginação por cursor no id)
+PAGINA_PADRAO = 100
+PAGINA_MAXIMA = 1000
+
+# Quantas linhas o cursor do servidor entrega por vez no modo streaming
+LINHAS_POR_LOTE_STREAM = 500
+
 class ServiceGet:
     @staticmethod
-    async def listar_clientes(session: AsyncSession):
-        # Busca todos os clientes no banco
-        result = await session.execute(select(Cliente))
-        clientes = result.scalars().all()
-        if not clientes:
+    def _consulta_clientes(after: Optional[int], limit: Optional[int], incluir_historico: bool):
+        # Keyset no id: "id > after" usa a chave primária, sem OFFSET
+        stmt = select(Cliente).order_by(Cliente.id)
+        if after is not None:
+            stmt = stmt.where(Cliente.id > after)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        # Contas vêm junto, mas o histórico só é carregado se for pedido
+        perfil = PerfilCliente.COM_HISTORICO if incluir_historico else PerfilCliente.COM_CONTAS
+        return stmt.options(*opcoes_cliente(perfil))
+
+    @staticmethod
+    def _consulta_contas(
+        after: Optional[int],
+        limit: Optional[int],
+        incluir_historico: bool,
+        indice: int = 0,
+        quantidade: int = 1
+    ):
+        # Com shards, "after" é o cursor global (ver projecoes.apos_no_shard)
+        stmt = select(Conta).order_by(Conta.id)
+        if after is not None:
+            stmt = stmt.where(projecoes.apos_no_shard(Conta.id, after, indice, quantidade))
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        # O titular é necessário para a resposta; o histórico só se for pedido
+        perfil = PerfilConta.COM_HISTORICO if incluir_historico else PerfilConta.COM_TITULAR
+        return stmt.options(*opcoes_conta(perfil))
+
+    @staticmethod
+    async def listar_clientes(
+        session: AsyncSession,
+        after: Optional[int] = None,
+        limit: int = PAGINA_PADRAO,
+        incluir_historico: bool = False
+    ):
+        # Busca uma página de clientes ordenada pelo id, já no formato de ClienteOut
+        clientes, ultimo_id = await projecoes.pagina_clientes(session, after, limit, incluir_historico)
+        if not clientes and after is None:
             return 'clientes_nao_encontrados'
-        return clientes
-    
-    @staticmethod
-    async def listar_contas(session: AsyncSession):
-        # Busca todas as contas no banco
-        result = await session.execute(select(Conta))
-        contas = result.scalars().all()
-        if not contas:
+        return clientes, ultimo_id
+
+    @staticmethod
+    async def listar_contas(
+        session: AsyncSession,
+        after: Optional[int] = None,
+        limit: int = PAGINA_PADRAO,
+        incluir_historico: bool = False
+    ):
+        # Busca uma página de contas ordenada pelo id, já no formato de ContaOut
+        contas, ultimo_id = await projecoes.pagina_contas(session, after, limit, incluir_historico)
+        if not contas and after is None:
             return 'contas_nao_encontradas'
-        return contas
-    
+        return contas, ultimo_id
+
+    @staticmethod
+    async def stream_clientes(
+        session: AsyncSession,
+        after: Optional[int] = None,
+        limit: Optional[int] = None,
+        incluir_historico: bool = False
+    ) -> AsyncIterator[Cliente | dict]:
+        if quantidade_de_shards(session) > 1:
+            # As contas de cada cliente estão espalhadas pelos shards: vai em
+            # blocos de clientes projetados, com as contas de todos os shards
+            async for cliente in ServiceGet._stream_clientes_em_blocos(session, after, limit, incluir_historico):
+                yield cliente
+            return
+
+        # Percorre os clientes com cursor do servidor, sem materializar tudo em memória
+        stmt = ServiceGet._consulta_clientes(after, limit, incluir_historico)
+        result = await session.stream(stmt.execution_options(yield_per=LINHAS_POR_LOTE_STREAM))
+        async for cliente in result.scalars():
+            yield cliente
+
+    @staticmethod
+    async def stream_contas(
+        session: AsyncSession,
+        after: Optional[int] = None,
+        limit: Optional[int] = None,
+        incluir_historico: bool = False
+    ) -> AsyncIterator[Conta]:
+        # Percorre as contas com cursor do servidor, sem materializar tudo em
+        # memória: um cursor por shard, intercalados na ordem (id, shard)
+        sessoes = sessoes_dos_shards(session)
+        fluxos = [
+            ServiceGet._stream_do_shard(
+                shard, ServiceGet._consulta_contas(after, limit, incluir_historico, indice, len(sessoes))
+            )
+            for indice, shard in enumerate(sessoes)
+        ]
+        entregues = 0
+        async for conta in projecoes.intercalar(fluxos, lambda conta, indice: (conta.id, indice)):
+            if limit is not None and entregues >= limit:
+                return
+            entregues += 1
+            yield conta
+
+    @staticmethod
+    async def _stream_do_shard(session: AsyncSession, stmt) -> AsyncIterator:
+        result = await session.stream(stmt.execution_options(yield_per=LINHAS_POR_LOTE_STREAM))
+        async for objeto in result.scalars():
+            yield objeto
+
+    @staticmethod
+    async def _stream_clientes_em_blocos(
+        session: AsyncSession,
+        after: Optional[int],
+        limit: Optional[int],
+        incluir_historico: bool
+    ) -> AsyncIterator[dict]:
+        restantes = limit
+        while restantes is None or restantes > 0:
+            tamanho = LINHAS_POR_LOTE_STREAM if restantes is None else min(restantes, LINHAS_POR_LOTE_STREAM)
+            clientes, after = await projecoes.pagina_clientes(session, after, tamanho, incluir_historico)
+            for cliente in clientes:
+                yield cliente
+            if len(clientes) < tamanho:
+                return
+            if restantes is not None:
+                restantes -= len(clientes)
+
     @staticmethod
     async def lista_cliente_contas(cliente_id: int, session: AsyncSession):
-        # Busca cliente específico e carrega suas contas associadas
-        result = await session.execute(
-            select(Cliente).where(Cliente.id == cliente_id)
-            .options(selectinload(Cliente.contas))  # carrega contas junto com cliente
-        )
-        cliente = result.scalars().first()
+        # Busca cliente específico com suas contas associadas
+        cliente = await projecoes.cliente_por_id(session, cliente_id)
         if not cliente:
             return 'cliente_nao_encontrado'
         return cliente
+
+    @staticmethod
+    async def buscar_clientes(ids: list[int], session: AsyncSession) -> list[dict] | str:
+        if len(ids) > projecoes.CHAVES_POR_BUSCA:
+            return 'chaves_demais'
+        # Resolve todos os ids de uma vez e responde na ordem pedida,
+        # marcando os que não existem
+        clientes = await projecoes.clientes_por_ids(session, ids)
+        return [
+            {"id": cliente_id, "encontrado": cliente_id in clientes, "cliente": clientes.get(cliente_id)}
+            for cliente_id in ids
+        ]
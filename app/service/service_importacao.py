@@ -0,0 +1,252 @@
+import asyncio
+import codecs
+import csv
+from typing import AsyncIterator, Optional
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.database.session import AsyncSession, agrupar_por_shard, quantidade_de_shards, sessoes_dos_shards
+from app.models.models_cliente import Cliente
+from app.models.models_conta import Conta
+from app.schemas.schemas_do_cliente import ClienteIn
+from app.service.service_bancario import ServiceBancario, cache_contas
+
+# Linhas por transação da importação: cada bloco faz duas buscas com IN
+# (CPFs e números) e dois INSERTs (por shard), então fica abaixo do limite
+# de parâmetros por comando do SQLite
+LINHAS_POR_BLOCO_IMPORTACAO = 500
+
+# Erros listados no relatório; os demais só entram na contagem
+ERROS_NO_RELATORIO = 1000
+
+# Campos de cada linha (CSV com cabeçalho ou objeto NDJSON)
+CAMPOS_DO_CLIENTE = ("nome", "cpf", "endereco", "data_nascimento")
+CAMPO_DA_CONTA = "numero"
+
+# Colunas do cliente lidas na busca por CPF (também replicadas nos shards)
+COLUNAS_DO_CLIENTE = (Cliente.id, Cliente.nome, Cliente.cpf, Cliente.endereco, Cliente.data_nascimento)
+
+
+# Linhas de texto de um corpo recebido em pedaços, sem juntar o corpo inteiro
+async def _linhas_de_texto(pedacos: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    resto = ""
+    async for pedaco in pedacos:
+        *linhas, resto = (resto + decodificador.decode(pedaco)).split("\n")
+        for linha in linhas:
+            yield linha.rstrip("\r")
+    resto += decodificador.decode(b"", final=True)
+    if resto:
+        yield resto.rstrip("\r")
+
+
+# Registros (posição, campos) de um CSV com cabeçalho; campos é None
+# quando a linha não tem o mesmo número de colunas do cabeçalho
+async def registros_csv(pedacos: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, Optional[dict]]]:
+    cabecalho, pendentes, aspas, posicao = None, [], 0, 0
+    async for linha in _linhas_de_texto(pedacos):
+        # Número ímpar de aspas: um campo entre aspas continua na próxima linha
+        pendentes.append(linha)
+        aspas += linha.count('"')
+        if aspas % 2:
+            continue
+        texto = "\n".join(pendentes)
+        pendentes, aspas = [], 0
+        posicao += 1
+        if not texto.strip():
+            continue
+
+        campos = next(csv.reader([texto]))
+        if cabecalho is None:
+            cabecalho = [campo.strip() for campo in campos]
+            continue
+        yield posicao, dict(zip(cabecalho, campos)) if len(campos) == len(cabecalho) else None
+    if pendentes:
+        yield posicao + 1, None
+
+
+# Registros (posição, campos) de um NDJSON, um objeto por linha
+async def registros_ndjson(pedacos: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, Optional[dict]]]:
+    posicao = 0
+    async for linha in _linhas_de_texto(pedacos):
+        posicao += 1
+        if not linha.strip():
+            continue
+        try:
+            campos = orjson.loads(linha)
+        except orjson.JSONDecodeError:
+            campos = None
+        yield posicao, campos if isinstance(campos, dict) else None
+
+
+# Valida uma linha: (cpf, dados do cliente ou None, número da conta ou None),
+# ou o detalhe do erro. Os dados do cliente só são exigidos quando o CPF
+# ainda não existe (a linha pode só abrir uma conta para um cliente existente)
+def _validar_linha(campos: Optional[dict]) -> tuple[str, Optional[dict], Optional[int]] | str:
+    if campos is None:
+        return "linha mal formada"
+    valores = {campo: campos.get(campo) for campo in CAMPOS_DO_CLIENTE}
+    valores = {campo: str(valor).strip() for campo, valor in valores.items() if valor not in (None, "")}
+    if "cpf" not in valores:
+        return "cpf obrigatorio"
+
+    numero = campos.get(CAMPO_DA_CONTA)
+    if numero in (None, ""):
+        numero = None
+    else:
+        try:
+            numero = int(numero)
+        except (TypeError, ValueError):
+            return "numero da conta invalido"
+
+    dados = None
+    if len(valores) == len(CAMPOS_DO_CLIENTE):
+        try:
+            dados = ClienteIn(**valores).model_dump()
+        except ValidationError:
+            return "dados do cliente invalidos"
+    return valores["cpf"], dados, numero
+
+
+class ServiceImportacao:
+    @staticmethod
+    async def importar(
+        registros: AsyncIterator[tuple[int, Optional[dict]]],
+        session: AsyncSession
+    ) -> dict:
+        # Lê o arquivo em blocos de LINHAS_POR_BLOCO_IMPORTACAO linhas, um
+        # commit por bloco: a memória usada depende do bloco, não do arquivo
+        relatorio = {"linhas": 0, "clientes_criados": 0, "contas_criadas": 0, "erros": 0, "detalhes_erros": []}
+        bloco = []
+        async for registro in registros:
+            bloco.append(registro)
+            if len(bloco) >= LINHAS_POR_BLOCO_IMPORTACAO:
+                await ServiceImportacao._importar_bloco(bloco, session, relatorio)
+                bloco = []
+        if bloco:
+            await ServiceImportacao._importar_bloco(bloco, session, relatorio)
+
+        relatorio["erros_omitidos"] = relatorio["erros"] - len(relatorio["detalhes_erros"])
+        return relatorio
+
+    @staticmethod
+    async def _importar_bloco(
+        bloco: list[tuple[int, Optional[dict]]],
+        session: AsyncSession,
+        relatorio: dict
+    ) -> None:
+        # Um INSERT concorrente (outra importação, POST /banco/clientes/) pode
+        # criar o mesmo CPF ou número entre a busca e o INSERT: o bloco é
+        # desfeito e refeito uma vez, e a nova busca já enxerga a linha criada.
+        # Com shards os clientes são confirmados antes das contas: os que a
+        # primeira tentativa já gravou (cpf -> cliente) seguem como criados
+        # pelo bloco na segunda, em vez de virarem duplicados
+        criados = {}
+        for tentativa in range(2):
+            try:
+                clientes, contas, erros = await ServiceImportacao._gravar_bloco(bloco, session, criados)
+                break
+            except IntegrityError:
+                for shard in sessoes_dos_shards(session):
+                    await shard.rollback()
+        else:
+            clientes, contas = len(criados), []
+            erros = [(posicao, "erro_de_gravacao", None) for posicao, _ in bloco]
+
+        await cache_contas.invalidar(*contas)
+        relatorio["linhas"] += len(bloco)
+        relatorio["clientes_criados"] += clientes
+        relatorio["contas_criadas"] += len(contas)
+        relatorio["erros"] += len(erros)
+        espaco = ERROS_NO_RELATORIO - len(relatorio["detalhes_erros"])
+        relatorio["detalhes_erros"].extend(
+            {"linha": posicao, "erro": erro, "detalhe": detalhe} for posicao, erro, detalhe in erros[:max(espaco, 0)]
+        )
+
+    @staticmethod
+    async def _gravar_bloco(
+        bloco: list[tuple[int, Optional[dict]]],
+        session: AsyncSession,
+        criados: dict[str, dict]
+    ) -> tuple[int, list[int], list[tuple[int, str, Optional[str]]]]:
+        erros, validas = [], []
+        for posicao, campos in bloco:
+            linha = _validar_linha(campos)
+            if isinstance(linha, str):
+                erros.append((posicao, "linha_invalida", linha))
+            else:
+                validas.append((posicao, *linha))
+
+        # Duplicados já gravados: uma busca com IN por CPFs (no shard 0, que
+        # tem todos os clientes) e outra por números em cada shard, para o
+        # bloco inteiro (os blocos anteriores já foram confirmados)
+        cpfs = {cpf for _, cpf, _, _ in validas}
+        numeros = {numero for _, _, _, numero in validas if numero is not None}
+        clientes_por_cpf = {
+            cliente["cpf"]: dict(cliente) for cliente in (await session.execute(
+                select(*COLUNAS_DO_CLIENTE).where(Cliente.cpf.in_(cpfs))
+            )).mappings()
+        } if cpfs else {}
+        partes = await asyncio.gather(*(
+            shard.execute(select(Conta.numero).where(Conta.numero.in_(grupo)))
+            for shard, grupo in agrupar_por_shard(session, numeros)
+        ))
+        numeros_usados = {numero for parte in partes for numero in parte.scalars()}
+
+        # Duplicados dentro do próprio bloco: a primeira linha de cada CPF
+        # cria o cliente; as seguintes só podem abrir contas para ele
+        novos_clientes, novas_contas = {}, []
+        for posicao, cpf, dados, numero in validas:
+            if numero is not None and numero in numeros_usados:
+                erros.append((posicao, "conta_ja_existe", None))
+                continue
+            cliente_existe = (cpf in clientes_por_cpf and cpf not in criados) or cpf in novos_clientes
+            if cliente_existe and numero is None:
+                erros.append((posicao, "cliente_com_esse_cpf_ja_existe", None))
+                continue
+            if not cliente_existe:
+                if dados is None:
+                    erros.append((posicao, "cliente_nao_encontrado", None))
+                    continue
+                novos_clientes[cpf] = dados
+            if numero is not None:
+                numeros_usados.add(numero)
+                novas_contas.append((numero, cpf))
+
+        # Clientes que uma tentativa anterior do bloco já confirmou não são
+        # inseridos de novo (continuam contados como criados)
+        inserir = {cpf: dados for cpf, dados in novos_clientes.items() if cpf not in criados}
+        if inserir:
+            ids = await session.execute(insert(Cliente).returning(Cliente.cpf, Cliente.id), list(inserir.values()))
+            for cpf, cliente_id in ids.all():
+                clientes_por_cpf[cpf] = {**inserir[cpf], "id": cliente_id}
+            if quantidade_de_shards(session) > 1:
+                # Com shards, os clientes são confirmados e replicados antes
+                # das contas, que precisam do titular no próprio shard
+                await session.commit()
+                criados.update((cpf, clientes_por_cpf[cpf]) for cpf in inserir)
+                await ServiceBancario.replicar_clientes([clientes_por_cpf[cpf] for cpf in inserir], session)
+
+        async def gravar_contas(shard: AsyncSession, contas: list[tuple[int, str]]):
+            # Nos demais shards, os titulares vão junto na mesma transação
+            # (idempotente), mesmo que a réplica acima tenha falhado
+            if shard is not session:
+                titulares = {cpf for _, cpf in contas}
+                await ServiceBancario.inserir_replicas([clientes_por_cpf[cpf] for cpf in titulares], shard)
+            await shard.execute(insert(Conta), [
+                {"numero": numero, "cliente_id": clientes_por_cpf[cpf]["id"], "saldo": 0.0, "agencia": "0001"}
+                for numero, cpf in contas
+            ])
+
+        await asyncio.gather(*(
+            gravar_contas(shard, contas)
+            for shard, contas in agrupar_por_shard(session, novas_contas, lambda conta: conta[0])
+        ))
+        for shard in sessoes_dos_shards(session):
+            await shard.commit()
+
+        erros.sort()
+        return len(novos_clientes.keys() | criados.keys()), [numero for numero, _ in novas_contas], erros
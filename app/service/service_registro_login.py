@@ -1,9 +1,10 @@
 from fastapi import Depends, HTTPException
 from app.schemas.schemas_auth import RegisterUsuario, UsuarioOut, LoginUsuario, TokenOut
 from app.database.session import AsyncSession, get_session
-from app.autenticacao_bancaria.auth import hash_password, verify_password, create_token
+from app.autenticacao_bancaria.auth import hash_password_async, verify_password_async, create_token
 from app.models.models_auth import User
-from sqlalchemy import select
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
 
 class ServiceAuth:
     @staticmethod
@@ -11,17 +12,23 @@ class ServiceAuth:
             data: RegisterUsuario, 
             session: AsyncSession = Depends(get_session)
         ) -> User | str:
-        # Verifica se já existe usuário com o mesmo username
-        result = await session.execute(select(User).where(User.username == data.username))
-        existente = result.scalars().first()
-        if existente:
+        # Username já usado: responde antes de gastar um hash Argon2
+        result = await session.execute(select(User.id).where(User.username == data.username))
+        if result.scalar() is not None:
             return 'usuario_ja_existe'
 
-        # Cria novo usuário com senha criptografada
-        novo = User(username=data.username, hashed_password=hash_password(data.password))
-        session.add(novo)
-        await session.commit()
-        await session.refresh(novo)
+        # INSERT ... RETURNING sem refresh; um cadastro concorrente com o mesmo
+        # username (depois da consulta acima) é barrado pela restrição única
+        hashed_password = await hash_password_async(data.password)
+        try:
+            novo = (await session.execute(
+                insert(User).values(username=data.username, hashed_password=hashed_password)
+                .returning(User.id, User.username)
+            )).mappings().one()
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return 'usuario_ja_existe'
         return UsuarioOut.model_validate(novo)  # retorna dados do usuário sem expor senha
     
     @staticmethod
@@ -34,7 +41,7 @@ class ServiceAuth:
         user = result.scalars().first()
 
         # Valida credenciais (username e senha)
-        if not user or not verify_password(data.password, user.hashed_password):
+        if not user or not await verify_password_async(data.password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Credenciais inválidas")
 
         # Gera token JWT para autenticação
@@ -0,0 +1,175 @@
+"""
+Resumos diários por conta e tipo de transação (tabela resumos_diarios)
+
+Backfill do histórico já existente (ex.: depois da migration e7d19b52a6c8),
+em todos os shards:
+
+python -m app.service.service_relatorios backfill
+python -m app.service.service_relatorios backfill --desde 2025-01-01
+"""
+import argparse
+import asyncio
+import json
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.database.session import AsyncSession, SessionLocal, engines, sessao_da_conta, sessoes_dos_shards
+from app.models.models_conta import Conta
+from app.models.models_resumo import ResumoDiario
+from app.models.models_transacao import Transacao
+from app.service.projecoes import blocos_de_contas
+
+# Linhas por comando de upsert (limite de parâmetros por comando do SQLite)
+LINHAS_POR_UPSERT = 1000
+
+# Período máximo de um relatório diário
+RELATORIO_DIAS_MAXIMO = 366
+
+
+# INSERT ... ON CONFLICT do dialeto da sessão (SQLite e PostgreSQL têm a mesma API)
+def _insert_com_conflito(session: AsyncSession):
+    dialeto = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+    return dialeto.insert(ResumoDiario)
+
+
+class ServiceRelatorios:
+    @staticmethod
+    async def somar_lancamentos(
+        lancamentos: list[dict],
+        session: AsyncSession
+    ) -> None:
+        # Agrupa os lançamentos por (conta, dia, tipo) em Python e soma cada
+        # grupo na linha do resumo com um upsert, na mesma transação do histórico
+        totais = defaultdict(lambda: [0, 0.0])
+        for lancamento in lancamentos:
+            chave = (lancamento["conta_id"], lancamento["data"].date(), lancamento["tipo_de_transacao"])
+            totais[chave][0] += 1
+            totais[chave][1] += lancamento["valor"]
+        linhas = [
+            {"conta_id": conta_id, "dia": dia, "tipo_de_transacao": tipo, "quantidade": quantidade, "total": total}
+            for (conta_id, dia, tipo), (quantidade, total) in sorted(totais.items())
+        ]
+
+        for inicio in range(0, len(linhas), LINHAS_POR_UPSERT):
+            stmt = _insert_com_conflito(session).values(linhas[inicio:inicio + LINHAS_POR_UPSERT])
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=[ResumoDiario.conta_id, ResumoDiario.dia, ResumoDiario.tipo_de_transacao],
+                set_={
+                    "quantidade": ResumoDiario.quantidade + stmt.excluded.quantidade,
+                    "total": ResumoDiario.total + stmt.excluded.total,
+                }
+            ))
+
+    @staticmethod
+    async def reconstruir_resumos(
+        session: AsyncSession,
+        desde: Optional[date] = None,
+        contas_por_bloco: Optional[int] = None
+    ) -> dict:
+        # Refaz os resumos a partir do histórico, um bloco de contas por
+        # commit: apaga as linhas do bloco (a partir de "desde") e as recria
+        # com um único INSERT ... SELECT agrupado no banco
+        contas_por_bloco = contas_por_bloco or settings.SALDO_CONTAS_POR_BLOCO
+        dia = func.date(Transacao.data)
+        resultado = {"contas": 0, "linhas": 0}
+        async for conta_ids in blocos_de_contas(session, contas_por_bloco):
+            apagar = delete(ResumoDiario).where(ResumoDiario.conta_id.in_(conta_ids))
+            origem = select(
+                Transacao.conta_id, dia, Transacao.tipo_de_transacao, func.count(), func.sum(Transacao.valor)
+            ).where(Transacao.conta_id.in_(conta_ids))
+            if desde is not None:
+                apagar = apagar.where(ResumoDiario.dia >= desde)
+                origem = origem.where(Transacao.data >= datetime.combine(desde, time()))
+
+            await session.execute(apagar)
+            inseridas = await session.execute(insert(ResumoDiario).from_select(
+                ["conta_id", "dia", "tipo_de_transacao", "quantidade", "total"],
+                origem.group_by(Transacao.conta_id, dia, Transacao.tipo_de_transacao)
+            ))
+            await session.commit()
+            resultado["contas"] += len(conta_ids)
+            resultado["linhas"] += inseridas.rowcount
+        return resultado
+
+    @staticmethod
+    async def relatorio_diario(
+        session: AsyncSession,
+        desde: date,
+        ate: date,
+        agrupar: str = "agencia",
+        numero: Optional[int] = None,
+        agencia: Optional[str] = None
+    ) -> list[dict] | str:
+        if ate < desde or (ate - desde).days >= RELATORIO_DIAS_MAXIMO:
+            return 'periodo_invalido'
+
+        # Lê só os resumos do período (índice por dia), nunca o histórico
+        chaves = [Conta.agencia, Conta.numero] if agrupar == "conta" else [Conta.agencia]
+        stmt = (
+            select(
+                ResumoDiario.dia, *chaves, ResumoDiario.tipo_de_transacao,
+                func.sum(ResumoDiario.quantidade).label("quantidade"),
+                func.sum(ResumoDiario.total).label("total")
+            )
+            .join(Conta, Conta.id == ResumoDiario.conta_id)
+            .where(ResumoDiario.dia >= desde, ResumoDiario.dia <= ate)
+            .group_by(ResumoDiario.dia, *chaves, ResumoDiario.tipo_de_transacao)
+            .order_by(ResumoDiario.dia, *chaves, ResumoDiario.tipo_de_transacao)
+        )
+        sessoes = sessoes_dos_shards(session)
+        if numero is not None:
+            stmt = stmt.where(Conta.numero == numero)
+            sessoes = [sessao_da_conta(session, numero)]
+        if agencia is not None:
+            stmt = stmt.where(Conta.agencia == agencia)
+
+        # Cada shard agrega os próprios resumos, em paralelo; as linhas da
+        # mesma chave vindas de shards diferentes são somadas aqui
+        partes = await asyncio.gather(*(shard.execute(stmt) for shard in sessoes))
+        totais = {}
+        for parte in partes:
+            for linha in parte.mappings():
+                chave = (linha["dia"], linha["agencia"], linha.get("numero"), linha["tipo_de_transacao"])
+                quantidade, total = totais.get(chave, (0, 0.0))
+                totais[chave] = (quantidade + linha["quantidade"], total + linha["total"])
+
+        return [
+            {
+                "dia": dia.isoformat(),
+                "agencia": agencia_da_linha,
+                "numero": numero_da_linha,
+                "tipo_de_transacao": tipo,
+                "quantidade": quantidade,
+                "total": total,
+            }
+            for (dia, agencia_da_linha, numero_da_linha, tipo), (quantidade, total) in sorted(
+                totais.items(), key=lambda item: (item[0][0], item[0][1], item[0][2] or 0, item[0][3])
+            )
+        ]
+
+
+async def _backfill(desde: Optional[date]) -> dict:
+    resultado = {"contas": 0, "linhas": 0}
+    try:
+        async with SessionLocal() as session:
+            for shard in sessoes_dos_shards(session):
+                parcial = await ServiceRelatorios.reconstruir_resumos(shard, desde)
+                resultado["contas"] += parcial["contas"]
+                resultado["linhas"] += parcial["linhas"]
+        return resultado
+    finally:
+        for engine in engines:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("comando", choices=["backfill"])
+    parser.add_argument("--desde", type=date.fromisoformat, help="refaz só os dias a partir desta data")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(_backfill(args.desde))))
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import settings
+from app.core.metricas import Contador, registro
+from app.database.session import SessaoComShards, sessao_da_conta
+from app.models.models_conta import Conta
+from app.models.models_saldo import SaldoSnapshot
+from app.models.models_transacao import Transacao
+from app.service.projecoes import blocos_de_contas, formatar_data
+from app.service.service_bancario import ServiceBancario
+
+logger = logging.getLogger(__name__)
+
+# Diferença máxima aceita entre um saldo guardado e a soma do histórico
+# (somas de float em ordens diferentes não batem no último bit)
+TOLERANCIA_SALDO = 0.005
+
+snapshots_criados = registro.adicionar(Contador(
+    "saldo_snapshots_criados_total", "Snapshots de saldo gravados pelo job"))
+divergencias_saldo = registro.adicionar(Contador(
+    "saldo_divergencias_total", "Divergencias encontradas pela reconciliacao", ("tipo",)))
+
+
+# Datas com fuso viram UTC sem fuso, como as datas gravadas no histórico
+def _utc(data: datetime) -> datetime:
+    if data.tzinfo is None:
+        return data
+    return data.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Snapshot mais recente de cada conta (subconsulta: conta_id, data, ate_transacao_id, saldo)
+def _ultimos_snapshots(conta_ids: list[int]):
+    posicao = func.row_number().over(
+        partition_by=SaldoSnapshot.conta_id,
+        order_by=(SaldoSnapshot.data.desc(), SaldoSnapshot.ate_transacao_id.desc())
+    ).label("posicao")
+    recentes = select(
+        SaldoSnapshot.conta_id, SaldoSnapshot.data, SaldoSnapshot.ate_transacao_id, SaldoSnapshot.saldo, posicao
+    ).where(SaldoSnapshot.conta_id.in_(conta_ids)).subquery()
+    return select(
+        recentes.c.conta_id, recentes.c.data, recentes.c.ate_transacao_id, recentes.c.saldo
+    ).where(recentes.c.posicao == 1).subquery()
+
+
+class ServiceSaldos:
+    @staticmethod
+    async def saldo_em(
+        numero: int,
+        session: AsyncSession,
+        em: Optional[datetime] = None
+    ) -> dict | str:
+        em = _utc(em) if em is not None else datetime.utcnow()
+        session = sessao_da_conta(session, numero)
+        conta_id = (await session.execute(select(Conta.id).where(Conta.numero == numero))).scalar()
+        if conta_id is None:
+            return 'conta_nao_encontrada'
+
+        # Ponto de partida: o snapshot mais recente até a data pedida
+        snapshot = (await session.execute(
+            select(SaldoSnapshot.data, SaldoSnapshot.ate_transacao_id, SaldoSnapshot.saldo)
+            .where(SaldoSnapshot.conta_id == conta_id, SaldoSnapshot.data <= em)
+            .order_by(SaldoSnapshot.data.desc(), SaldoSnapshot.ate_transacao_id.desc())
+            .limit(1)
+        )).first()
+
+        # Soma só as transações entre o snapshot e a data: no máximo
+        # SALDO_SNAPSHOT_INTERVALO linhas, mais o que o job ainda não cobriu
+        cauda = select(
+            func.coalesce(func.sum(Transacao.valor_com_sinal), 0.0), func.count()
+        ).where(Transacao.conta_id == conta_id, Transacao.data <= em)
+        if snapshot is not None:
+            cauda = cauda.where(
+                tuple_(Transacao.data, Transacao.id) > tuple_(snapshot.data, snapshot.ate_transacao_id)
+            )
+        soma, quantidade = (await session.execute(cauda)).one()
+
+        return {
+            "numero": numero,
+            "em": formatar_data(em),
+            "saldo": (snapshot.saldo if snapshot is not None else 0.0) + soma,
+            "snapshot": formatar_data(snapshot.data) if snapshot is not None else None,
+            "transacoes_apos_snapshot": quantidade,
+        }
+
+    @staticmethod
+    async def atualizar_snapshots(
+        session: AsyncSession,
+        intervalo: Optional[int] = None,
+        margem_s: Optional[float] = None,
+        contas_por_bloco: Optional[int] = None
+    ) -> int:
+        intervalo = intervalo or settings.SALDO_SNAPSHOT_INTERVALO
+        margem_s = settings.SALDO_SNAPSHOT_MARGEM_S if margem_s is None else margem_s
+        contas_por_bloco = contas_por_bloco or settings.SALDO_CONTAS_POR_BLOCO
+
+        # Transações muito recentes ficam de fora: um commit ainda em andamento
+        # pode gravar uma data anterior à de outro já confirmado
+        corte = datetime.utcnow() - timedelta(seconds=margem_s)
+        criados = 0
+        async for conta_ids in blocos_de_contas(session, contas_por_bloco):
+            criados += await ServiceSaldos._snapshots_do_bloco(session, conta_ids, intervalo, corte)
+            await session.commit()
+        snapshots_criados.incrementar(quantidade=criados)
+        return criados
+
+    @staticmethod
+    async def _snapshots_do_bloco(
+        session: AsyncSession,
+        conta_ids: list[int],
+        intervalo: int,
+        corte: datetime
+    ) -> int:
+        # Continua de onde o último snapshot de cada conta parou: lê só as
+        # transações posteriores a ele, na ordem (data, id) do índice
+        ultimos = _ultimos_snapshots(conta_ids)
+        stmt = (
+            select(Transacao.conta_id, Transacao.id, Transacao.data, Transacao.valor_com_sinal, ultimos.c.saldo)
+            .outerjoin(ultimos, ultimos.c.conta_id == Transacao.conta_id)
+            .where(
+                Transacao.conta_id.in_(conta_ids),
+                Transacao.data < corte,
+                or_(
+                    ultimos.c.conta_id.is_(None),
+                    tuple_(Transacao.data, Transacao.id) > tuple_(ultimos.c.data, ultimos.c.ate_transacao_id)
+                )
+            )
+            .order_by(Transacao.conta_id, Transacao.data, Transacao.id)
+        )
+
+        # Um snapshot a cada "intervalo" transações de cada conta
+        novos, conta_atual, saldo, pendentes = [], None, 0.0, 0
+        result = await session.stream(stmt.execution_options(yield_per=5000))
+        async for conta_id, transacao_id, data, valor, saldo_anterior in result:
+            if conta_id != conta_atual:
+                conta_atual, saldo, pendentes = conta_id, saldo_anterior or 0.0, 0
+            saldo += valor
+            pendentes += 1
+            if pendentes == intervalo:
+                novos.append({"conta_id": conta_id, "data": data, "ate_transacao_id": transacao_id, "saldo": saldo})
+                pendentes = 0
+
+        if novos:
+            await session.execute(insert(SaldoSnapshot), novos)
+        return len(novos)
+
+    @staticmethod
+    async def reconciliar(
+        session: AsyncSession,
+        contas_por_bloco: Optional[int] = None
+    ) -> dict:
+        contas_por_bloco = contas_por_bloco or settings.SALDO_CONTAS_POR_BLOCO
+        resultado = {"contas": 0, "snapshots": 0, "snapshots_removidos": 0, "saldos_divergentes": []}
+        async for conta_ids in blocos_de_contas(session, contas_por_bloco):
+            await ServiceSaldos._reconciliar_bloco(session, conta_ids, resultado)
+            await session.commit()
+        divergencias_saldo.incrementar("snapshot", quantidade=resultado["snapshots_removidos"])
+        divergencias_saldo.incrementar("conta", quantidade=len(resultado["saldos_divergentes"]))
+        return resultado
+
+    @staticmethod
+    async def _reconciliar_bloco(session: AsyncSession, conta_ids: list[int], resultado: dict) -> None:
+        # Saldo acumulado do histórico em cada transação, comparado com o
+        # snapshot que termina nela. Snapshot sem transação correspondente
+        # (histórico alterado) também diverge
+        acumulado = select(
+            Transacao.id,
+            func.sum(Transacao.valor_com_sinal).over(
+                partition_by=Transacao.conta_id, order_by=(Transacao.data, Transacao.id)
+            ).label("saldo")
+        ).where(Transacao.conta_id.in_(conta_ids)).subquery()
+        snapshots = await session.execute(
+            select(SaldoSnapshot.conta_id, SaldoSnapshot.data, SaldoSnapshot.ate_transacao_id,
+                   SaldoSnapshot.saldo, acumulado.c.saldo)
+            .outerjoin(acumulado, acumulado.c.id == SaldoSnapshot.ate_transacao_id)
+            .where(SaldoSnapshot.conta_id.in_(conta_ids))
+            .order_by(SaldoSnapshot.conta_id, SaldoSnapshot.data, SaldoSnapshot.ate_transacao_id)
+        )
+
+        # Da primeira divergência de cada conta em diante os snapshots são
+        # apagados; a próxima rodada do job os refaz a partir do histórico
+        primeira_divergencia = {}
+        for conta_id, data, transacao_id, saldo, saldo_historico in snapshots:
+            resultado["snapshots"] += 1
+            if conta_id in primeira_divergencia:
+                continue
+            if saldo_historico is None or abs(saldo - saldo_historico) > TOLERANCIA_SALDO:
+                primeira_divergencia[conta_id] = (data, transacao_id)
+        for conta_id, posicao in primeira_divergencia.items():
+            removidos = await session.execute(
+                delete(SaldoSnapshot).where(
+                    SaldoSnapshot.conta_id == conta_id,
+                    tuple_(SaldoSnapshot.data, SaldoSnapshot.ate_transacao_id) >= tuple_(*posicao)
+                )
+            )
+            resultado["snapshots_removidos"] += removidos.rowcount
+
+        # Saldo atual de cada conta contra a soma do histórico, em um único
+        # comando (a mesma leitura consistente vê os dois lados). Só reporta:
+        # corrigir dinheiro não é papel de um job automático
+        totais = select(
+            Transacao.conta_id, func.sum(Transacao.valor_com_sinal).label("saldo")
+        ).where(Transacao.conta_id.in_(conta_ids)).group_by(Transacao.conta_id).subquery()
+        contas = await session.execute(
+            select(Conta.numero, Conta.saldo, func.coalesce(totais.c.saldo, 0.0))
+            .outerjoin(totais, totais.c.conta_id == Conta.id)
+            .where(Conta.id.in_(conta_ids))
+        )
+        for numero, saldo, saldo_historico in contas:
+            resultado["contas"] += 1
+            if abs(saldo - saldo_historico) > TOLERANCIA_SALDO:
+                resultado["saldos_divergentes"].append(
+                    {"numero": numero, "saldo": saldo, "saldo_do_historico": saldo_historico}
+                )
+
+
+# Job em segundo plano: snapshots a cada SALDO_SNAPSHOT_PERIODO_S e
+# reconciliação a cada SALDO_RECONCILIACAO_PERIODO_S, em cada shard; com mais
+# de um shard, também termina as transferências entre shards pendentes
+_job: Optional[asyncio.Task] = None
+
+
+async def _rodada_do_shard(engine: AsyncEngine, reconciliar: bool) -> None:
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await ServiceSaldos.atualizar_snapshots(session)
+            if reconciliar:
+                resultado = await ServiceSaldos.reconciliar(session)
+                if resultado["saldos_divergentes"]:
+                    logger.warning("contas com saldo divergente do historico: %s", resultado["saldos_divergentes"])
+    except Exception:
+        # Uma rodada com erro não derruba o job (nem os outros shards); a próxima tenta de novo
+        logger.exception("falha no job de snapshots de saldo (%s)", engine.url.render_as_string())
+
+
+async def _recuperar_transferencias(engines: list[AsyncEngine]) -> None:
+    try:
+        async with SessaoComShards(
+            bind=engines[0], shards=engines, expire_on_commit=False, autoflush=False
+        ) as session:
+            resultado = await ServiceBancario.recuperar_transferencias(session)
+            if resultado["pendentes"]:
+                logger.warning("transferencias entre shards ainda pendentes: %s", resultado["pendentes"])
+    except Exception:
+        logger.exception("falha na recuperacao de transferencias entre shards")
+
+
+async def _executar_job(engines: list[AsyncEngine]) -> None:
+    ultima_reconciliacao = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.SALDO_SNAPSHOT_PERIODO_S)
+        periodo = settings.SALDO_RECONCILIACAO_PERIODO_S
+        reconciliar = periodo > 0 and time.monotonic() - ultima_reconciliacao >= periodo
+        await asyncio.gather(*(_rodada_do_shard(engine, reconciliar) for engine in engines))
+        if len(engines) > 1:
+            await _recuperar_transferencias(engines)
+        if reconciliar:
+            ultima_reconciliacao = time.monotonic()
+
+
+def iniciar_job_de_saldos(engines: list[AsyncEngine]) -> None:
+    global _job
+    if settings.SALDO_SNAPSHOT_PERIODO_S > 0 and _job is None:
+        _job = asyncio.get_running_loop().create_task(_executar_job(engines))
+
+
+async def encerrar_job_de_saldos() -> None:
+    global _job
+    if _job is not None:
+        _job.cancel()
+        try:
+            await _job
+        except asyncio.CancelledError:
+            pass
+        _job = None
@@ -0,0 +1,94 @@
+"""
+Benchmark: comandos SQL e latência por criação (clientes, contas, usuários)
+
+Cria N clientes, N contas e N usuários pela API e conta, por rota, os
+comandos SQL de cada requisição (o mesmo contador do header X-Consultas-SQL)
+e as latências. Depois repete cada criação com dados já existentes: as
+duplicatas devem responder 400, nunca 500.
+
+python -m benchmarks.bench_criacao --criacoes 500 --concorrencia 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from collections import defaultdict
+
+from app.core import consultas_sql
+from benchmarks.harness import Coletor, ambiente, commit_atual, semear
+
+
+# Criações por etapa, (rota, caminho, corpo): as contas usam os CPFs da
+# primeira etapa, então cada etapa só começa quando a anterior termina
+def _etapas(dados, quantidade: int) -> list[list[tuple[str, str, dict]]]:
+    cpfs = [f"9{i:010d}" for i in range(quantidade)]
+    return [
+        [
+            ("POST /banco/clientes/", "/banco/clientes/", {
+                "nome": f"Cliente {cpf}", "cpf": cpf, "endereco": "Rua Bench", "data_nascimento": "1990-01-01"
+            })
+            for cpf in cpfs
+        ],
+        [
+            ("POST /banco/contas/", "/banco/contas/", {"numero": dados.proximo_numero + i, "cpf": cpf})
+            for i, cpf in enumerate(cpfs)
+        ],
+        [
+            ("POST /auth/register", "/auth/register", {"username": f"bench-{i}", "password": "senha-bench"})
+            for i in range(quantidade)
+        ],
+    ]
+
+
+async def _disparar(client, etapas, concorrencia) -> dict:
+    coletor = Coletor()
+    for etapa in etapas:
+        fila = asyncio.Queue()
+        for criacao in etapa:
+            fila.put_nowait(criacao)
+
+        async def worker():
+            while not fila.empty():
+                rota, caminho, corpo = fila.get_nowait()
+                await coletor.medir(rota, client.post(caminho, json=corpo))
+
+        await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    coletor.encerrar()
+    return coletor.relatorio()
+
+
+async def main(criacoes: int, concorrencia: int) -> dict:
+    comandos = defaultdict(list)
+
+    def observar(contagem):
+        comandos[f"{contagem.metodo} {contagem.rota}"].append(contagem.consultas)
+
+    async with ambiente() as (client, fabrica):
+        dados = await semear(client, fabrica, clientes=10, contas_por_cliente=1, transacoes_por_conta=0)
+        etapas = _etapas(dados, criacoes)
+
+        # Só as criações bem-sucedidas entram na contagem (comando que falha
+        # na restrição única não chega ao after_cursor_execute)
+        consultas_sql.observadores.append(observar)
+        try:
+            novos = await _disparar(client, etapas, concorrencia)
+        finally:
+            consultas_sql.observadores.remove(observar)
+        duplicados = await _disparar(client, etapas, concorrencia)
+
+    return {
+        "commit": commit_atual(),
+        "criacoes_por_rota": criacoes,
+        "concorrencia": concorrencia,
+        "comandos_sql_por_criacao": {rota: round(statistics.fmean(n), 2) for rota, n in sorted(comandos.items())},
+        "novos": novos,
+        "duplicados": duplicados,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--criacoes", type=int, default=500, help="criações de cada tipo")
+    parser.add_argument("--concorrencia", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.criacoes, args.concorrencia)), indent=2))
@@ -0,0 +1,88 @@
+"""
+Benchmark: latência de outras rotas durante uma rajada de logins
+
+Mede a latência de GET /banco/contas/{numero} em três cenários:
+sem logins, durante uma rajada de logins com o Argon2 rodando no event loop
+(comportamento antigo) e durante a mesma rajada com o hashing no pool.
+
+python -m benchmarks.bench_login_storm --logins 200 --concorrencia 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from httpx import AsyncClient
+
+from app.autenticacao_bancaria.auth import verify_password
+from app.service import service_registro_login
+from benchmarks.harness import USUARIO_BENCH, ambiente, percentis, semear
+
+
+async def _sondar(client: AsyncClient, numero: int, parar: asyncio.Event, amostras: list[float]):
+    # Consulta uma conta repetidamente enquanto a rajada acontece
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        response = await client.get(f"/banco/contas/{numero}")
+        amostras.append(time.perf_counter() - inicio)
+        assert response.status_code == 200
+
+
+async def _rajada(client: AsyncClient, logins: int, concorrencia: int):
+    fila = asyncio.Queue()
+    for _ in range(logins):
+        fila.put_nowait(None)
+
+    async def trabalhador():
+        while not fila.empty():
+            fila.get_nowait()
+            response = await client.post("/auth/login", json=USUARIO_BENCH)
+            assert response.status_code == 200
+
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+
+
+async def _cenario(client: AsyncClient, numero: int, logins: int, concorrencia: int) -> dict:
+    parar, amostras = asyncio.Event(), []
+    sonda = asyncio.create_task(_sondar(client, numero, parar, amostras))
+    inicio = time.perf_counter()
+    if logins:
+        await _rajada(client, logins, concorrencia)
+    else:
+        await asyncio.sleep(1.0)
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    await sonda
+    resultado = {"consulta_conta": percentis(amostras)}
+    if logins:
+        resultado["logins_por_segundo"] = round(logins / duracao, 1)
+    return resultado
+
+
+async def main(logins: int, concorrencia: int) -> dict:
+    async with ambiente() as (client, fabrica):
+        dados = await semear(client, fabrica, clientes=1, contas_por_cliente=1)
+        numero = dados.numeros[0]
+
+        resultados = {"sem_logins": await _cenario(client, numero, 0, concorrencia)}
+
+        # Simula o comportamento antigo: Argon2 executado direto no event loop
+        original = service_registro_login.verify_password_async
+        async def verificar_no_loop(plain, hashed):
+            return verify_password(plain, hashed)
+        service_registro_login.verify_password_async = verificar_no_loop
+        try:
+            resultados["rajada_hash_no_loop"] = await _cenario(client, numero, logins, concorrencia)
+        finally:
+            service_registro_login.verify_password_async = original
+
+        resultados["rajada_hash_no_pool"] = await _cenario(client, numero, logins, concorrencia)
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.logins, args.concorrencia)), indent=2))
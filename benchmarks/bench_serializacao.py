@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: serialização das listagens e da consulta de conta
+
+Compara, sobre o mesmo banco semeado, o caminho antigo (objetos ORM com
+selectinload, validação from_attributes do Pydantic e json do FastAPI) com o
+caminho atual (projeção de colunas em dicts + orjson). Mede consulta e
+serialização juntas, que é o que a requisição paga.
+
+python -m benchmarks.bench_serializacao --clientes 200 --transacoes-por-conta 50
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.respostas import RespostaORJSON
+from app.models.models_conta import Conta
+from app.models.perfis import PerfilConta, opcoes_conta
+from app.schemas.schemas_da_conta import ContaOut
+from app.service import projecoes
+from app.service.service_get import ServiceGet
+from benchmarks.harness import ambiente, percentis, semear
+
+_LISTA_CONTAS = TypeAdapter(list[ContaOut])
+
+
+# Caminho antigo: ORM -> response_model (validação from_attributes) -> json.dumps
+def _resposta_antiga(objetos, adaptador) -> bytes:
+    validados = adaptador.validate_python(objetos, from_attributes=True)
+    return json.dumps(jsonable_encoder(adaptador.dump_python(validados))).encode()
+
+
+async def _listar_contas_antigo(session, limite):
+    result = await session.execute(ServiceGet._consulta_contas(None, limite, True))
+    return _resposta_antiga(result.scalars().all(), _LISTA_CONTAS)
+
+
+async def _listar_contas_novo(session, limite):
+    contas, _ = await projecoes.pagina_contas(session, None, limite, True)
+    return RespostaORJSON(contas).body
+
+
+async def _consultar_conta_antigo(session, numero):
+    result = await session.execute(
+        select(Conta).where(Conta.numero == numero).options(*opcoes_conta(PerfilConta.COM_HISTORICO))
+    )
+    return _resposta_antiga([result.scalars().first()], _LISTA_CONTAS)
+
+
+async def _consultar_conta_novo(session, numero):
+    return RespostaORJSON(await projecoes.conta_por_numero(session, numero)).body
+
+
+async def _medir(fabrica, funcao, argumento, repeticoes: int) -> dict:
+    amostras = []
+    for _ in range(repeticoes):
+        async with fabrica() as session:
+            inicio = time.perf_counter()
+            await funcao(session, argumento)
+            amostras.append(time.perf_counter() - inicio)
+    return percentis(amostras)
+
+
+async def main(args) -> dict:
+    async with ambiente() as (client, fabrica):
+        dados = await semear(
+            client, fabrica,
+            clientes=args.clientes,
+            contas_por_cliente=args.contas_por_cliente,
+            transacoes_por_conta=args.transacoes_por_conta,
+        )
+
+        # Os dois caminhos precisam produzir o mesmo JSON
+        async with fabrica() as session:
+            antigo = json.loads(await _listar_contas_antigo(session, args.limite))
+            novo = json.loads(await _listar_contas_novo(session, args.limite))
+            assert antigo == novo, "projeção diverge do schema ContaOut"
+
+        numero = dados.numeros[0]
+        cenarios = {
+            f"GET /get/contas?limit={args.limite}&incluir_historico=true": (
+                _listar_contas_antigo, _listar_contas_novo, args.limite),
+            "GET /banco/contas/{numero}": (_consultar_conta_antigo, _consultar_conta_novo, numero),
+        }
+        resultado = {}
+        for nome, (antigo, novo, argumento) in cenarios.items():
+            medida_antiga = await _medir(fabrica, antigo, argumento, args.repeticoes)
+            medida_nova = await _medir(fabrica, novo, argumento, args.repeticoes)
+            resultado[nome] = {
+                "orm_pydantic": medida_antiga,
+                "projecao_orjson": medida_nova,
+                "aceleracao_p50": round(medida_antiga["p50_ms"] / medida_nova["p50_ms"], 2),
+            }
+        return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--contas-por-cliente", type=int, default=2)
+    parser.add_argument("--transacoes-por-conta", type=int, default=50)
+    parser.add_argument("--limite", type=int, default=200, help="tamanho da página listada")
+    parser.add_argument("--repeticoes", type=int, default=30)
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2, ensure_ascii=False))
@@ -0,0 +1,122 @@
+"""
+Benchmark: vazão de escrita com as contas divididas em 1, 2 e 4 shards
+
+Cada rodada sobe a aplicação com N bancos SQLite em arquivo (um por shard,
+como DATABASE_SHARDS), cria as contas pela API (cada uma vai para o shard
+"numero % N") e dispara depósitos concorrentes em contas aleatórias. Cada
+arquivo tem o próprio lock de escrita e o próprio fsync, então a vazão cresce
+com o número de shards enquanto o commit for o gargalo. Por isso o padrão é
+synchronous=FULL (fsync a cada commit): com NORMAL em WAL o commit quase não
+custa e o que se mede é a CPU do processo, igual com qualquer número de shards.
+
+python -m benchmarks.bench_shards --shards 1,2,4 --depositos 4000 --concorrencia 16
+python -m benchmarks.bench_shards --synchronous NORMAL
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+from contextlib import asynccontextmanager
+
+from httpx import AsyncClient, ASGITransport
+
+from app.main import app
+from app.core.config import settings
+from app.database.session import Base, SessaoComShards, criar_engine, get_session
+from benchmarks.harness import USUARIO_BENCH, Coletor, commit_atual
+
+
+# Sobe a aplicação sobre "shards" bancos temporários e devolve o client
+@asynccontextmanager
+async def ambiente_com_shards(shards: int):
+    pasta = tempfile.mkdtemp()
+    engines = [
+        criar_engine(f"sqlite+aiosqlite:///{os.path.join(pasta, f'shard{indice}.db')}", nome=f"bench{indice}")
+        for indice in range(shards)
+    ]
+    for engine in engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def sessao_bench():
+        async with SessaoComShards(bind=engines[0], shards=engines, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = sessao_bench
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            yield client
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        for engine in engines:
+            await engine.dispose()
+
+
+# Usuário, um cliente e "contas" contas criadas pela API; devolve (headers, números)
+async def _semear(client, contas: int) -> tuple[dict, list[int]]:
+    await client.post("/auth/register", json=USUARIO_BENCH)
+    login = await client.post("/auth/login", json=USUARIO_BENCH)
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "Cliente Bench", "cpf": "00000000001", "endereco": "Rua Bench", "data_nascimento": "1990-01-01"
+    })
+    numeros = list(range(100000, 100000 + contas))
+    for numero in numeros:
+        await client.post("/banco/contas/", json={"numero": numero, "cpf": "00000000001"})
+    return headers, numeros
+
+
+async def _rodada(shards: int, contas: int, depositos: int, concorrencia: int) -> dict:
+    async with ambiente_com_shards(shards) as client:
+        headers, numeros = await _semear(client, contas)
+        coletor = Coletor()
+        restantes = depositos
+
+        async def worker():
+            nonlocal restantes
+            while restantes > 0:
+                restantes -= 1
+                await coletor.medir("POST /banco/transacoes/", client.post("/banco/transacoes/", json={
+                    "numero_conta": random.choice(numeros), "tipo_de_transacao": "deposito", "valor": 10.0
+                }, headers=headers))
+
+        await asyncio.gather(*(worker() for _ in range(concorrencia)))
+        coletor.encerrar()
+        return coletor.relatorio()
+
+
+async def main(shards: list[int], contas: int, depositos: int, concorrencia: int, synchronous: str) -> dict:
+    # Vale para as conexões abertas a partir daqui (PRAGMA aplicado no connect)
+    settings.SQLITE_SYNCHRONOUS = synchronous
+    rodadas = {}
+    for quantidade in shards:
+        rodadas[str(quantidade)] = await _rodada(quantidade, contas, depositos, concorrencia)
+    base = rodadas[str(shards[0])]["req_por_s"]
+    return {
+        "commit": commit_atual(),
+        "contas": contas,
+        "depositos": depositos,
+        "concorrencia": concorrencia,
+        "synchronous": synchronous,
+        "cpus": os.cpu_count(),
+        "req_por_s": {n: r["req_por_s"] for n, r in rodadas.items()},
+        "ganho": {n: round(r["req_por_s"] / base, 2) if base else None for n, r in rodadas.items()},
+        "rodadas": rodadas,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default="1,2,4", help="quantidades de shards, separadas por vírgula")
+    parser.add_argument("--contas", type=int, default=200)
+    parser.add_argument("--depositos", type=int, default=4000)
+    parser.add_argument("--concorrencia", type=int, default=16)
+    parser.add_argument("--synchronous", default="FULL", choices=["OFF", "NORMAL", "FULL"])
+    args = parser.parse_args()
+    quantidades = [int(n) for n in args.shards.split(",")]
+    print(json.dumps(asyncio.run(
+        main(quantidades, args.contas, args.depositos, args.concorrencia, args.synchronous)
+    ), indent=2))
@@ -0,0 +1,98 @@
+"""
+Benchmark: transferências concorrentes sobre poucas contas (alta disputa)
+
+Dispara transferências em sentidos aleatórios entre um pequeno conjunto de
+contas "quentes" (A->B e B->A ao mesmo tempo) e compara com o jeito antigo,
+um saque e um depósito em duas requisições e dois commits. Ao final confere
+que o total de dinheiro nas contas não mudou e que nenhuma requisição falhou
+com erro do servidor (deadlock, "database is locked").
+
+python -m benchmarks.bench_transferencias --contas-quentes 4 --transferencias 1000 --concorrencia 20
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from sqlalchemy import func, select
+
+from app.models.models_conta import Conta
+from benchmarks.harness import Coletor, ambiente, commit_atual, semear
+
+
+# Transferência atômica: um POST, um commit
+def _transferencia(client, dados, origem, destino, valor):
+    return client.post("/banco/transferencias/", json={
+        "conta_origem": origem, "conta_destino": destino, "valor": valor
+    }, headers=dados.headers)
+
+
+# Jeito antigo: saque na origem e, se deu certo, depósito no destino
+async def _saque_e_deposito(client, dados, origem, destino, valor):
+    saque = await client.post("/banco/transacoes/", json={
+        "numero_conta": origem, "tipo_de_transacao": "saque", "valor": valor
+    }, headers=dados.headers)
+    if saque.status_code != 200:
+        return saque
+    return await client.post("/banco/transacoes/", json={
+        "numero_conta": destino, "tipo_de_transacao": "deposito", "valor": valor
+    }, headers=dados.headers)
+
+
+async def _total(fabrica, numeros) -> float:
+    async with fabrica() as session:
+        return (await session.execute(select(func.sum(Conta.saldo)).where(Conta.numero.in_(numeros)))).scalar()
+
+
+async def _carga(client, dados, operacao, rota, quentes, quantidade, concorrencia) -> dict:
+    pares = [random.sample(quentes, 2) for _ in range(quantidade)]
+    fila = asyncio.Queue()
+    for par in pares:
+        fila.put_nowait(par)
+    coletor = Coletor()
+
+    async def worker():
+        while not fila.empty():
+            origem, destino = fila.get_nowait()
+            await coletor.medir(rota, operacao(client, dados, origem, destino, 1.0))
+
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    coletor.encerrar()
+    return coletor.relatorio()["rotas"][rota]
+
+
+async def main(args) -> dict:
+    random.seed(args.semente)
+    async with ambiente(args.url) as (client, fabrica):
+        dados = await semear(client, fabrica, clientes=args.contas_quentes, contas_por_cliente=1,
+                             transacoes_por_conta=args.transacoes_por_conta)
+        quentes = dados.numeros
+        total_inicial = await _total(fabrica, quentes)
+
+        resultado = {
+            "transferencia_atomica": await _carga(
+                client, dados, _transferencia, "POST /banco/transferencias/",
+                quentes, args.transferencias, args.concorrencia),
+            "saque_e_deposito": await _carga(
+                client, dados, _saque_e_deposito, "saque + deposito (2 commits)",
+                quentes, args.transferencias, args.concorrencia),
+        }
+        resultado["total_preservado"] = await _total(fabrica, quentes) == total_inicial
+    resultado["parametros"] = {
+        "commit": commit_atual(),
+        "contas_quentes": args.contas_quentes,
+        "transferencias": args.transferencias,
+        "concorrencia": args.concorrencia,
+    }
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="DATABASE_URL do banco de benchmark (padrão: SQLite temporário)")
+    parser.add_argument("--contas-quentes", type=int, default=4)
+    parser.add_argument("--transacoes-por-conta", type=int, default=100, help="define o saldo inicial (100 cada)")
+    parser.add_argument("--transferencias", type=int, default=1000)
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--semente", type=int, default=42)
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2, ensure_ascii=False))
@@ -0,0 +1,312 @@
+"""
+Infraestrutura comum dos benchmarks
+
+Sobe a aplicação em processo com httpx + ASGITransport (o mesmo esquema de
+tests2/conftest.py), apontando para um banco SQLite temporário em arquivo,
+semeia um conjunto de dados configurável e coleta latências por rota.
+"""
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.core.metricas import instrumentar_engine
+from app.database.session import Base, get_session, opcoes_engine, configurar_sqlite
+from app.models.models_cliente import Cliente
+from app.models.models_conta import Conta
+from app.models.models_transacao import Transacao
+
+USUARIO_BENCH = {"username": "bench", "password": "senha-bench"}
+
+
+# Percentis por "nearest rank" (em ms) de uma lista de durações em segundos
+def percentis(amostras: list[float]) -> dict:
+    if not amostras:
+        return {"n": 0}
+    ordenadas = sorted(amostras)
+
+    def p(q: float) -> float:
+        return round(ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000, 3)
+
+    return {
+        "n": len(ordenadas),
+        "p50_ms": p(0.50),
+        "p95_ms": p(0.95),
+        "p99_ms": p(0.99),
+        "media_ms": round(statistics.fmean(ordenadas) * 1000, 3),
+        "max_ms": round(ordenadas[-1] * 1000, 3),
+    }
+
+
+# Latências e status HTTP agrupados por rota
+@dataclass
+class Coletor:
+    latencias: dict = field(default_factory=lambda: defaultdict(list))
+    status: dict = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    inicio: float = field(default_factory=time.perf_counter)
+    fim: float | None = None
+
+    async def medir(self, rota: str, requisicao):
+        inicio = time.perf_counter()
+        response = await requisicao
+        self.latencias[rota].append(time.perf_counter() - inicio)
+        self.status[rota][response.status_code] += 1
+        return response
+
+    def encerrar(self) -> None:
+        self.fim = time.perf_counter()
+
+    def relatorio(self) -> dict:
+        duracao = (self.fim or time.perf_counter()) - self.inicio
+        rotas = {}
+        for rota, amostras in sorted(self.latencias.items()):
+            rotas[rota] = {
+                **percentis(amostras),
+                "req_por_s": round(len(amostras) / duracao, 1) if duracao else 0.0,
+                "status": dict(self.status[rota]),
+            }
+        total = sum(len(a) for a in self.latencias.values())
+        return {
+            "duracao_s": round(duracao, 3),
+            "requisicoes": total,
+            "req_por_s": round(total / duracao, 1) if duracao else 0.0,
+            "rotas": rotas,
+        }
+
+
+# Conjunto de dados semeado: o que os cenários podem consultar e movimentar
+@dataclass
+class Dados:
+    token: str
+    cpfs: list[str]
+    numeros: list[int]
+    cliente_ids: list[int]
+    proximo_cpf: int
+    proximo_numero: int
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+# Sobe a aplicação sobre um banco temporário e devolve (client, fabrica_de_sessoes)
+@asynccontextmanager
+async def ambiente(url: str | None = None):
+    if url is None:
+        url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_async_engine(url, **opcoes_engine(url))
+    configurar_sqlite(engine)
+    instrumentar_engine(engine, nome="bench")
+    fabrica = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def sessao_bench():
+        async with fabrica() as session:
+            yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    app.dependency_overrides[get_session] = sessao_bench
+    try:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            yield client, fabrica
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        await engine.dispose()
+
+
+# Semeia clientes, contas e histórico direto no banco (inserts em lote) e
+# registra o usuário do benchmark pela API, para obter um token real
+async def semear(
+    client: AsyncClient,
+    fabrica,
+    clientes: int = 100,
+    contas_por_cliente: int = 2,
+    transacoes_por_conta: int = 10,
+) -> Dados:
+    await client.post("/auth/register", json=USUARIO_BENCH)
+    login = await client.post("/auth/login", json=USUARIO_BENCH)
+    token = login.json()["access_token"]
+
+    cpfs = [f"{i:011d}" for i in range(1, clientes + 1)]
+    async with fabrica() as session:
+        await session.execute(insert(Cliente), [
+            {"nome": f"Cliente {cpf}", "cpf": cpf, "endereco": "Rua Bench", "data_nascimento": "1990-01-01"}
+            for cpf in cpfs
+        ])
+        cliente_ids = list((await session.execute(select(Cliente.id).order_by(Cliente.id))).scalars())
+
+        numeros, contas = [], []
+        for cliente_id in cliente_ids:
+            for _ in range(contas_por_cliente):
+                numero = 100000 + len(numeros)
+                numeros.append(numero)
+                contas.append({"numero": numero, "cliente_id": cliente_id, "saldo": 0.0, "agencia": "0001"})
+        if contas:
+            await session.execute(insert(Conta), contas)
+
+        # Histórico: depósitos antigos, com o saldo das contas coerente com ele
+        if transacoes_por_conta and contas:
+            conta_ids = (await session.execute(select(Conta.id).order_by(Conta.id))).scalars().all()
+            inicio = datetime.utcnow() - timedelta(days=transacoes_por_conta)
+            lote = []
+            for conta_id in conta_ids:
+                for i in range(transacoes_por_conta):
+                    lote.append({
+                        "tipo_de_transacao": "deposito", "valor": 100.0,
+                        "conta_id": conta_id, "data": inicio + timedelta(days=i),
+                    })
+                    if len(lote) >= 5000:
+                        await session.execute(insert(Transacao), lote)
+                        lote = []
+            if lote:
+                await session.execute(insert(Transacao), lote)
+            await session.execute(
+                Conta.__table__.update().values(saldo=100.0 * transacoes_por_conta)
+            )
+        await session.commit()
+
+    return Dados(
+        token=token,
+        cpfs=cpfs,
+        numeros=numeros,
+        cliente_ids=cliente_ids,
+        proximo_cpf=clientes + 1,
+        proximo_numero=100000 + len(numeros),
+    )
+
+
+# Operações disponíveis nos cenários: nome -> (rota, função que dispara a requisição)
+def _login(client, dados):
+    return client.post("/auth/login", json=USUARIO_BENCH)
+
+def _criar_cliente(client, dados):
+    cpf = f"{dados.proximo_cpf:011d}"
+    dados.proximo_cpf += 1
+    dados.cpfs.append(cpf)
+    return client.post("/banco/clientes/", json={
+        "nome": f"Cliente {cpf}", "cpf": cpf, "endereco": "Rua Bench", "data_nascimento": "1990-01-01"
+    })
+
+def _criar_conta(client, dados):
+    numero = dados.proximo_numero
+    dados.proximo_numero += 1
+    dados.numeros.append(numero)
+    return client.post("/banco/contas/", json={"numero": numero, "cpf": random.choice(dados.cpfs)})
+
+def _movimento(tipo):
+    def operacao(client, dados):
+        return client.post("/banco/transacoes/", json={
+            "numero_conta": random.choice(dados.numeros),
+            "tipo_de_transacao": tipo,
+            "valor": 10.0,
+        }, headers=dados.headers)
+    return operacao
+
+def _transferencia(client, dados):
+    origem, destino = random.sample(dados.numeros, 2)
+    return client.post("/banco/transferencias/", json={
+        "conta_origem": origem, "conta_destino": destino, "valor": 10.0
+    }, headers=dados.headers)
+
+def _consultar_conta(client, dados):
+    return client.get(f"/banco/contas/{random.choice(dados.numeros)}")
+
+def _listar_clientes(client, dados):
+    return client.get("/get/clientes", params={"limit": 100})
+
+def _listar_contas(client, dados):
+    return client.get("/get/contas", params={"limit": 100})
+
+OPERACOES = {
+    "login": ("POST /auth/login", _login),
+    "criar_cliente": ("POST /banco/clientes/", _criar_cliente),
+    "criar_conta": ("POST /banco/contas/", _criar_conta),
+    "deposito": ("POST /banco/transacoes/ (deposito)", _movimento("deposito")),
+    "saque": ("POST /banco/transacoes/ (saque)", _movimento("saque")),
+    "transferencia": ("POST /banco/transferencias/", _transferencia),
+    "consultar_conta": ("GET /banco/contas/{numero}", _consultar_conta),
+    "listar_clientes": ("GET /get/clientes", _listar_clientes),
+    "listar_contas": ("GET /get/contas", _listar_contas),
+}
+
+# Mistura padrão: leituras predominam, como no tráfego do front end
+MIX_PADRAO = {
+    "login": 2,
+    "criar_cliente": 1,
+    "criar_conta": 1,
+    "deposito": 10,
+    "saque": 5,
+    "consultar_conta": 20,
+    "listar_clientes": 2,
+    "listar_contas": 2,
+}
+
+
+# Dispara "requisicoes" operações sorteadas pela mistura, com "concorrencia" workers
+async def executar_carga(
+    client: AsyncClient,
+    dados: Dados,
+    mix: dict = MIX_PADRAO,
+    requisicoes: int = 1000,
+    concorrencia: int = 10,
+    semente: int = 42,
+) -> dict:
+    random.seed(semente)
+    nomes = [nome for nome, peso in mix.items() if peso > 0]
+    sorteio = random.choices(nomes, weights=[mix[n] for n in nomes], k=requisicoes)
+    fila = asyncio.Queue()
+    for nome in sorteio:
+        fila.put_nowait(nome)
+
+    coletor = Coletor()
+
+    async def worker():
+        while not fila.empty():
+            rota, operacao = OPERACOES[fila.get_nowait()]
+            await coletor.medir(rota, operacao(client, dados))
+
+    await asyncio.gather(*(worker() for _ in range(concorrencia)))
+    coletor.encerrar()
+    return coletor.relatorio()
+
+
+# Identifica o commit medido, para comparar resultados entre versões
+def commit_atual() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Compara dois relatórios: variação percentual de p95 e req/s por rota
+def comparar(base: dict, atual: dict) -> dict:
+    diferencas = {}
+    for rota, medida in atual.get("rotas", {}).items():
+        anterior = base.get("rotas", {}).get(rota)
+        if not anterior or not anterior.get("n"):
+            continue
+
+        def variacao(chave):
+            if not anterior.get(chave):
+                return None
+            return round((medida[chave] - anterior[chave]) / anterior[chave] * 100, 1)
+
+        diferencas[rota] = {"p95_%": variacao("p95_ms"), "req_por_s_%": variacao("req_por_s")}
+    return diferencas
@@ -0,0 +1,80 @@
+"""
+Benchmark de carga de ponta a ponta: todas as rotas, com mistura configurável
+
+Semeia o banco, dispara a carga concorrente e imprime (ou grava) um JSON com
+p50/p95/p99 e req/s por rota. Com --comparar, mostra a variação em relação a
+um resultado anterior (ex.: gerado no commit base).
+
+python -m benchmarks.run --clientes 500 --requisicoes 5000 --concorrencia 50 --saida atual.json
+python -m benchmarks.run --comparar base.json
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks.harness import MIX_PADRAO, OPERACOES, ambiente, commit_atual, comparar, executar_carga, semear
+
+
+def _ler_mix(texto: str | None) -> dict:
+    # Formato: "deposito=10,consultar_conta=20" (operações omitidas ficam com peso 0)
+    if not texto:
+        return dict(MIX_PADRAO)
+    mix = {}
+    for parte in texto.split(","):
+        nome, peso = parte.split("=")
+        if nome not in OPERACOES:
+            raise SystemExit(f"operação desconhecida: {nome} (disponíveis: {', '.join(OPERACOES)})")
+        mix[nome] = int(peso)
+    return mix
+
+
+async def main(args) -> dict:
+    async with ambiente(args.url) as (client, fabrica):
+        dados = await semear(
+            client, fabrica,
+            clientes=args.clientes,
+            contas_por_cliente=args.contas_por_cliente,
+            transacoes_por_conta=args.transacoes_por_conta,
+        )
+        resultado = await executar_carga(
+            client, dados,
+            mix=_ler_mix(args.mix),
+            requisicoes=args.requisicoes,
+            concorrencia=args.concorrencia,
+        )
+    resultado["parametros"] = {
+        "commit": commit_atual(),
+        "clientes": args.clientes,
+        "contas_por_cliente": args.contas_por_cliente,
+        "transacoes_por_conta": args.transacoes_por_conta,
+        "requisicoes": args.requisicoes,
+        "concorrencia": args.concorrencia,
+        "mix": _ler_mix(args.mix),
+    }
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="DATABASE_URL do banco de benchmark (padrão: SQLite temporário)")
+    parser.add_argument("--clientes", type=int, default=200)
+    parser.add_argument("--contas-por-cliente", type=int, default=2)
+    parser.add_argument("--transacoes-por-conta", type=int, default=20)
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=20)
+    parser.add_argument("--mix", help="pesos por operação, ex.: deposito=10,consultar_conta=20")
+    parser.add_argument("--saida", help="grava o JSON neste arquivo")
+    parser.add_argument("--comparar", help="JSON de um resultado anterior para comparação")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(main(args))
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            resultado["comparacao"] = comparar(json.load(arquivo), resultado)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w") as arquivo:
+            arquivo.write(texto)
+    sys.stdout.write(texto + "\n")
@@ -6,6 +6,10 @@ from app.models.models_auth import User
 from app.models.models_cliente import Cliente
 from app.models.models_conta import Conta
 from app.models.models_transacao import Transacao
+from app.models.models_saldo import SaldoSnapshot
+from app.models.models_resumo import ResumoDiario
+from app.models.models_sequencia import Sequencia
+from app.models.models_transferencia import TransferenciaPendente, TransferenciaRecebida
 
 
 config = context.config
@@ -27,22 +31,26 @@ def run_migrations_offline():
 def run_migrations_online():
     connectable = create_async_engine(config.get_main_option("sqlalchemy.url"))
 
-    async def do_run_migrations():
+    def do_run_migrations(sync_conn):
+        context.configure(
+            connection=sync_conn,
+            target_metadata=target_metadata,
+            compare_type=True,
+            compare_server_default=True,
+            # SQLite não altera colunas/constraints in-place: usa o modo batch
+            render_as_batch=sync_conn.dialect.name == "sqlite"
+        )
+        # Cada upgrade roda dentro de uma transação (DDL transacional no PostgreSQL)
+        with context.begin_transaction():
+            context.run_migrations()
+
+    async def run_async_migrations():
         async with connectable.connect() as connection:
-            await connection.run_sync(
-                lambda sync_conn: context.configure(
-                    connection=sync_conn,
-                    target_metadata=target_metadata,
-                    compare_type=True,
-                    compare_server_default=True
-                )
-            )
-            #async with connection.begin():
-            await connection.run_sync(lambda sync_conn: context.run_migrations())
-                #await connection.run_sync(context.run_migrations)
+            await connection.run_sync(do_run_migrations)
+        await connectable.dispose()
 
     import asyncio
-    asyncio.run(do_run_migrations())
+    asyncio.run(run_async_migrations())
 
 '''
 def run_migrations_online():
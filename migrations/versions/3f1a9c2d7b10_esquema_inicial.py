@@ -0,0 +1,83 @@
+"""esquema inicial
+
+Revision ID: 3f1a9c2d7b10
+Revises: cb3c2f2f0edd
+Create Date: 2026-10-18 11:40:02.114233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2d7b10'
+down_revision: Union[str, Sequence[str], None] = 'cb3c2f2f0edd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Bancos criados antes pelo Base.metadata.create_all já têm estas tabelas:
+    # if_not_exists permite aplicar a migration sobre eles sem erro
+    op.create_table('clientes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('cpf', sa.String(), nullable=False),
+    sa.Column('endereco', sa.String(), nullable=False),
+    sa.Column('data_nascimento', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cpf'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_clientes_id'), 'clientes', ['id'], unique=False, if_not_exists=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True, if_not_exists=True)
+
+    op.create_table('contas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('numero', sa.Integer(), nullable=False),
+    sa.Column('saldo', sa.Float(), nullable=False),
+    sa.Column('agencia', sa.String(), nullable=False),
+    sa.Column('cliente_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['cliente_id'], ['clientes.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('numero'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_contas_id'), 'contas', ['id'], unique=False, if_not_exists=True)
+
+    op.create_table('transacoes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo_de_transacao', sa.String(), nullable=False),
+    sa.Column('valor', sa.Float(), nullable=False),
+    sa.Column('data', sa.DateTime(), nullable=False),
+    sa.Column('conta_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['conta_id'], ['contas.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_transacoes_id'), 'transacoes', ['id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_transacoes_id'), table_name='transacoes')
+    op.drop_table('transacoes')
+    op.drop_index(op.f('ix_contas_id'), table_name='contas')
+    op.drop_table('contas')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_clientes_id'), table_name='clientes')
+    op.drop_table('clientes')
@@ -0,0 +1,33 @@
+"""indice transacoes (conta_id, data, id)
+
+Revision ID: 5b7e2a9c4d31
+Revises: 8d4e6b1f0a25
+Create Date: 2026-10-18 15:06:12.318440
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2a9c4d31'
+down_revision: Union[str, Sequence[str], None] = '8d4e6b1f0a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Paginação do histórico por (data, id): com o id no índice, o cursor
+    # "(data, id) < (:data, :id)" de uma conta é resolvido só pelo índice.
+    # Substitui o índice (conta_id, data), que vira prefixo redundante.
+    op.create_index('ix_transacoes_conta_id_data_id', 'transacoes', ['conta_id', 'data', 'id'], unique=False, if_not_exists=True)
+    op.drop_index('ix_transacoes_conta_id_data', table_name='transacoes', if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_transacoes_conta_id_data', 'transacoes', ['conta_id', 'data'], unique=False, if_not_exists=True)
+    op.drop_index('ix_transacoes_conta_id_data_id', table_name='transacoes', if_exists=True)
@@ -0,0 +1,30 @@
+"""indices de desempenho
+
+Revision ID: 8d4e6b1f0a25
+Revises: 3f1a9c2d7b10
+Create Date: 2026-10-18 11:42:37.501978
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e6b1f0a25'
+down_revision: Union[str, Sequence[str], None] = '3f1a9c2d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Histórico de uma conta (conta_id na frente) já em ordem de data:
+    # evita varrer a tabela inteira de transações e ordenar o resultado
+    op.create_index('ix_transacoes_conta_id_data', 'transacoes', ['conta_id', 'data'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transacoes_conta_id_data', table_name='transacoes')
@@ -0,0 +1,35 @@
+"""sequencias
+
+Revision ID: a9f3d61c2e84
+Revises: e7d19b52a6c8
+Create Date: 2026-10-18 20:05:37.218460
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f3d61c2e84'
+down_revision: Union[str, Sequence[str], None] = 'e7d19b52a6c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Próximo valor livre de cada sequência. A linha "contas" é criada na
+    # primeira reserva, a partir do maior número de conta já existente
+    op.create_table('sequencias',
+    sa.Column('nome', sa.String(length=50), nullable=False),
+    sa.Column('proximo', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('nome'),
+    if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sequencias')
@@ -0,0 +1,41 @@
+"""saldos snapshot
+
+Revision ID: c4a81e3f9d27
+Revises: 5b7e2a9c4d31
+Create Date: 2026-10-18 17:20:44.081236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a81e3f9d27'
+down_revision: Union[str, Sequence[str], None] = '5b7e2a9c4d31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Checkpoints de saldo por conta, preenchidos pelo job de snapshots a
+    # partir do histórico já existente (a tabela nasce vazia)
+    op.create_table('saldos_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('conta_id', sa.Integer(), nullable=False),
+    sa.Column('data', sa.DateTime(), nullable=False),
+    sa.Column('ate_transacao_id', sa.Integer(), nullable=False),
+    sa.Column('saldo', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['conta_id'], ['contas.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_saldos_snapshot_conta_id_data_transacao', 'saldos_snapshot', ['conta_id', 'data', 'ate_transacao_id'], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_saldos_snapshot_conta_id_data_transacao', table_name='saldos_snapshot')
+    op.drop_table('saldos_snapshot')
@@ -0,0 +1,44 @@
+"""resumos diarios
+
+Revision ID: e7d19b52a6c8
+Revises: c4a81e3f9d27
+Create Date: 2026-10-18 18:34:09.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7d19b52a6c8'
+down_revision: Union[str, Sequence[str], None] = 'c4a81e3f9d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Totais diários por conta e tipo. A tabela nasce vazia: o histórico já
+    # existente entra com "python -m app.service.service_relatorios backfill"
+    op.create_table('resumos_diarios',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('conta_id', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('tipo_de_transacao', sa.String(), nullable=False),
+    sa.Column('quantidade', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['conta_id'], ['contas.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_index('ix_resumos_diarios_conta_id_dia_tipo', 'resumos_diarios', ['conta_id', 'dia', 'tipo_de_transacao'], unique=True, if_not_exists=True)
+    op.create_index('ix_resumos_diarios_dia_conta_id', 'resumos_diarios', ['dia', 'conta_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_resumos_diarios_dia_conta_id', table_name='resumos_diarios')
+    op.drop_index('ix_resumos_diarios_conta_id_dia_tipo', table_name='resumos_diarios')
+    op.drop_table('resumos_diarios')
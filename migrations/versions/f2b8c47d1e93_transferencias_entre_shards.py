@@ -0,0 +1,46 @@
+"""transferencias entre shards
+
+Revision ID: f2b8c47d1e93
+Revises: a9f3d61c2e84
+Create Date: 2026-10-18 22:41:03.604127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8c47d1e93'
+down_revision: Union[str, Sequence[str], None] = 'a9f3d61c2e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Transferência entre shards: a pendente fica no shard da origem (gravada
+    # com o débito) e a decisão, única por pendente, no shard do destino
+    op.create_table('transferencias_pendentes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('conta_origem', sa.Integer(), nullable=False),
+    sa.Column('conta_destino', sa.Integer(), nullable=False),
+    sa.Column('valor', sa.Float(), nullable=False),
+    sa.Column('data', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    if_not_exists=True
+    )
+    op.create_table('transferencias_recebidas',
+    sa.Column('shard_origem', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('transferencia_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('situacao', sa.String(length=20), nullable=False),
+    sa.PrimaryKeyConstraint('shard_origem', 'transferencia_id'),
+    if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('transferencias_recebidas')
+    op.drop_table('transferencias_pendentes')
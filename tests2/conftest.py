@@ -3,6 +3,7 @@ Configuração dos testes na pasta tests2
 """
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from app.main import app
@@ -10,6 +11,10 @@ from app.main import app
 
 from app.main import app
 from app.database.session import Base, get_session
+from app.service.service_bancario import cache_contas, numeros_contas, travas_contas
+from app.service.escritor_agrupado import encerrar_escritores
+from app.core.metricas import instrumentar_engine
+from app.core import consultas_sql
 
 # Banco de teste em memória (não afeta o banco principal)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -18,6 +23,7 @@ engine_test = create_async_engine(
     TEST_DATABASE_URL,
     echo=False,
 )
+instrumentar_engine(engine_test, nome="teste")
 
 SessionLocalTest = sessionmaker(
     bind=engine_test,
@@ -41,6 +47,17 @@ async def setup_db():
     async with engine_test.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
+# Cada teste começa com o cache de contas vazio e sem bloco de números
+# reservado (o banco também é recriado). Travas e escritores do group commit
+# ficam presos ao event loop do teste: são recriados/encerrados a cada teste
+@pytest_asyncio.fixture(scope="function", autouse=True)
+async def limpar_caches():
+    await cache_contas.limpar()
+    numeros_contas.descartar()
+    travas_contas.limpar()
+    yield
+    await encerrar_escritores()
+
 # Override das dependências do FastAPI
 @pytest_asyncio.fixture(scope="function", autouse=True)
 async def override_dependencies():
@@ -52,3 +69,59 @@ async def client(setup_db, override_dependencies):
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
         yield ac
+
+
+# Marcador de orçamento de SQL por rota:
+#   @pytest.mark.orcamento_sql("GET /get/clientes", consultas=2)
+# Falha o teste se alguma requisição à rota (template, como em /metrics) executar
+# mais comandos que o declarado, ou repetir o mesmo comando mais de "repeticoes"
+# vezes (N+1). Pode ser usado várias vezes no mesmo teste, uma por rota.
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "orcamento_sql(rota, consultas, repeticoes=1): limite de comandos SQL por requisição à rota"
+    )
+
+
+# Contagens de SQL das requisições feitas durante o teste
+@pytest.fixture
+def contagens_sql():
+    contagens = []
+    consultas_sql.observadores.append(contagens.append)
+    yield contagens
+    consultas_sql.observadores.remove(contagens.append)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marcadores = list(item.iter_markers("orcamento_sql"))
+    if not marcadores:
+        yield
+        return
+
+    contagens = []
+    consultas_sql.observadores.append(contagens.append)
+    try:
+        resultado = yield
+    finally:
+        consultas_sql.observadores.remove(contagens.append)
+    if resultado.excinfo is not None:
+        return
+
+    for marcador in marcadores:
+        rota = marcador.args[0]
+        limite = marcador.kwargs["consultas"]
+        repeticoes = marcador.kwargs.get("repeticoes", 1)
+        medidas = [c for c in contagens if f"{c.metodo} {c.rota}" == rota]
+        if not medidas:
+            pytest.fail(f"orcamento_sql: nenhuma requisição a {rota} durante o teste")
+        for contagem in medidas:
+            comando, vezes = contagem.mais_repetido()
+            if contagem.consultas > limite:
+                pytest.fail(
+                    f"{rota} executou {contagem.consultas} comandos SQL (orçamento: {limite})"
+                )
+            if vezes > repeticoes:
+                pytest.fail(
+                    f"{rota} repetiu {vezes} vezes o mesmo comando (possível N+1):\n{comando}"
+                )
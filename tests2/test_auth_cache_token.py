@@ -0,0 +1,38 @@
+"""
+Teste simples: cache de tokens JWT já verificados
+"""
+import pytest
+from app.autenticacao_bancaria.auth import cache_tokens
+
+'''
+pytest tests2/test_auth_cache_token.py -v
+'''
+@pytest.mark.asyncio
+async def test_cache_de_token(client):
+    """O mesmo token só tem a assinatura verificada na primeira requisição"""
+    # Registra e faz login
+    await client.post("/auth/register", json={
+        "username": "usuario_cache",
+        "password": "senha123"
+    })
+    login = await client.post("/auth/login", json={
+        "username": "usuario_cache",
+        "password": "senha123"
+    })
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    cache_tokens.limpar()
+    acertos = cache_tokens.acertos
+
+    # Primeira chamada verifica a assinatura, as seguintes vêm do cache
+    for _ in range(3):
+        response = await client.get("/banco/protected", headers=headers)
+        assert response.status_code == 200
+        assert "usuario_cache" in response.json()["msg"]
+    assert cache_tokens.acertos - acertos == 2
+
+    # Token adulterado continua sendo recusado
+    response = await client.get(
+        "/banco/protected",
+        headers={"Authorization": f"Bearer {login.json()['access_token']}x"}
+    )
+    assert response.status_code == 401
@@ -18,3 +18,14 @@ async def test_register(client):
     assert response.status_code == 200
     assert "id" in response.json()
     assert response.json()["username"] == "dodi"
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("POST /auth/register", consultas=2)
+async def test_register_usuario_repetido(client):
+    """Username repetido responde 400; a criação custa a consulta do username e um INSERT"""
+    dados = {"username": "dodi", "password": "1234"}
+    assert (await client.post("/auth/register", json=dados)).status_code == 200
+    response = await client.post("/auth/register", json=dados)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Usuario ja existe"
@@ -0,0 +1,49 @@
+"""
+Teste simples: cache de GET /banco/contas/{numero} e invalidação nas escritas
+"""
+import pytest
+from app.service.service_bancario import cache_contas
+
+'''
+pytest tests2/test_banco_consultar_conta_cache.py -v
+'''
+@pytest.mark.asyncio
+async def test_consultar_conta_cache(client):
+    """A segunda consulta vem do cache e uma transação invalida a conta"""
+    # Registra e faz login
+    await client.post("/auth/register", json={
+        "username": "usuario_teste",
+        "password": "senha123"
+    })
+    login = await client.post("/auth/login", json={
+        "username": "usuario_teste",
+        "password": "senha123"
+    })
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Cria cliente e conta
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva",
+        "cpf": "12345678901",
+        "endereco": "Rua das Flores, 123",
+        "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={
+        "numero": 123456,
+        "cpf": "12345678901"
+    })
+
+    # Primeira consulta vai ao banco, a segunda vem do cache
+    acertos = cache_contas.acertos
+    await client.get("/banco/contas/123456")
+    response = await client.get("/banco/contas/123456")
+    assert response.json()["saldo"] == 0.0
+    assert cache_contas.acertos - acertos == 1
+
+    # Depósito invalida a conta: a próxima consulta enxerga o novo saldo
+    await client.post("/banco/transacoes/", json={
+        "numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": 50.0
+    }, headers=headers)
+    response = await client.get("/banco/contas/123456")
+    assert response.json()["saldo"] == 50.0
+    assert len(response.json()["historico"]) == 1
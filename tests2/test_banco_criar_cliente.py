@@ -19,3 +19,14 @@ async def test_criar_cliente(client):
     assert response.status_code == 201
     assert response.json()["nome"] == "João Silva"
     assert response.json()["cpf"] == "12345678901"
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("POST /banco/clientes/", consultas=1)
+async def test_criar_cliente_cpf_repetido(client):
+    """CPF repetido responde 400 pela restrição única, sem consulta prévia (um INSERT por criação)"""
+    dados = {"nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"}
+    assert (await client.post("/banco/clientes/", json=dados)).status_code == 201
+    response = await client.post("/banco/clientes/", json=dados)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cliente com esse cpf ja existe"
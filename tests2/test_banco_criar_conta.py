@@ -2,6 +2,9 @@
 Teste simples: POST /banco/contas
 """
 import pytest
+from app.models.models_conta import Conta
+from app.service.sequencias import AlocadorPorBlocos
+from tests2.conftest import engine_test
 
 '''
 pytest tests2/test_banco_criar_conta.py -v
@@ -25,3 +28,55 @@ async def test_criar_conta(client):
     })
     assert response.status_code == 201
     assert response.json()["numero"] == 123456
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("POST /banco/contas/", consultas=1)
+async def test_criar_conta_erros(client):
+    """Cliente resolvido pelo CPF no próprio INSERT; número repetido responde 400"""
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    response = await client.post("/banco/contas/", json={"numero": 123456, "cpf": "12345678901"})
+    assert response.status_code == 201
+    assert response.json() == {"numero": 123456, "agencia": "0001", "saldo": 0.0, "titular": "João Silva", "historico": []}
+    response = await client.post("/banco/contas/", json={"numero": 123456, "cpf": "12345678901"})
+    assert response.status_code == 400
+
+    response = await client.post("/banco/contas/", json={"numero": 654321, "cpf": "00000000000"})
+    assert response.status_code == 404
+    assert (await client.get("/banco/contas/654321")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_criar_conta_numero_gerado(client, contagens_sql):
+    """Sem número, o servidor gera: um bloco reservado no banco e depois uma única ida (o INSERT) por conta"""
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={"numero": 123456, "cpf": "12345678901"})
+    contagens_sql.clear()
+
+    numeros = []
+    for _ in range(3):
+        response = await client.post("/banco/contas/", json={"cpf": "12345678901"})
+        assert response.status_code == 201
+        numeros.append(response.json()["numero"])
+    # A sequência começa depois do maior número já usado
+    assert numeros == [123457, 123458, 123459]
+    consultas = [c.consultas for c in contagens_sql]
+    assert consultas[0] > 1 and consultas[1:] == [1, 1]
+
+    # Número escolhido à mão dentro do bloco reservado: o gerado o pula
+    await client.post("/banco/contas/", json={"numero": 123460, "cpf": "12345678901"})
+    response = await client.post("/banco/contas/", json={"cpf": "12345678901"})
+    assert response.json()["numero"] == 123461
+
+
+@pytest.mark.asyncio
+async def test_blocos_disjuntos_entre_processos():
+    """Dois alocadores (como dois workers) sobre o mesmo banco nunca entregam o mesmo número"""
+    workers = [AlocadorPorBlocos("contas", bloco=3, inicio=1000, coluna=Conta.numero) for _ in range(2)]
+    entregues = [await workers[i % 2].proximo(engine_test) for i in range(12)]
+    assert len(set(entregues)) == 12
+    assert sorted(entregues) == list(range(1000, 1012))
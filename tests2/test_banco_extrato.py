@@ -0,0 +1,51 @@
+"""
+Teste simples: GET /banco/contas/{numero}/extrato (CSV e NDJSON em streaming)
+"""
+import csv
+import io
+import json
+import pytest
+
+'''
+pytest tests2/test_banco_extrato.py -v
+'''
+
+@pytest.mark.asyncio
+async def test_extrato(client):
+    """Exporta o extrato em CSV e NDJSON, com filtro de período"""
+    await client.post("/auth/register", json={"username": "usuario_extrato", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_extrato", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={"numero": 123456, "cpf": "12345678901"})
+    await client.post("/banco/transacoes/lote", json=[
+        {"numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": 100.0},
+        {"numero_conta": 123456, "tipo_de_transacao": "saque", "valor": 30.0},
+        {"numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": 5.5},
+    ], headers=headers)
+
+    # CSV com cabeçalho, em ordem cronológica
+    response = await client.get("/banco/contas/123456/extrato", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "extrato_123456.csv" in response.headers["content-disposition"]
+    linhas = list(csv.DictReader(io.StringIO(response.text)))
+    assert [l["tipo_de_transacao"] for l in linhas] == ["deposito", "saque", "deposito"]
+    assert [float(l["valor"]) for l in linhas] == [100.0, 30.0, 5.5]
+
+    # NDJSON: uma transação por linha
+    response = await client.get("/banco/contas/123456/extrato", params={"formato": "ndjson"}, headers=headers)
+    transacoes = [json.loads(l) for l in response.text.splitlines()]
+    assert [t["valor"] for t in transacoes] == [100.0, 30.0, 5.5]
+
+    # Período sem movimentos: só o cabeçalho
+    response = await client.get(
+        "/banco/contas/123456/extrato", params={"ate": "2000-01-01T00:00:00"}, headers=headers
+    )
+    assert response.text == "id,data,tipo_de_transacao,valor\n"
+
+    # Conta inexistente e acesso sem token
+    assert (await client.get("/banco/contas/999/extrato", headers=headers)).status_code == 404
+    assert (await client.get("/banco/contas/123456/extrato")).status_code in (401, 403)
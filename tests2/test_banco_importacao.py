@@ -0,0 +1,116 @@
+"""
+Teste simples: POST /banco/importacao
+"""
+import orjson
+import pytest
+
+from app.service import service_importacao
+
+'''
+pytest tests2/test_banco_importacao.py -v
+'''
+async def autenticar(client):
+    await client.post("/auth/register", json={"username": "usuario_import", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_import", "password": "senha123"})
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+# Corpo enviado em pedaços pequenos, como num upload em streaming
+def em_pedacos(texto: str, tamanho: int = 7):
+    dados = texto.encode()
+    async def pedacos():
+        for inicio in range(0, len(dados), tamanho):
+            yield dados[inicio:inicio + tamanho]
+    return pedacos()
+
+
+CSV = (
+    "nome,cpf,endereco,data_nascimento,numero\r\n"
+    "Ana,11111111111,\"Rua A, 10\",1990-01-01,1001\r\n"
+    "Bruno,22222222222,\"Rua B\nBloco 2\",1985-02-02,1002\r\n"
+    ",11111111111,,,1003\r\n"                          # segunda conta da Ana
+    "Carla,33333333333,Rua C,1970-03-03,1001\r\n"      # número repetido no arquivo
+    "Ana de novo,11111111111,Rua A,1990-01-01,\r\n"   # CPF repetido sem conta
+    ",44444444444,,,1004\r\n"                          # cliente desconhecido
+    "Davi,55555555555,Rua D,1960-04-04,abc\r\n"        # número inválido
+    "Eva,66666666666,Rua E\r\n"                        # colunas faltando
+    "Fabio,77777777777,Rua F,1999-09-09,\r\n"          # só o cliente
+)
+
+
+@pytest.mark.asyncio
+async def test_importacao_csv(client):
+    """Cria clientes e contas e reporta cada linha com erro pela posição no arquivo"""
+    headers = await autenticar(client)
+    response = await client.post("/banco/importacao", content=em_pedacos(CSV), headers=headers)
+    assert response.status_code == 200
+    corpo = response.json()
+    assert corpo["linhas"] == 9
+    assert corpo["clientes_criados"] == 3
+    assert corpo["contas_criadas"] == 3
+    assert corpo["erros"] == 5 and corpo["erros_omitidos"] == 0
+    assert [(e["linha"], e["erro"]) for e in corpo["detalhes_erros"]] == [
+        (5, "conta_ja_existe"),
+        (6, "cliente_com_esse_cpf_ja_existe"),
+        (7, "cliente_nao_encontrado"),
+        (8, "linha_invalida"),
+        (9, "linha_invalida"),
+    ]
+
+    # Campo entre aspas com quebra de linha e segunda conta do mesmo cliente
+    conta = (await client.get("/banco/contas/1002")).json()
+    assert conta["titular"] == "Bruno"
+    contas = (await client.get("/banco/contas", params={"numeros": "1001,1003"})).json()
+    assert [c["conta"]["titular"] for c in contas] == ["Ana", "Ana"]
+    # Linha rejeitada não deixa cliente criado pela metade
+    carla = await client.post("/banco/clientes/", json={
+        "nome": "Carla", "cpf": "33333333333", "endereco": "Rua C", "data_nascimento": "1970-03-03"
+    })
+    assert carla.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_importacao_ndjson_contra_o_banco(client, monkeypatch):
+    """Duplicados já gravados (inclusive em blocos anteriores) viram erro da linha"""
+    monkeypatch.setattr(service_importacao, "LINHAS_POR_BLOCO_IMPORTACAO", 2)
+    monkeypatch.setattr(service_importacao, "ERROS_NO_RELATORIO", 1)
+    headers = await autenticar(client)
+    await client.post("/banco/clientes/", json={
+        "nome": "Ana", "cpf": "11111111111", "endereco": "Rua A", "data_nascimento": "1990-01-01"
+    })
+    await client.post("/banco/contas/", json={"numero": 1001, "cpf": "11111111111"})
+
+    linhas = [
+        {"cpf": "11111111111", "numero": 1002},
+        {"nome": "Bia", "cpf": "22222222222", "endereco": "Rua B", "data_nascimento": "1980-01-01", "numero": 1001},
+        {"nome": "Caio", "cpf": "33333333333", "endereco": "Rua C", "data_nascimento": "1980-01-01", "numero": 1003},
+        {"cpf": "33333333333", "numero": 1003},
+        [1, 2, 3],
+    ]
+    corpo = "\n".join(orjson.dumps(linha).decode() for linha in linhas) + "\n\n"
+    response = await client.post(
+        "/banco/importacao", params={"formato": "ndjson"}, content=em_pedacos(corpo), headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "linhas": 5, "clientes_criados": 1, "contas_criadas": 2, "erros": 3, "erros_omitidos": 2,
+        "detalhes_erros": [{"linha": 2, "erro": "conta_ja_existe", "detalhe": None}],
+    }
+    assert (await client.get("/banco/contas/1003")).json()["titular"] == "Caio"
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("POST /banco/importacao", consultas=4)
+async def test_importacao_por_bloco(client):
+    """Cada bloco custa duas buscas com IN e dois INSERTs, seja qual for o número de linhas"""
+    headers = await autenticar(client)
+    linhas = "".join(f"Cliente {i},{i:011d},Rua {i},1990-01-01,{5000 + i}\n" for i in range(300))
+    corpo = "nome,cpf,endereco,data_nascimento,numero\n" + linhas
+    response = await client.post("/banco/importacao", content=corpo, headers=headers)
+    assert response.json()["contas_criadas"] == 300
+
+
+@pytest.mark.asyncio
+async def test_importacao_exige_token(client):
+    response = await client.post("/banco/importacao", content="nome,cpf\n")
+    assert response.status_code == 401
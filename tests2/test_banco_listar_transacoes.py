@@ -0,0 +1,116 @@
+"""
+Teste simples: GET /banco/contas/{numero}/transacoes e GET /banco/contas/{numero}?ultimas=N
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select, text
+
+from app.models.models_conta import Conta
+from app.models.models_transacao import Transacao
+from app.service.projecoes import ultimas_transacoes
+from tests2.conftest import engine_test
+
+'''
+pytest tests2/test_banco_listar_transacoes.py -v
+'''
+async def preparar(client):
+    await client.post("/auth/register", json={"username": "usuario_hist", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_hist", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={"numero": 123456, "cpf": "12345678901"})
+    return headers
+
+
+@pytest.mark.asyncio
+async def test_listar_transacoes_paginado(client):
+    """Páginas por cursor (data, id), mais recentes primeiro, com filtros"""
+    headers = await preparar(client)
+    # O lote grava todas as transações com a mesma data: o id desempata o cursor
+    valores = [1.0, 2.0, 3.0, 4.0, 5.0]
+    await client.post("/banco/transacoes/lote", json=[
+        {"numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": v} for v in valores
+    ], headers=headers)
+    await client.post("/banco/transacoes/", json={
+        "numero_conta": 123456, "tipo_de_transacao": "saque", "valor": 0.5
+    }, headers=headers)
+
+    vistos, params = [], {"limit": 2}
+    while True:
+        response = await client.get("/banco/contas/123456/transacoes", params=params)
+        assert response.status_code == 200
+        vistos += [t["valor"] for t in response.json()]
+        if "X-Proximo-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Proximo-Cursor"]
+    assert vistos == [0.5, 5.0, 4.0, 3.0, 2.0, 1.0]
+
+    # Filtro por tipo e por período
+    response = await client.get("/banco/contas/123456/transacoes", params={"tipo_de_transacao": "saque"})
+    assert [t["valor"] for t in response.json()] == [0.5]
+    response = await client.get("/banco/contas/123456/transacoes", params={"ate": "2000-01-01T00:00:00"})
+    assert response.json() == []
+
+    # Erros: cursor adulterado, tipo desconhecido e conta inexistente
+    response = await client.get("/banco/contas/123456/transacoes", params={"cursor": "xyz"})
+    assert response.status_code == 400
+    response = await client.get("/banco/contas/123456/transacoes", params={"tipo_de_transacao": "pix"})
+    assert response.status_code == 422
+    assert (await client.get("/banco/contas/999/transacoes")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_consultar_conta_ultimas(client):
+    """Com ?ultimas=N a conta traz só as N transações mais recentes, também no cache"""
+    headers = await preparar(client)
+    for valor in (10.0, 20.0, 30.0):
+        await client.post("/banco/transacoes/", json={
+            "numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": valor
+        }, headers=headers)
+
+    completa = (await client.get("/banco/contas/123456")).json()
+    ultimas = (await client.get("/banco/contas/123456", params={"ultimas": 2})).json()
+    assert [t["valor"] for t in completa["historico"]] == [10.0, 20.0, 30.0]
+    assert [t["valor"] for t in ultimas["historico"]] == [20.0, 30.0]
+    # Variantes em cache não se misturam
+    assert len((await client.get("/banco/contas/123456")).json()["historico"]) == 3
+    assert len((await client.get("/banco/contas/123456", params={"ultimas": 2})).json()["historico"]) == 2
+
+    # Uma escrita invalida todas as variantes da conta
+    await client.post("/banco/transacoes/", json={
+        "numero_conta": 123456, "tipo_de_transacao": "saque", "valor": 5.0
+    }, headers=headers)
+    ultimas = (await client.get("/banco/contas/123456", params={"ultimas": 2})).json()
+    assert [t["valor"] for t in ultimas["historico"]] == [30.0, 5.0]
+    assert ultimas["saldo"] == 55.0
+    assert len((await client.get("/banco/contas/123456")).json()["historico"]) == 4
+
+
+@pytest.mark.asyncio
+async def test_ultimas_de_um_historico_longo(client):
+    """?ultimas=N segue a ordem (data, id) e só lê o fim do índice da conta"""
+    await preparar(client)
+    async with engine_test.begin() as conn:
+        conta_id = (await conn.execute(select(Conta.id).where(Conta.numero == 123456))).scalar_one()
+        # 5000 lançamentos em ordem de data; os ids mais altos (gravados por
+        # último, como um crédito atrasado de outro shard) têm as datas mais antigas
+        inicio = datetime(2026, 1, 1)
+        await conn.execute(insert(Transacao), [
+            {"conta_id": conta_id, "tipo_de_transacao": "deposito", "valor": float(i),
+             "data": inicio + timedelta(minutes=i)}
+            for i in range(1, 5001)
+        ] + [
+            {"conta_id": conta_id, "tipo_de_transacao": "deposito", "valor": 0.5, "data": inicio}
+        ])
+        plano = " ".join(linha[-1] for linha in await conn.execute(
+            text("EXPLAIN QUERY PLAN " + str(ultimas_transacoes(conta_id, 3).compile(
+                conn.sync_connection, compile_kwargs={"literal_binds": True}
+            )))
+        ))
+    assert "ix_transacoes_conta_id_data_id" in plano and "TEMP B-TREE" not in plano
+
+    ultimas = (await client.get("/banco/contas/123456", params={"ultimas": 3})).json()
+    assert [t["valor"] for t in ultimas["historico"]] == [4998.0, 4999.0, 5000.0]
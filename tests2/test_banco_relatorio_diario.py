@@ -0,0 +1,111 @@
+"""
+Teste simples: GET /banco/relatorios/diario e resumos diários
+"""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models.models_conta import Conta
+from app.models.models_transacao import Transacao
+from app.service.service_relatorios import ServiceRelatorios
+from tests2.conftest import SessionLocalTest
+
+'''
+pytest tests2/test_banco_relatorio_diario.py -v
+'''
+# Cliente com as contas 5001 e 5002 e um usuário autenticado; devolve o header de auth
+async def preparar(client):
+    await client.post("/auth/register", json={"username": "usuario_relatorio", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_relatorio", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    for numero in (5001, 5002):
+        await client.post("/banco/contas/", json={"numero": numero, "cpf": "12345678901"})
+    return headers
+
+
+@pytest.mark.asyncio
+async def test_resumos_atualizados_nas_escritas(client):
+    """Transação avulsa, lote e transferência entram no resumo do dia"""
+    headers = await preparar(client)
+    for valor in (100.0, 50.0):
+        await client.post("/banco/transacoes/", json={
+            "numero_conta": 5001, "tipo_de_transacao": "deposito", "valor": valor
+        }, headers=headers)
+    await client.post("/banco/transacoes/lote", json=[
+        {"numero_conta": 5002, "tipo_de_transacao": "deposito", "valor": 30.0},
+        {"numero_conta": 5001, "tipo_de_transacao": "saque", "valor": 20.0},
+        {"numero_conta": 5001, "tipo_de_transacao": "saque", "valor": 9999.0},  # falha: fora do resumo
+    ], headers=headers)
+    await client.post("/banco/transferencias/", json={
+        "conta_origem": 5001, "conta_destino": 5002, "valor": 10.0
+    }, headers=headers)
+
+    hoje = datetime.utcnow().date().isoformat()
+    response = await client.get("/banco/relatorios/diario", params={"desde": hoje, "ate": hoje}, headers=headers)
+    assert response.status_code == 200
+    por_tipo = {linha["tipo_de_transacao"]: (linha["quantidade"], linha["total"]) for linha in response.json()}
+    assert por_tipo == {
+        "deposito": (3, 180.0),
+        "saque": (1, 20.0),
+        "transferencia_entrada": (1, 10.0),
+        "transferencia_saida": (1, 10.0),
+    }
+    assert {linha["agencia"] for linha in response.json()} == {"0001"}
+
+    # Por conta, filtrando uma delas
+    response = await client.get("/banco/relatorios/diario", params={
+        "desde": hoje, "ate": hoje, "agrupar": "conta", "numero": 5002
+    }, headers=headers)
+    assert [(l["numero"], l["tipo_de_transacao"], l["quantidade"], l["total"]) for l in response.json()] == [
+        (5002, "deposito", 1, 30.0),
+        (5002, "transferencia_entrada", 1, 10.0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_do_historico(client):
+    """Histórico gravado sem resumo entra pelo backfill, agrupado por dia"""
+    headers = await preparar(client)
+    async with SessionLocalTest() as session:
+        conta_id = (await session.execute(select(Conta.id).where(Conta.numero == 5001))).scalar()
+        await session.execute(insert(Transacao), [
+            {"tipo_de_transacao": "deposito", "valor": 10.0, "conta_id": conta_id, "data": datetime(2025, 3, 1, 8)},
+            {"tipo_de_transacao": "deposito", "valor": 15.0, "conta_id": conta_id, "data": datetime(2025, 3, 1, 23)},
+            {"tipo_de_transacao": "saque", "valor": 5.0, "conta_id": conta_id, "data": datetime(2025, 3, 2, 12)},
+        ])
+        await session.commit()
+
+    params = {"desde": "2025-03-01", "ate": "2025-03-31", "agrupar": "conta"}
+    assert (await client.get("/banco/relatorios/diario", params=params, headers=headers)).json() == []
+
+    async with SessionLocalTest() as session:
+        resultado = await ServiceRelatorios.reconstruir_resumos(session, contas_por_bloco=1)
+        assert resultado == {"contas": 2, "linhas": 2}
+        # Refazer é idempotente; com "desde" só os dias seguintes são recalculados
+        await ServiceRelatorios.reconstruir_resumos(session)
+        assert (await ServiceRelatorios.reconstruir_resumos(session, date(2025, 3, 2)))["linhas"] == 1
+
+    response = await client.get("/banco/relatorios/diario", params=params, headers=headers)
+    assert response.json() == [
+        {"dia": "2025-03-01", "agencia": "0001", "numero": 5001,
+         "tipo_de_transacao": "deposito", "quantidade": 2, "total": 25.0},
+        {"dia": "2025-03-02", "agencia": "0001", "numero": 5001,
+         "tipo_de_transacao": "saque", "quantidade": 1, "total": 5.0},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_relatorio_validacoes(client):
+    """Período invertido ou longo demais, agrupamento inválido e sem token"""
+    headers = await preparar(client)
+    url = "/banco/relatorios/diario"
+    assert (await client.get(url, params={"desde": "2025-02-01", "ate": "2025-01-01"}, headers=headers)).status_code == 400
+    assert (await client.get(url, params={"desde": "2024-01-01", "ate": "2025-06-01"}, headers=headers)).status_code == 400
+    assert (await client.get(url, params={
+        "desde": "2025-01-01", "ate": "2025-01-02", "agrupar": "cliente"
+    }, headers=headers)).status_code == 422
+    assert (await client.get(url, params={"desde": "2025-01-01", "ate": "2025-01-02"})).status_code in (401, 403)
@@ -0,0 +1,129 @@
+"""
+Teste simples: GET /banco/contas/{numero}/saldo e job de snapshots de saldo
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, insert, select, update
+
+from app.models.models_conta import Conta
+from app.models.models_saldo import SaldoSnapshot
+from app.models.models_transacao import Transacao
+from app.service.service_saldos import ServiceSaldos
+from tests2.conftest import SessionLocalTest
+
+'''
+pytest tests2/test_banco_saldo_em.py -v
+'''
+# Conta 4242 com 9 depósitos de 10 (dias 1 a 9 de jan/2025) e um saque de 5 no dia 10
+async def preparar(client):
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={"numero": 4242, "cpf": "12345678901"})
+    async with SessionLocalTest() as session:
+        conta_id = (await session.execute(select(Conta.id).where(Conta.numero == 4242))).scalar()
+        lancamentos = [
+            {"tipo_de_transacao": "deposito", "valor": 10.0, "conta_id": conta_id, "data": datetime(2025, 1, dia)}
+            for dia in range(1, 10)
+        ]
+        lancamentos.append(
+            {"tipo_de_transacao": "saque", "valor": 5.0, "conta_id": conta_id, "data": datetime(2025, 1, 10)}
+        )
+        await session.execute(insert(Transacao), lancamentos)
+        await session.execute(update(Conta).where(Conta.id == conta_id).values(saldo=85.0))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_saldo_em_data(client):
+    """Saldo em uma data = snapshot anterior + transações até a data"""
+    await preparar(client)
+    async with SessionLocalTest() as session:
+        # Um snapshot a cada 3 transações; a segunda rodada não tem o que fazer
+        assert await ServiceSaldos.atualizar_snapshots(session, intervalo=3, margem_s=0) == 3
+        assert await ServiceSaldos.atualizar_snapshots(session, intervalo=3, margem_s=0) == 0
+
+    response = await client.get("/banco/contas/4242/saldo", params={"em": "2025-01-07T12:00:00"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "numero": 4242,
+        "em": "07-01-2025 12:00:00",
+        "saldo": 70.0,
+        "snapshot": "06-01-2025 00:00:00",
+        "transacoes_apos_snapshot": 1,
+    }
+
+    # Data com fuso é convertida para UTC
+    response = await client.get("/banco/contas/4242/saldo", params={"em": "2025-01-03T02:00:00+03:00"})
+    assert response.json()["saldo"] == 20.0
+
+    # Antes do primeiro snapshot (e de qualquer transação)
+    response = await client.get("/banco/contas/4242/saldo", params={"em": "2024-12-31T00:00:00"})
+    assert response.json()["saldo"] == 0.0
+    assert response.json()["snapshot"] is None
+
+    # Sem data: agora, igual ao saldo da conta
+    response = await client.get("/banco/contas/4242/saldo")
+    assert response.json()["saldo"] == 85.0
+    assert response.json()["transacoes_apos_snapshot"] == 1
+
+    assert (await client.get("/banco/contas/999/saldo")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_snapshots_incluem_transferencias_e_transacoes_novas(client):
+    """Transações feitas pela API entram nos próximos snapshots com o sinal certo"""
+    await preparar(client)
+    await client.post("/auth/register", json={"username": "usuario_saldo", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_saldo", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/contas/", json={"numero": 4343, "cpf": "12345678901"})
+    await client.post("/banco/transferencias/", json={
+        "conta_origem": 4242, "conta_destino": 4343, "valor": 25.0
+    }, headers=headers)
+
+    async with SessionLocalTest() as session:
+        await ServiceSaldos.atualizar_snapshots(session, intervalo=1, margem_s=0)
+        ultimos = (await session.execute(
+            select(Conta.numero, SaldoSnapshot.saldo).join(Conta, Conta.id == SaldoSnapshot.conta_id)
+            .order_by(SaldoSnapshot.data, SaldoSnapshot.ate_transacao_id)
+        )).all()
+        assert dict(ultimos) == {4242: 60.0, 4343: 25.0}
+        # O helper de valor com sinal soma o mesmo saldo no banco
+        total = (await session.execute(
+            select(func.sum(Transacao.valor_com_sinal)).join(Conta).where(Conta.numero == 4242)
+        )).scalar()
+        assert total == 60.0
+
+    assert (await client.get("/banco/contas/4242/saldo")).json()["saldo"] == 60.0
+    assert (await client.get("/banco/contas/4343/saldo")).json()["saldo"] == 25.0
+
+
+@pytest.mark.asyncio
+async def test_reconciliacao(client):
+    """Snapshots divergentes são apagados e refeitos; saldo divergente é reportado"""
+    await preparar(client)
+    async with SessionLocalTest() as session:
+        await ServiceSaldos.atualizar_snapshots(session, intervalo=3, margem_s=0)
+        resultado = await ServiceSaldos.reconciliar(session, contas_por_bloco=1)
+        assert resultado == {"contas": 1, "snapshots": 3, "snapshots_removidos": 0, "saldos_divergentes": []}
+
+        # Corrompe o segundo snapshot e o saldo da conta
+        segundo = (await session.execute(
+            select(SaldoSnapshot.id).order_by(SaldoSnapshot.data).offset(1).limit(1)
+        )).scalar()
+        await session.execute(update(SaldoSnapshot).where(SaldoSnapshot.id == segundo).values(saldo=1.0))
+        await session.execute(update(Conta).where(Conta.numero == 4242).values(saldo=1000.0))
+        await session.commit()
+
+        resultado = await ServiceSaldos.reconciliar(session, contas_por_bloco=1)
+        assert resultado["snapshots_removidos"] == 2
+        assert resultado["saldos_divergentes"] == [
+            {"numero": 4242, "saldo": 1000.0, "saldo_do_historico": 85.0}
+        ]
+
+        # O job refaz os snapshots apagados a partir do histórico
+        assert await ServiceSaldos.atualizar_snapshots(session, intervalo=3, margem_s=0) == 2
+        resultado = await ServiceSaldos.reconciliar(session)
+        assert resultado["snapshots_removidos"] == 0
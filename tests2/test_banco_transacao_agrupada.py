@@ -0,0 +1,129 @@
+"""
+Teste simples: POST /banco/transacoes/ com group commit ativo
+"""
+import asyncio
+import pytest
+from sqlalchemy import text
+from app.core.config import settings
+from app.schemas.schemas_da_transacao import TransacaoIn
+from app.service.escritor_agrupado import EscritorAgrupado, EscritorParado, encerrar_escritores, obter_escritor
+from tests2.conftest import engine_test
+
+'''
+pytest tests2/test_banco_transacao_agrupada.py -v
+'''
+# Quantidade de commits agrupados já feitos, lida de /metrics
+async def grupos_gravados(client):
+    texto = (await client.get("/metrics")).text
+    for linha in texto.splitlines():
+        if linha.startswith("escritor_grupo_tamanho_count"):
+            return float(linha.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_transacoes_agrupadas(client, monkeypatch):
+    """Requisições concorrentes saem em poucos commits, cada uma com seu resultado"""
+    monkeypatch.setattr(settings, "GRUPO_COMMIT_ATIVO", True)
+    monkeypatch.setattr(settings, "GRUPO_COMMIT_JANELA_MS", 20.0)
+    await client.post("/auth/register", json={"username": "usuario_grupo", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_grupo", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={"numero": 123456, "cpf": "12345678901"})
+
+    def transacao(tipo, valor, numero=123456):
+        return client.post("/banco/transacoes/", json={
+            "numero_conta": numero, "tipo_de_transacao": tipo, "valor": valor
+        }, headers=headers)
+
+    grupos_antes = await grupos_gravados(client)
+    respostas = await asyncio.gather(
+        *(transacao("deposito", 10.0) for _ in range(20)),
+        transacao("saque", 1000.0),       # saldo insuficiente: só este falha
+        transacao("deposito", 5.0, 999),  # conta inexistente
+    )
+    await encerrar_escritores()
+
+    assert [r.status_code for r in respostas[:20]] == [200] * 20
+    assert respostas[20].status_code == 400
+    assert respostas[21].status_code == 404
+    # 22 transações concorrentes, bem menos commits
+    assert await grupos_gravados(client) - grupos_antes <= 3
+
+    conta = (await client.get("/banco/contas/123456")).json()
+    assert conta["saldo"] == 200.0
+    assert len(conta["historico"]) == 20
+
+
+@pytest.mark.asyncio
+async def test_grupo_confirmado_nao_e_reaplicado():
+    """Falha depois do commit devolve o erro a todos; antes do commit, reaplica item a item"""
+    chamadas = []
+
+    async def falha_depois_do_commit(transacoes, session):
+        chamadas.append(len(transacoes))
+        await session.execute(text("SELECT 1"))
+        await session.commit()
+        raise RuntimeError("cache indisponivel")
+
+    escritor = EscritorAgrupado(engine_test, falha_depois_do_commit, janela_ms=20.0, tamanho_maximo=10)
+    resultados = await asyncio.gather(
+        *(escritor.enviar(TransacaoIn(numero_conta=1, tipo_de_transacao="deposito", valor=1.0)) for _ in range(3)),
+        return_exceptions=True
+    )
+    await escritor.encerrar()
+    assert chamadas == [3]
+    assert all(isinstance(r, RuntimeError) for r in resultados)
+
+    chamadas.clear()
+
+    async def falha_antes_do_commit(transacoes, session):
+        chamadas.append(len(transacoes))
+        if len(transacoes) > 1:
+            raise RuntimeError("conexao perdida")
+        return ["ok"]
+
+    escritor = EscritorAgrupado(engine_test, falha_antes_do_commit, janela_ms=20.0, tamanho_maximo=10)
+    resultados = await asyncio.gather(
+        *(escritor.enviar(TransacaoIn(numero_conta=1, tipo_de_transacao="deposito", valor=1.0)) for _ in range(3))
+    )
+    await escritor.encerrar()
+    assert chamadas == [3, 1, 1, 1]
+    assert resultados == ["ok"] * 3
+
+
+@pytest.mark.asyncio
+async def test_escritor_parado_falha_rapido_e_e_recriado():
+    """Tarefa morta: o que estava esperando recebe erro, enviar falha na hora e obter_escritor cria outro"""
+    liberar = asyncio.Event()
+
+    async def aplicar(transacoes, session):
+        await liberar.wait()
+        return ["ok"] * len(transacoes)
+
+    escritor = obter_escritor(engine_test, aplicar)
+    transacao = TransacaoIn(numero_conta=1, tipo_de_transacao="deposito", valor=1.0)
+    em_andamento = asyncio.ensure_future(escritor.enviar(transacao))
+    await asyncio.sleep(0.05)  # o primeiro grupo já está gravando
+    na_fila = asyncio.ensure_future(escritor.enviar(transacao))
+    await asyncio.sleep(0)
+
+    # Um cancelamento não passa pelo "except Exception" de _gravar
+    escritor._tarefa.cancel()
+    resultados = await asyncio.wait_for(asyncio.gather(em_andamento, na_fila, return_exceptions=True), timeout=1)
+    assert all(isinstance(r, EscritorParado) for r in resultados)
+    with pytest.raises(EscritorParado):
+        await escritor.enviar(transacao)
+
+    novo = obter_escritor(engine_test, aplicar)
+    assert novo is not escritor
+    liberar.set()
+    assert await asyncio.wait_for(novo.enviar(transacao), timeout=1) == "ok"
+
+    # Depois de encerrado, enviar também falha em vez de esperar para sempre
+    await encerrar_escritores()
+    with pytest.raises(EscritorParado):
+        await novo.enviar(transacao)
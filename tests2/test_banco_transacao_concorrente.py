@@ -0,0 +1,105 @@
+"""
+Teste simples: transações concorrentes na mesma conta e travas por conta
+"""
+import asyncio
+import pytest
+from app.core.travas import TravasPorChave
+
+'''
+pytest tests2/test_banco_transacao_concorrente.py -v
+'''
+@pytest.mark.asyncio
+async def test_transacoes_concorrentes_mesma_conta(client):
+    """Depósitos e saques simultâneos na mesma conta: saldo final exato e disputa visível em /metrics"""
+    await client.post("/auth/register", json={"username": "usuario_quente", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_quente", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={"numero": 777777, "cpf": "12345678901"})
+
+    def transacao(tipo, valor):
+        return client.post("/banco/transacoes/", json={
+            "numero_conta": 777777, "tipo_de_transacao": tipo, "valor": valor
+        }, headers=headers)
+
+    respostas = await asyncio.gather(
+        *(transacao("deposito", 10.0) for _ in range(15)),
+        *(transacao("saque", 5.0) for _ in range(5)),
+    )
+    assert all(r.status_code == 200 for r in respostas)
+
+    conta = (await client.get("/banco/contas/777777")).json()
+    assert conta["saldo"] == 125.0
+    assert len(conta["historico"]) == 20
+
+    metricas = (await client.get("/metrics")).text
+    assert "trava_conta_aquisicoes_total" in metricas
+    assert 'trava_conta_espera_por_conta_segundos{conta="777777"}' in metricas
+
+
+@pytest.mark.asyncio
+async def test_travas_serializam_por_chave():
+    """Mesma chave roda uma de cada vez; chaves diferentes rodam juntas"""
+    travas = TravasPorChave(faixas=4)
+    ativos = {"a": 0, "b": 0}
+    maximo = {"a": 0, "b": 0}
+
+    async def trabalho(chave):
+        async with travas.travar(chave):
+            ativos[chave] += 1
+            maximo[chave] = max(maximo[chave], ativos[chave])
+            await asyncio.sleep(0.001)
+            ativos[chave] -= 1
+
+    await asyncio.gather(*(trabalho(c) for c in "abababab"))
+    assert maximo == {"a": 1, "b": 1}
+    assert travas.estatisticas()["disputas"] > 0
+    assert {c["chave"] for c in travas.mais_disputadas()} == {"a", "b"}
+
+    # Chaves diferentes não esperam uma pela outra
+    async with travas.travar("a"):
+        await asyncio.wait_for(trabalho("b"), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_travas_memoria_limitada():
+    """Travas ociosas são descartadas; as que estão em uso nunca"""
+    travas = TravasPorChave(faixas=1, maximo_por_faixa=3)
+    async with travas.travar(0):
+        for chave in range(1, 10):
+            async with travas.travar(chave):
+                pass
+        assert len(travas) <= 3
+        assert 0 in travas.faixas[0]
+
+    # Com ociosidade zero, as antigas saem já na próxima chave nova
+    travas = TravasPorChave(faixas=1, ociosidade=0)
+    for chave in range(10):
+        async with travas.travar(chave):
+            pass
+    assert len(travas) == 1
+
+    # Várias chaves são obtidas em ordem crescente, sem repetir
+    ordem = []
+    original = travas.travar
+    def registrar(chave):
+        ordem.append(chave)
+        return original(chave)
+    travas.travar = registrar
+    async with travas.travar_varias(5, 2, 9, 2):
+        pass
+    assert ordem == [2, 5, 9]
+
+
+@pytest.mark.asyncio
+async def test_travas_limpar():
+    """limpar() esquece as travas e os contadores (usado entre testes, cada um com seu event loop)"""
+    travas = TravasPorChave(faixas=2)
+    async with travas.travar_varias(1, 2, 3):
+        pass
+    assert len(travas) == 3
+    travas.limpar()
+    assert len(travas) == 0
+    assert travas.estatisticas() == {"entradas": 0, "aquisicoes": 0, "disputas": 0, "espera_total_s": 0.0}
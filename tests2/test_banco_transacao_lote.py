@@ -0,0 +1,111 @@
+"""
+Teste simples: POST /banco/transacoes/lote
+"""
+import asyncio
+from datetime import date
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.session import Base
+from app.models.models_cliente import Cliente
+from app.models.models_conta import Conta
+from app.schemas.schemas_da_transacao import TransacaoIn
+from app.service.service_bancario import ServiceBancario
+
+'''
+pytest tests2/test_banco_transacao_lote.py -v
+'''
+@pytest.mark.asyncio
+async def test_criar_transacoes_em_lote(client):
+    """Teste da rota POST /banco/transacoes/lote"""
+    # Registra e faz login
+    await client.post("/auth/register", json={
+        "username": "usuario_teste",
+        "password": "senha123"
+    })
+    login = await client.post("/auth/login", json={
+        "username": "usuario_teste",
+        "password": "senha123"
+    })
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Cria cliente e conta
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva",
+        "cpf": "12345678901",
+        "endereco": "Rua das Flores, 123",
+        "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={
+        "numero": 123456,
+        "cpf": "12345678901"
+    })
+
+    # Itens aplicados em ordem, cada um com seu resultado
+    response = await client.post("/banco/transacoes/lote", json=[
+        {"numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": 100.0},
+        {"numero_conta": 123456, "tipo_de_transacao": "saque", "valor": 150.0},
+        {"numero_conta": 999, "tipo_de_transacao": "deposito", "valor": 10.0},
+        {"numero_conta": 123456, "tipo_de_transacao": "saque", "valor": 40.0},
+    ], headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["sucesso"] == 2
+    assert [r["status"] for r in body["resultados"]] == [
+        "ok", "saldo_insuficiente", "conta_nao_encontrada", "ok"
+    ]
+    assert body["resultados"][-1]["saldo"] == 60.0
+
+    conta = await client.get("/banco/contas/123456")
+    assert conta.json()["saldo"] == 60.0
+    assert len(conta.json()["historico"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_lotes_de_dois_workers_nao_deixam_saldo_negativo(tmp_path, monkeypatch):
+    """Dois processos (engines) sobre o mesmo SQLite: o saque que já não cabe é recusado pelo UPDATE"""
+    url = f"sqlite+aiosqlite:///{tmp_path / 'lote.db'}"
+    worker_a, worker_b = create_async_engine(url), create_async_engine(url)
+    async with worker_a.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Cliente).values(
+            id=1, nome="Ana", cpf="11111111111", endereco="Rua A", data_nascimento=date(1990, 1, 1)
+        ))
+        await conn.execute(insert(Conta).values(numero=500, saldo=100.0, cliente_id=1))
+
+    def item(indice, tipo, valor):
+        return indice, TransacaoIn(numero_conta=500, tipo_de_transacao=tipo, valor=valor)
+
+    # O lote do worker A leu o saldo (100) e só grava depois que o lote do
+    # worker B sacou 80. As travas por conta não ajudam: cada worker tem as suas
+    b_gravou = asyncio.Event()
+    somar_deltas = ServiceBancario._somar_deltas
+
+    async def b_grava_primeiro(contas, lidos, saldos, session, condicional):
+        if session.bind is worker_a and condicional:
+            await b_gravou.wait()
+        return await somar_deltas(contas, lidos, saldos, session, condicional)
+
+    monkeypatch.setattr(ServiceBancario, "_somar_deltas", staticmethod(b_grava_primeiro))
+
+    async def lote_a():
+        async with AsyncSession(worker_a, expire_on_commit=False) as session:
+            return await ServiceBancario._aplicar_bloco_travado(
+                [item(0, "saque", 60.0), item(1, "deposito", 5.0)], session
+            )
+
+    async def lote_b():
+        async with AsyncSession(worker_b, expire_on_commit=False) as session:
+            resultados = await ServiceBancario._aplicar_bloco_travado([item(0, "saque", 80.0)], session)
+        b_gravou.set()
+        return resultados
+
+    resultados_a, resultados_b = await asyncio.gather(lote_a(), lote_b())
+    assert [(r.status, r.saldo) for r in resultados_b] == [("ok", 20.0)]
+    assert [(r.status, r.saldo) for r in resultados_a] == [("saldo_insuficiente", None), ("ok", 25.0)]
+    async with worker_a.connect() as conn:
+        assert (await conn.execute(select(Conta.saldo).where(Conta.numero == 500))).scalar_one() == 25.0
+    await worker_a.dispose()
+    await worker_b.dispose()
@@ -0,0 +1,59 @@
+"""
+Teste simples: POST /banco/transacoes (saque e saldo insuficiente)
+"""
+import pytest
+
+'''
+pytest tests2/test_banco_transacao_saque.py -v
+'''
+@pytest.mark.asyncio
+async def test_saque_com_e_sem_saldo(client):
+    """Teste do saque: saldo resultante e recusa por saldo insuficiente"""
+    # Registra e faz login
+    await client.post("/auth/register", json={
+        "username": "usuario_teste",
+        "password": "senha123"
+    })
+    login = await client.post("/auth/login", json={
+        "username": "usuario_teste",
+        "password": "senha123"
+    })
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    # Cria cliente e conta
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva",
+        "cpf": "12345678901",
+        "endereco": "Rua das Flores, 123",
+        "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={
+        "numero": 123456,
+        "cpf": "12345678901"
+    })
+
+    # Deposita 100 e saca 30: saldo resultante vem na resposta
+    await client.post("/banco/transacoes/", json={
+        "numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": 100.0
+    }, headers=headers)
+    response = await client.post("/banco/transacoes/", json={
+        "numero_conta": 123456, "tipo_de_transacao": "saque", "valor": 30.0
+    }, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["saldo"] == 70.0
+
+    # Saque acima do saldo é recusado e não altera a conta
+    response = await client.post("/banco/transacoes/", json={
+        "numero_conta": 123456, "tipo_de_transacao": "saque", "valor": 500.0
+    }, headers=headers)
+    assert response.status_code == 400
+
+    # Conta inexistente
+    response = await client.post("/banco/transacoes/", json={
+        "numero_conta": 999, "tipo_de_transacao": "deposito", "valor": 1.0
+    }, headers=headers)
+    assert response.status_code == 404
+
+    conta = await client.get("/banco/contas/123456")
+    assert conta.json()["saldo"] == 70.0
+    assert len(conta.json()["historico"]) == 2
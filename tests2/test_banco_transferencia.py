@@ -0,0 +1,90 @@
+"""
+Teste simples: POST /banco/transferencias/
+"""
+import asyncio
+import pytest
+
+'''
+pytest tests2/test_banco_transferencia.py -v
+'''
+# Cria um cliente com as contas 1111 (saldo 100) e 2222 (saldo 50); devolve o header de auth
+async def preparar(client):
+    await client.post("/auth/register", json={"username": "usuario_transf", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_transf", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    for numero, saldo in ((1111, 100.0), (2222, 50.0)):
+        await client.post("/banco/contas/", json={"numero": numero, "cpf": "12345678901"})
+        await client.post("/banco/transacoes/", json={
+            "numero_conta": numero, "tipo_de_transacao": "deposito", "valor": saldo
+        }, headers=headers)
+    return headers
+
+
+def transferir(client, headers, origem, destino, valor):
+    return client.post("/banco/transferencias/", json={
+        "conta_origem": origem, "conta_destino": destino, "valor": valor
+    }, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_transferencia(client):
+    """Debita a origem, credita o destino e registra as duas pernas no histórico"""
+    headers = await preparar(client)
+    response = await transferir(client, headers, 1111, 2222, 30.0)
+    assert response.status_code == 200
+    assert response.json() == {
+        "mensagem": "Transferencia realizada com sucesso", "saldo_origem": 70.0, "saldo_destino": 80.0
+    }
+
+    origem = (await client.get("/banco/contas/1111")).json()
+    destino = (await client.get("/banco/contas/2222")).json()
+    assert origem["saldo"] == 70.0 and destino["saldo"] == 80.0
+    assert origem["historico"][-1]["tipo_de_transacao"] == "transferencia_saida"
+    assert destino["historico"][-1]["tipo_de_transacao"] == "transferencia_entrada"
+
+    # As pernas também aparecem no filtro por tipo
+    response = await client.get("/banco/contas/2222/transacoes", params={"tipo_de_transacao": "transferencia_entrada"})
+    assert response.status_code == 200
+    assert [t["valor"] for t in response.json()] == [30.0]
+
+
+@pytest.mark.asyncio
+async def test_transferencia_falhas_nao_alteram_saldos(client):
+    """Saldo insuficiente ou conta inexistente: nenhum dos lados muda"""
+    headers = await preparar(client)
+    assert (await transferir(client, headers, 2222, 1111, 500.0)).status_code == 400
+    response = await transferir(client, headers, 1111, 9999, 10.0)
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Conta de destino nao encontrada"
+    # Destino menor que a origem: o crédito roda primeiro e precisa ser desfeito
+    response = await transferir(client, headers, 9999, 1111, 10.0)
+    assert response.json()["detail"] == "Conta de origem nao encontrada"
+    response = await transferir(client, headers, 2222, 1111, 60.0)
+    assert response.status_code == 400
+    assert (await transferir(client, headers, 1111, 1111, 10.0)).status_code == 400
+    assert (await transferir(client, headers, 1111, 2222, -10.0)).status_code == 422
+    assert (await client.post("/banco/transferencias/", json={
+        "conta_origem": 1111, "conta_destino": 2222, "valor": 10.0
+    })).status_code in (401, 403)
+
+    assert (await client.get("/banco/contas/1111")).json()["saldo"] == 100.0
+    assert (await client.get("/banco/contas/2222")).json()["saldo"] == 50.0
+    assert len((await client.get("/banco/contas/1111")).json()["historico"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_transferencias_opostas_concorrentes(client):
+    """A->B e B->A ao mesmo tempo: sem deadlock e o total é preservado"""
+    headers = await preparar(client)
+    respostas = await asyncio.wait_for(asyncio.gather(
+        *(transferir(client, headers, 1111, 2222, 5.0) for _ in range(10)),
+        *(transferir(client, headers, 2222, 1111, 3.0) for _ in range(10)),
+    ), timeout=30)
+    assert all(r.status_code == 200 for r in respostas)
+
+    origem = (await client.get("/banco/contas/1111")).json()["saldo"]
+    destino = (await client.get("/banco/contas/2222")).json()["saldo"]
+    assert origem == 80.0 and destino == 70.0
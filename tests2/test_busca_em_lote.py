@@ -0,0 +1,74 @@
+"""
+Teste simples: GET /banco/contas?numeros= e GET /get/clientes?ids= (busca em lote)
+"""
+import pytest
+from app.service import projecoes
+
+'''
+pytest tests2/test_busca_em_lote.py -v
+'''
+# Dois clientes: o primeiro com as contas 3001 e 3002, o segundo sem contas
+async def popular(client):
+    for cpf in ("11111111111", "22222222222"):
+        await client.post("/banco/clientes/", json={
+            "nome": f"Cliente {cpf[0]}", "cpf": cpf, "endereco": "Rua A", "data_nascimento": "1990-01-01"
+        })
+    for numero in (3001, 3002):
+        await client.post("/banco/contas/", json={"numero": numero, "cpf": "11111111111"})
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("GET /banco/contas", consultas=1)
+async def test_buscar_contas(client):
+    """Um item por número, na ordem pedida (com repetições), marcando os inexistentes"""
+    await popular(client)
+    response = await client.get("/banco/contas", params={"numeros": "3002,9999,3001,3002"})
+    assert response.status_code == 200
+    itens = response.json()
+    assert [(i["numero"], i["encontrada"]) for i in itens] == [
+        (3002, True), (9999, False), (3001, True), (3002, True)
+    ]
+    assert itens[1]["conta"] is None
+    assert itens[0]["conta"] == {
+        "numero": 3002, "agencia": "0001", "saldo": 0.0, "titular": "Cliente 1", "historico": []
+    }
+
+
+@pytest.mark.asyncio
+async def test_buscar_contas_com_historico_e_blocos(client, monkeypatch):
+    """Histórico só quando pedido; chaves acima do bloco viram vários IN"""
+    await popular(client)
+    await client.post("/auth/register", json={"username": "usuario_busca", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_busca", "password": "senha123"})
+    await client.post("/banco/transacoes/", json={
+        "numero_conta": 3001, "tipo_de_transacao": "deposito", "valor": 10.0
+    }, headers={"Authorization": f"Bearer {login.json()['access_token']}"})
+
+    monkeypatch.setattr(projecoes, "CHAVES_POR_IN", 1)
+    response = await client.get("/banco/contas", params={"numeros": "3001,3002", "incluir_historico": True})
+    itens = response.json()
+    assert [len(i["conta"]["historico"]) for i in itens] == [1, 0]
+    assert itens[0]["conta"]["saldo"] == 10.0
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("GET /get/clientes", consultas=2)
+async def test_buscar_clientes(client):
+    """Clientes com contas (sem histórico) na ordem pedida"""
+    await popular(client)
+    response = await client.get("/get/clientes", params={"ids": "2,7,1"})
+    assert response.status_code == 200
+    itens = response.json()
+    assert [(i["id"], i["encontrado"]) for i in itens] == [(2, True), (7, False), (1, True)]
+    assert itens[0]["cliente"]["contas"] == []
+    assert [c["numero"] for c in itens[2]["cliente"]["contas"]] == [3001, 3002]
+
+
+@pytest.mark.asyncio
+async def test_busca_validacoes(client):
+    """Formato inválido e chaves demais"""
+    assert (await client.get("/banco/contas", params={"numeros": "1,a"})).status_code == 422
+    assert (await client.get("/get/clientes", params={"ids": ""})).status_code == 422
+    demais = ",".join(str(n) for n in range(projecoes.CHAVES_POR_BUSCA + 1))
+    assert (await client.get("/banco/contas", params={"numeros": demais})).status_code == 400
+    assert (await client.get("/get/clientes", params={"ids": demais})).status_code == 400
@@ -0,0 +1,45 @@
+"""
+Teste simples: opções do pool e PRAGMAs do SQLite aplicados pelo criar_engine
+"""
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.metricas import espera_pool
+from app.database.session import PoolMedido, criar_engine
+
+'''
+pytest tests2/test_engine_e_pool.py -v
+'''
+@pytest.mark.asyncio
+async def test_engine_de_arquivo_aplica_pool_e_pragmas(tmp_path, monkeypatch):
+    """Conexão nova já vem com WAL e busy_timeout; o pool tem o tamanho configurado e mede a espera"""
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 1234)
+    monkeypatch.setattr(settings, "SQLITE_SYNCHRONOUS", "FULL")
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    engine = criar_engine(f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", nome="teste_pool")
+    try:
+        pool = engine.sync_engine.pool
+        assert isinstance(pool, PoolMedido)
+        assert pool.size() == 3
+
+        checkouts_antes = espera_pool.exportar()
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == settings.SQLITE_JOURNAL_MODE.lower()
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 1234
+            assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 2  # FULL
+        assert espera_pool.exportar() != checkouts_antes
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_em_memoria_fica_sem_pool_configurado():
+    """Em memória não há pool a dimensionar: o engine usa o padrão do dialeto"""
+    engine = criar_engine("sqlite+aiosqlite:///:memory:", nome="teste_memoria")
+    try:
+        assert not isinstance(engine.sync_engine.pool, PoolMedido)
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
+    finally:
+        await engine.dispose()
@@ -0,0 +1,39 @@
+"""
+Teste simples: GET /get/contas com paginação por cursor e streaming NDJSON
+"""
+import json
+import pytest
+'''
+pytest tests2/test_get_listar_contas_paginado.py -v
+'''
+
+@pytest.mark.asyncio
+async def test_listar_contas_paginado(client):
+    """Teste da paginação por cursor (limit/after) e do modo NDJSON"""
+    # Cria cliente e três contas
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva",
+        "cpf": "12345678901",
+        "endereco": "Rua das Flores, 123",
+        "data_nascimento": "1990-05-15"
+    })
+    for numero in (1001, 1002, 1003):
+        await client.post("/banco/contas/", json={"numero": numero, "cpf": "12345678901"})
+
+    # Primeira página com duas contas e cursor para a próxima
+    pagina1 = await client.get("/get/contas", params={"limit": 2})
+    assert pagina1.status_code == 200
+    assert [c["numero"] for c in pagina1.json()] == [1001, 1002]
+    cursor = pagina1.headers["X-Proximo-Cursor"]
+
+    # Segunda página termina a listagem, sem novo cursor
+    pagina2 = await client.get("/get/contas", params={"limit": 2, "after": cursor})
+    assert [c["numero"] for c in pagina2.json()] == [1003]
+    assert "X-Proximo-Cursor" not in pagina2.headers
+
+    # Streaming NDJSON: uma conta por linha
+    stream = await client.get("/get/contas", params={"formato": "ndjson"})
+    assert stream.status_code == 200
+    linhas = [json.loads(l) for l in stream.text.splitlines()]
+    assert [c["numero"] for c in linhas] == [1001, 1002, 1003]
+    assert linhas[0]["titular"] == "João Silva"
@@ -0,0 +1,41 @@
+"""
+Teste simples: índices das colunas de busca e migrations em dia com os modelos
+"""
+import os
+import tempfile
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+
+from app.database.session import Base
+from app.models.indices import colunas_sem_indice
+
+'''
+pytest tests2/test_indices_e_migrations.py -v
+'''
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_colunas_de_busca_indexadas():
+    """Toda coluna de busca frequente lidera algum índice"""
+    assert colunas_sem_indice() == []
+
+
+def test_migrations_criam_o_esquema_dos_modelos():
+    """alembic upgrade head gera exatamente o esquema declarado nos modelos"""
+    caminho = os.path.join(tempfile.mkdtemp(), "migrations.db")
+    config = Config(os.path.join(RAIZ, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(RAIZ, "migrations"))
+    config.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{caminho}")
+    command.upgrade(config, "head")
+
+    engine = create_engine(f"sqlite:///{caminho}")
+    with engine.connect() as conn:
+        contexto = MigrationContext.configure(conn, opts={"compare_type": True})
+        diferencas = compare_metadata(contexto, Base.metadata)
+    engine.dispose()
+    assert diferencas == []
@@ -0,0 +1,42 @@
+"""
+Teste simples: endpoint /metrics no formato do Prometheus
+"""
+import pytest
+
+'''
+pytest tests2/test_metricas.py -v
+'''
+# Valor de uma série no texto exportado (0 se ainda não existe)
+def valor(texto, serie):
+    for linha in texto.splitlines():
+        if linha.startswith(serie + " "):
+            return float(linha.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_metricas(client):
+    """Requisições aparecem por template de rota, com latência e tempo de SQL"""
+    por_rota = 'http_requisicoes_total{metodo="GET",rota="/banco/contas/{numero}",status="404"}'
+    nao_mapeada = 'http_requisicoes_total{metodo="GET",rota="<nao_mapeada>",status="404"}'
+    latencia = 'http_requisicao_duracao_segundos_count{metodo="GET",rota="/banco/contas/{numero}"}'
+    antes = (await client.get("/metrics")).text
+
+    await client.get("/banco/contas/999999")
+    await client.get("/banco/contas/888888")
+    await client.get("/rota/que/nao/existe")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    texto = response.text
+
+    # A rota é o template, não a URL: as duas consultas caem na mesma série
+    assert valor(texto, por_rota) - valor(antes, por_rota) == 2
+    assert valor(texto, nao_mapeada) - valor(antes, nao_mapeada) == 1
+    assert valor(texto, latencia) - valor(antes, latencia) == 2
+    assert "# TYPE http_requisicao_duracao_segundos histogram" in texto
+
+    # Tempo dos comandos SQL e contadores dos caches
+    assert valor(texto, 'db_comando_duracao_segundos_count{operacao="SELECT"}') > 0
+    assert valor(texto, 'cache_falhas_total{cache="contas"}') >= 2
@@ -0,0 +1,80 @@
+"""
+Teste simples: orçamento de comandos SQL por rota (detector de N+1)
+"""
+import pytest
+from app.core.config import settings
+
+'''
+pytest tests2/test_orcamento_sql.py -v
+'''
+# Cria 3 clientes com 2 contas cada e alguns depósitos; devolve o header de auth
+async def popular(client):
+    await client.post("/auth/register", json={"username": "usuario_sql", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_sql", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    for i in range(3):
+        cpf = f"1000000000{i}"
+        await client.post("/banco/clientes/", json={
+            "nome": f"Cliente {i}", "cpf": cpf, "endereco": "Rua A", "data_nascimento": "1990-01-01"
+        })
+        for j in range(2):
+            numero = 1000 + i * 10 + j
+            await client.post("/banco/contas/", json={"numero": numero, "cpf": cpf})
+            for _ in range(2):
+                await client.post("/banco/transacoes/", json={
+                    "numero_conta": numero, "tipo_de_transacao": "deposito", "valor": 10.0
+                }, headers=headers)
+    return headers
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("GET /get/clientes", consultas=2)
+async def test_orcamento_listar_clientes(client):
+    """Clientes + contas (selectin): 2 comandos, independente da quantidade"""
+    await popular(client)
+    response = await client.get("/get/clientes")
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("GET /get/clientes", consultas=3)
+async def test_orcamento_listar_clientes_com_historico(client):
+    """Com histórico: um comando a mais para as transações de todas as contas"""
+    await popular(client)
+    response = await client.get("/get/clientes", params={"incluir_historico": True})
+    assert response.status_code == 200
+    assert all(len(conta["historico"]) == 2 for c in response.json() for conta in c["contas"])
+
+
+@pytest.mark.asyncio
+@pytest.mark.orcamento_sql("GET /get/contas", consultas=1)
+@pytest.mark.orcamento_sql("GET /get/cliente/{cliente_id}", consultas=2)
+@pytest.mark.orcamento_sql("GET /banco/contas/{numero}", consultas=2)
+@pytest.mark.orcamento_sql("POST /banco/transacoes/", consultas=3)
+@pytest.mark.orcamento_sql("POST /banco/transferencias/", consultas=4)
+async def test_orcamento_rotas(client):
+    """Contas com titular via JOIN, cliente com contas, consulta, depósito e transferência"""
+    headers = await popular(client)
+    assert (await client.get("/get/contas")).status_code == 200
+    assert (await client.get("/get/cliente/1")).status_code == 200
+    assert (await client.get("/banco/contas/1000")).status_code == 200
+    # Dois UPDATEs condicionais, um INSERT com as duas pernas e o upsert dos resumos diários
+    assert (await client.post("/banco/transferencias/", json={
+        "conta_origem": 1000, "conta_destino": 1001, "valor": 5.0
+    }, headers=headers)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_headers_em_debug(client, contagens_sql, monkeypatch):
+    """Em DEBUG a resposta traz os totais de comandos e linhas"""
+    await popular(client)
+    response = await client.get("/get/clientes")
+    assert "x-consultas-sql" not in response.headers
+
+    monkeypatch.setattr(settings, "DEBUG", True)
+    response = await client.get("/get/clientes")
+    assert response.headers["x-consultas-sql"] == "2"
+    # 3 clientes + 6 contas carregados
+    assert response.headers["x-linhas-sql"] == "9"
+    assert contagens_sql[-1].rota == "/get/clientes"
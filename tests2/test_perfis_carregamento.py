@@ -0,0 +1,76 @@
+"""
+Teste simples: perfis de carregamento (lazy="raise_on_sql") e comandos SQL das listagens
+"""
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from app.models.models_cliente import Cliente
+from app.models.models_conta import Conta
+from app.models.perfis import PerfilCliente, PerfilConta, opcoes_cliente, opcoes_conta
+from tests2.conftest import SessionLocalTest
+
+'''
+pytest tests2/test_perfis_carregamento.py -v
+'''
+# 2 clientes com 2 contas cada, um depósito em cada conta
+async def popular(client):
+    await client.post("/auth/register", json={"username": "usuario_perfis", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_perfis", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    for i in range(2):
+        cpf = f"2000000000{i}"
+        await client.post("/banco/clientes/", json={
+            "nome": f"Cliente {i}", "cpf": cpf, "endereco": "Rua A", "data_nascimento": "1990-01-01"
+        })
+        for j in range(2):
+            numero = 2000 + i * 10 + j
+            await client.post("/banco/contas/", json={"numero": numero, "cpf": cpf})
+            await client.post("/banco/transacoes/", json={
+                "numero_conta": numero, "tipo_de_transacao": "deposito", "valor": 10.0
+            }, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_relacionamento_fora_do_perfil_falha(client):
+    """O que o perfil não carregou levanta erro em vez de disparar SQL escondido"""
+    await popular(client)
+    async with SessionLocalTest() as session:
+        conta = (await session.execute(
+            select(Conta).where(Conta.numero == 2000).options(*opcoes_conta(PerfilConta.RESUMO))
+        )).scalar_one()
+        with pytest.raises(InvalidRequestError):
+            conta.cliente
+
+        conta = (await session.execute(
+            select(Conta).where(Conta.numero == 2001).options(*opcoes_conta(PerfilConta.COM_TITULAR))
+        )).scalar_one()
+        assert conta.titular == "Cliente 0"
+        with pytest.raises(InvalidRequestError):
+            conta.transacoes
+
+        cliente = (await session.execute(
+            select(Cliente).where(Cliente.cpf == "20000000001").options(*opcoes_cliente(PerfilCliente.COM_CONTAS))
+        )).scalar_one()
+        assert sorted(c.numero for c in cliente.contas) == [2010, 2011]
+        with pytest.raises(InvalidRequestError):
+            cliente.contas[0].transacoes
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("rota, params, linhas, consultas", [
+    ("/get/contas", {"formato": "ndjson"}, 4, 1),
+    ("/get/contas", {"formato": "ndjson", "incluir_historico": True}, 4, 2),
+    ("/get/clientes", {"formato": "ndjson"}, 2, 2),
+    ("/get/clientes", {"formato": "ndjson", "incluir_historico": True}, 2, 3),
+])
+async def test_comandos_sql_das_listagens(client, contagens_sql, rota, params, linhas, consultas):
+    """Cada perfil custa um número fixo de comandos, qualquer que seja a quantidade de linhas"""
+    await popular(client)
+    response = await client.get(rota, params=params)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == linhas
+    contagem = contagens_sql[-1]
+    assert contagem.rota == rota
+    assert contagem.consultas == consultas
+    assert contagem.mais_repetido()[1] == 1
@@ -0,0 +1,46 @@
+"""
+Teste simples: respostas projetadas em dicts seguem os schemas de saída
+"""
+from datetime import datetime
+
+import pytest
+from app.core.config import settings
+from app.service.projecoes import formatar_data
+
+'''
+pytest tests2/test_serializacao.py -v
+'''
+def test_formatar_data():
+    """Mesmo resultado do strftime usado em TransacaoOut"""
+    for data in (datetime(2024, 1, 2, 3, 4, 5), datetime(2025, 12, 31, 23, 59, 59, 999999)):
+        assert formatar_data(data) == data.strftime("%d-%m-%Y %H:%M:%S")
+
+
+@pytest.mark.asyncio
+async def test_respostas_validadas_em_debug(client, monkeypatch):
+    """Em DEBUG cada resposta passa pelo TypeAdapter do schema antes de sair"""
+    monkeypatch.setattr(settings, "DEBUG", True)
+    await client.post("/auth/register", json={"username": "usuario_json", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_json", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    await client.post("/banco/contas/", json={"numero": 123456, "cpf": "12345678901"})
+    await client.post("/banco/transacoes/", json={
+        "numero_conta": 123456, "tipo_de_transacao": "deposito", "valor": 50.0
+    }, headers=headers)
+
+    conta = (await client.get("/banco/contas/123456")).json()
+    assert conta["titular"] == "João Silva"
+    assert conta["saldo"] == 50.0
+    transacao = conta["historico"][0]
+    assert transacao["tipo_de_transacao"] == "deposito"
+    assert datetime.strptime(transacao["data"], "%d-%m-%Y %H:%M:%S")
+
+    clientes = (await client.get("/get/clientes", params={"incluir_historico": True})).json()
+    assert clientes[0]["contas"][0] == conta
+    contas = (await client.get("/get/contas", params={"incluir_historico": True})).json()
+    assert contas == [conta]
+    cliente = (await client.get("/get/cliente/1")).json()
+    assert cliente["contas"][0]["historico"] == []
@@ -0,0 +1,299 @@
+"""
+Teste simples: contas divididas entre dois bancos (shards)
+"""
+from datetime import datetime
+
+import orjson
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.main import app
+from app.database.session import Base, SessaoComShards, get_session
+from app.models.models_conta import Conta
+from app.models.models_transferencia import TransferenciaPendente
+from app.service.service_bancario import ServiceBancario
+from app.service.service_saldos import ServiceSaldos
+from tests2.conftest import engine_test
+
+'''
+pytest tests2/test_shards.py -v
+'''
+# Segundo banco em memória: contas de número ímpar (shard 1); as pares
+# ficam no banco de teste de sempre (shard 0)
+engine_shard = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+
+
+@pytest_asyncio.fixture
+async def client_shards(client):
+    async with engine_shard.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async def sessao_com_shards():
+        async with SessaoComShards(
+            bind=engine_test, shards=[engine_test, engine_shard], expire_on_commit=False, autoflush=False
+        ) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = sessao_com_shards
+    yield client
+    async with engine_shard.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+# Cliente com as contas 10 e 12 (shard 0) e 11 (shard 1), cada uma com saldo 100
+async def preparar(client):
+    await client.post("/auth/register", json={"username": "usuario_shards", "password": "senha123"})
+    login = await client.post("/auth/login", json={"username": "usuario_shards", "password": "senha123"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    cliente = await client.post("/banco/clientes/", json={
+        "nome": "João Silva", "cpf": "12345678901", "endereco": "Rua A", "data_nascimento": "1990-05-15"
+    })
+    for numero in (10, 11, 12):
+        await client.post("/banco/contas/", json={"numero": numero, "cpf": "12345678901"})
+        await client.post("/banco/transacoes/", json={
+            "numero_conta": numero, "tipo_de_transacao": "deposito", "valor": 100.0
+        }, headers=headers)
+    return headers, cliente.json()["id"]
+
+
+async def numeros_no_banco(engine) -> list[int]:
+    async with engine.connect() as conn:
+        return list((await conn.execute(select(Conta.numero).order_by(Conta.numero))).scalars())
+
+
+@pytest.mark.asyncio
+async def test_conta_gravada_no_shard_do_numero(client_shards):
+    """Cada conta vai para o banco "numero % 2"; o titular é replicado nos dois"""
+    await preparar(client_shards)
+    assert await numeros_no_banco(engine_test) == [10, 12]
+    assert await numeros_no_banco(engine_shard) == [11]
+
+    conta = (await client_shards.get("/banco/contas/11")).json()
+    assert (conta["titular"], conta["saldo"], len(conta["historico"])) == ("João Silva", 100.0, 1)
+    saldo = await client_shards.get("/banco/contas/11/saldo")
+    assert saldo.json()["saldo"] == 100.0
+
+
+@pytest.mark.asyncio
+async def test_transferencia_entre_shards(client_shards):
+    """Débito e crédito confirmados cada um no seu banco"""
+    headers, _ = await preparar(client_shards)
+    response = await client_shards.post("/banco/transferencias/", json={
+        "conta_origem": 10, "conta_destino": 11, "valor": 30.0
+    }, headers=headers)
+    assert response.json() == {
+        "mensagem": "Transferencia realizada com sucesso", "saldo_origem": 70.0, "saldo_destino": 130.0
+    }
+
+    # Saldo insuficiente e destino inexistente não mexem na origem
+    response = await client_shards.post("/banco/transferencias/", json={
+        "conta_origem": 11, "conta_destino": 10, "valor": 500.0
+    }, headers=headers)
+    assert response.status_code == 400
+    response = await client_shards.post("/banco/transferencias/", json={
+        "conta_origem": 10, "conta_destino": 13, "valor": 5.0
+    }, headers=headers)
+    assert response.status_code == 404
+    contas = (await client_shards.get("/banco/contas", params={"numeros": "10,11,13"})).json()
+    assert [c["conta"] and c["conta"]["saldo"] for c in contas] == [70.0, 130.0, None]
+
+
+async def pendentes_no_banco(engine) -> list:
+    async with engine.connect() as conn:
+        return list((await conn.execute(select(TransferenciaPendente.id))).scalars())
+
+
+# Falha só no crédito da conta 11 (destino no shard 1)
+def credito_com_falha(monkeypatch, falha):
+    aplicar = ServiceBancario._aplicar_movimento
+
+    async def com_falha(transacao, session):
+        if transacao.numero_conta == 11 and transacao.tipo_de_transacao == "deposito":
+            return await falha()
+        return await aplicar(transacao, session)
+
+    monkeypatch.setattr(ServiceBancario, "_aplicar_movimento", staticmethod(com_falha))
+
+
+@pytest.mark.asyncio
+async def test_credito_recusado_estorna_a_origem(client_shards, monkeypatch):
+    """Destino que some depois do débito: a origem recebe um "estorno" e o histórico fecha com o saldo"""
+    headers, _ = await preparar(client_shards)
+
+    async def conta_sumiu():
+        return 'conta_nao_encontrada'
+
+    with monkeypatch.context() as m:
+        credito_com_falha(m, conta_sumiu)
+        response = await client_shards.post("/banco/transferencias/", json={
+            "conta_origem": 10, "conta_destino": 11, "valor": 30.0
+        }, headers=headers)
+    assert response.status_code == 409
+    assert "estornado" in response.json()["detail"]
+
+    origem = (await client_shards.get("/banco/contas/10")).json()
+    assert origem["saldo"] == 100.0
+    assert [(t["tipo_de_transacao"], t["valor"]) for t in origem["historico"]][-2:] == [
+        ("transferencia_saida", 30.0), ("estorno", 30.0)
+    ]
+    assert (await client_shards.get("/banco/contas/11")).json()["saldo"] == 100.0
+    assert await pendentes_no_banco(engine_test) == []
+
+    # O estorno também é um filtro válido da listagem de transações
+    response = await client_shards.get("/banco/contas/10/transacoes", params={"tipo_de_transacao": "estorno"})
+    assert response.status_code == 200
+    assert [(t["tipo_de_transacao"], t["valor"]) for t in response.json()] == [("estorno", 30.0)]
+
+    # O estorno conta como crédito na soma do histórico
+    async with AsyncSession(engine_test) as session:
+        assert (await ServiceSaldos.reconciliar(session))["saldos_divergentes"] == []
+
+
+@pytest.mark.asyncio
+async def test_credito_que_falhou_fica_pendente_e_e_recuperado(client_shards, monkeypatch):
+    """Shard do destino fora do ar: o débito fica pendente e a recuperação credita uma única vez"""
+    headers, _ = await preparar(client_shards)
+
+    async def shard_fora_do_ar():
+        raise OperationalError("UPDATE", {}, Exception("shard fora do ar"))
+
+    with monkeypatch.context() as m:
+        credito_com_falha(m, shard_fora_do_ar)
+        response = await client_shards.post("/banco/transferencias/", json={
+            "conta_origem": 10, "conta_destino": 11, "valor": 30.0
+        }, headers=headers)
+    assert response.status_code == 503
+    assert (await client_shards.get("/banco/contas/10")).json()["saldo"] == 70.0
+    assert (await client_shards.get("/banco/contas/11")).json()["saldo"] == 100.0
+    pendentes = await pendentes_no_banco(engine_test)
+    assert len(pendentes) == 1
+
+    async def recuperar():
+        async with SessaoComShards(
+            bind=engine_test, shards=[engine_test, engine_shard], expire_on_commit=False, autoflush=False
+        ) as session:
+            return await ServiceBancario.recuperar_transferencias(session, margem_s=0)
+
+    assert await recuperar() == {"creditadas": 1, "estornadas": 0, "pendentes": 0}
+    assert (await client_shards.get("/banco/contas/11")).json()["saldo"] == 130.0
+    assert await pendentes_no_banco(engine_test) == []
+
+    # A pendente volta (o DELETE na origem "se perdeu"): a decisão gravada no
+    # destino impede um segundo crédito
+    async with engine_test.begin() as conn:
+        await conn.execute(insert(TransferenciaPendente).values(
+            id=pendentes[0], conta_origem=10, conta_destino=11, valor=30.0, data=datetime.utcnow()
+        ))
+    assert await recuperar() == {"creditadas": 1, "estornadas": 0, "pendentes": 0}
+    assert (await client_shards.get("/banco/contas/11")).json()["saldo"] == 130.0
+    assert await pendentes_no_banco(engine_test) == []
+
+
+@pytest.mark.asyncio
+async def test_lote_dividido_por_shard(client_shards):
+    """Os itens de cada banco rodam em paralelo; os resultados voltam na ordem do lote"""
+    headers, _ = await preparar(client_shards)
+    response = await client_shards.post("/banco/transacoes/lote", json=[
+        {"numero_conta": 11, "tipo_de_transacao": "saque", "valor": 60.0},
+        {"numero_conta": 10, "tipo_de_transacao": "deposito", "valor": 5.0},
+        {"numero_conta": 11, "tipo_de_transacao": "saque", "valor": 60.0},
+        {"numero_conta": 13, "tipo_de_transacao": "deposito", "valor": 1.0},
+    ], headers=headers)
+    assert [(r["indice"], r["status"], r["saldo"]) for r in response.json()["resultados"]] == [
+        (0, "ok", 40.0), (1, "ok", 105.0), (2, "saldo_insuficiente", None), (3, "conta_nao_encontrada", None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_listagens_juntam_os_shards(client_shards):
+    """Páginas, streaming e cliente com contas enxergam os dois bancos"""
+    headers, cliente_id = await preparar(client_shards)
+
+    # Paginação com cursor global: uma conta por página, sem repetir nem pular
+    numeros, params = [], {"limit": 1}
+    while True:
+        response = await client_shards.get("/get/contas", params=params)
+        if response.status_code == 404 or not response.json():
+            break
+        numeros += [conta["numero"] for conta in response.json()]
+        if "X-Proximo-Cursor" not in response.headers:
+            break
+        params["after"] = response.headers["X-Proximo-Cursor"]
+    assert sorted(numeros) == [10, 11, 12] and len(numeros) == 3
+
+    linhas = (await client_shards.get("/get/contas", params={"formato": "ndjson"})).text.splitlines()
+    assert sorted(orjson.loads(linha)["numero"] for linha in linhas) == [10, 11, 12]
+
+    cliente = (await client_shards.get(f"/get/cliente/{cliente_id}")).json()
+    assert sorted(conta["numero"] for conta in cliente["contas"]) == [10, 11, 12]
+    linhas = (await client_shards.get("/get/clientes", params={"formato": "ndjson"})).text.splitlines()
+    assert [len(orjson.loads(linha)["contas"]) for linha in linhas] == [3]
+
+    # Relatório: os resumos dos dois bancos somados na mesma linha
+    hoje = datetime.utcnow().date().isoformat()
+    response = await client_shards.get("/banco/relatorios/diario", params={"desde": hoje, "ate": hoje}, headers=headers)
+    assert [(l["tipo_de_transacao"], l["quantidade"], l["total"]) for l in response.json()] == [
+        ("deposito", 3, 300.0)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_numero_gerado_depois_do_maior_de_todos_os_shards(client_shards):
+    """A sequência começa depois do maior número já usado em qualquer shard"""
+    await preparar(client_shards)
+    await client_shards.post("/banco/contas/", json={"numero": 100001, "cpf": "12345678901"})  # shard 1
+    response = await client_shards.post("/banco/contas/", json={"cpf": "12345678901"})
+    assert response.status_code == 201
+    assert response.json()["numero"] == 100002
+
+
+@pytest.mark.asyncio
+async def test_replica_do_cliente_que_falhou_e_refeita(client_shards, monkeypatch):
+    """Réplica com erro não derruba a criação; a conta no outro shard copia o cliente"""
+    async def falhar(clientes, shard):
+        raise OperationalError("INSERT", {}, Exception("shard fora do ar"))
+
+    with monkeypatch.context() as m:
+        m.setattr(ServiceBancario, "_replicar_no_shard", staticmethod(falhar))
+        response = await client_shards.post("/banco/clientes/", json={
+            "nome": "Ana", "cpf": "11111111111", "endereco": "Rua A", "data_nascimento": "1990-01-01"
+        })
+    assert response.status_code == 201
+
+    response = await client_shards.post("/banco/contas/", json={"numero": 21, "cpf": "11111111111"})
+    assert response.status_code == 201
+    assert response.json()["titular"] == "Ana"
+    response = await client_shards.post("/banco/contas/", json={"numero": 23, "cpf": "99999999999"})
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_importacao_refeita_mantem_clientes_criados(client_shards, monkeypatch):
+    """Conflito nas contas depois dos clientes confirmados: a segunda tentativa não os vê como duplicados"""
+    headers, cliente_id = await preparar(client_shards)
+    inserir_replicas = ServiceBancario.inserir_replicas
+    conflitos = []
+
+    # Na primeira tentativa, outra escrita grava a conta 31 entre a busca e o
+    # INSERT das contas (a chamada só com a titular; a réplica leva os dois clientes)
+    async def com_conflito(clientes, shard):
+        await inserir_replicas(clientes, shard)
+        if not conflitos and len(clientes) == 1:
+            conflitos.append(31)
+            await shard.execute(insert(Conta).values(numero=31, cliente_id=cliente_id, saldo=0.0, agencia="0001"))
+
+    monkeypatch.setattr(ServiceBancario, "inserir_replicas", staticmethod(com_conflito))
+    corpo = (
+        "nome,cpf,endereco,data_nascimento,numero\n"
+        "Bia,22222222222,Rua B,1980-01-01,31\n"
+        "Caio,33333333333,Rua C,1980-01-01,\n"
+    )
+    response = await client_shards.post("/banco/importacao", content=corpo, headers=headers)
+    assert conflitos == [31]
+    corpo = response.json()
+    assert (corpo["clientes_criados"], corpo["contas_criadas"], corpo["erros"]) == (2, 1, 0)
+    assert (await client_shards.get("/banco/contas/31")).json()["titular"] == "Bia"